@@ -0,0 +1,263 @@
+# backend/agents/agent_db.py
+"""
+Shared MongoDB access for the Lambda agents.
+
+Every agent that touches tickets goes through this module, so connection
+tuning lives in one place:
+
+- The Secrets Manager secret is cached for SECRET_CACHE_TTL_SECONDS.
+- The client is created on first use, once per container, with an
+  explicit pool size, timeouts, retryable reads/writes and wire
+  compression. There is no `ismaster`/`ping` round trip: the first real
+  query establishes the connection.
+- Pool checkouts are timed, and `log_connection_stats()` reports how long
+  getting a client and a pooled connection took.
+- Collections an agent can work without (caches, indexes) are wrapped in
+  an OptionalCollection, which skips them for DB_RETRY_SECONDS after an
+  error instead of failing the invocation.
+"""
+import os
+import json
+import time
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from bson import ObjectId
+from pymongo import MongoClient, monitoring
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+try:
+    from .ticket_cache import invalidate_tickets
+except ImportError:  # Lambda runs this module top-level
+    from ticket_cache import invalidate_tickets
+
+# --- Configuration ---
+SECRET_ID = os.environ.get("SECRET_ID", "priorityops/docdb")
+DB_NAME = "priorityopsdb"
+TICKETS_COLLECTION = "tickets"
+AUDIT_COLLECTION = "ticket_audit"
+# The tickets' write generation, behind the API's ETags; must match
+# backend/services/counter_service.py
+COUNTERS_COLLECTION = "ticket_counters"
+GENERATION_ID = "generation"
+
+SECRET_CACHE_TTL_SECONDS = float(os.environ.get("SECRET_CACHE_TTL_SECONDS", "900"))
+
+# A Lambda container serves one invocation at a time, so a small pool is
+# enough; the timeouts keep a slow cluster from eating the whole invocation.
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", "4"))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", "3000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", "10000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+# zstd/snappy need extra packages; zlib ships with Python
+MONGO_COMPRESSORS = os.environ.get("MONGO_COMPRESSORS", "zlib")
+
+# After a Mongo error an optional collection is skipped for this long, so an
+# unreachable cluster costs one timeout rather than one per lookup
+DB_RETRY_SECONDS = 60.0
+
+# Legacy embedded history, kept out of agent reads (see
+# backend/migrations/move_audit_trail.py)
+_LEGACY_HISTORY_EXCLUDED = {"audit_trail": 0, "agent_history": 0}
+
+logger = logging.getLogger()
+
+
+class _PoolTimer(monitoring.ConnectionPoolListener):
+    """Times connection checkouts from the pool."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.connections_created = 0
+        self.checkout_ms_total = 0.0
+        self.checkout_ms_max = 0.0
+
+    def connection_checked_out(self, event):
+        ms = event.duration * 1000
+        self.checkouts += 1
+        self.checkout_ms_total += ms
+        self.checkout_ms_max = max(self.checkout_ms_max, ms)
+
+    def connection_created(self, event):
+        self.connections_created += 1
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+    def connection_check_out_started(self, event): pass
+    def connection_check_out_failed(self, event): pass
+    def connection_checked_in(self, event): pass
+
+
+_client: Optional[MongoClient] = None
+_credentials: Optional[Dict[str, Any]] = None
+_credentials_fetched_at = 0.0
+_pool_timer = _PoolTimer()
+_stats: Dict[str, Any] = {"secret_fetches": 0, "client_ms": None}
+
+
+def _get_credentials() -> Dict[str, Any]:
+    """The MongoDB secret, fetched from Secrets Manager at most once per TTL."""
+    global _credentials, _credentials_fetched_at
+    if _credentials is not None and time.monotonic() - _credentials_fetched_at < SECRET_CACHE_TTL_SECONDS:
+        return _credentials
+
+    import boto3
+    secret_val = boto3.client("secretsmanager").get_secret_value(SecretId=SECRET_ID)
+    _credentials = json.loads(secret_val["SecretString"])
+    _credentials_fetched_at = time.monotonic()
+    _stats["secret_fetches"] += 1
+    return _credentials
+
+
+def get_client() -> MongoClient:
+    """The container's MongoClient, created on first use."""
+    global _client
+    if _client is not None:
+        return _client
+
+    logger.info("Initializing new MongoDB Atlas connection...")
+    started = time.perf_counter()
+    try:
+        secret = _get_credentials()
+        conn_str = secret["connection_string"].replace("<password>", secret["password"])
+        _client = MongoClient(
+            conn_str,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+            waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            retryWrites=True,
+            retryReads=True,
+            compressors=MONGO_COMPRESSORS,
+            appname="priorityops-agents",
+            event_listeners=[_pool_timer],
+        )
+    except Exception as e:
+        logger.error(f"FATAL: Could not connect to MongoDB Atlas: {e}")
+        raise # Fail the Lambda if DB connection fails
+
+    _stats["client_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return _client
+
+
+def get_db() -> Database:
+    return get_client()[DB_NAME]
+
+
+def connection_stats() -> Dict[str, Any]:
+    """Client creation and pool checkout timings for this container."""
+    checkouts = _pool_timer.checkouts
+    return {
+        **_stats,
+        "checkouts": checkouts,
+        "connections_created": _pool_timer.connections_created,
+        "checkout_ms_avg": round(_pool_timer.checkout_ms_total / checkouts, 2) if checkouts else None,
+        "checkout_ms_max": round(_pool_timer.checkout_ms_max, 2),
+    }
+
+
+def log_connection_stats() -> None:
+    logger.info(f"MongoDB connection stats: {json.dumps(connection_stats())}")
+
+
+class OptionalCollection:
+    """
+    A collection the caller can work without. `get()` returns None while
+    it is skipped; report an error from using it to `failed()` and it is
+    skipped for DB_RETRY_SECONDS, logging `fallback` once.
+    """
+
+    def __init__(self, collection: Callable[[], Collection], fallback: str):
+        self._collection = collection
+        self.fallback = fallback
+        self._skipped_until = 0.0
+
+    def get(self) -> Optional[Collection]:
+        if time.monotonic() < self._skipped_until:
+            return None
+        try:
+            return self._collection()
+        except Exception as e:
+            self.failed(e)
+            return None
+
+    def failed(self, error: Exception) -> None:
+        logger.warning(f"{self.fallback}: {error}")
+        self._skipped_until = time.monotonic() + DB_RETRY_SECONDS
+
+
+def fetch_ticket(ticket_id: str) -> Optional[Dict[str, Any]]:
+    """A ticket document by id, or None if there is no such ticket."""
+    return get_db()[TICKETS_COLLECTION].find_one({"_id": ObjectId(ticket_id)}, _LEGACY_HISTORY_EXCLUDED)
+
+
+def fetch_tickets(ticket_ids: Iterable[ObjectId], fields: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Tickets by id in one `$in` query, with only `fields` fetched, keyed by
+    their string id. Ids with no ticket are absent from the result.
+    """
+    cursor = get_db()[TICKETS_COLLECTION].find(
+        {"_id": {"$in": list(ticket_ids)}},
+        {field: 1 for field in fields}
+    )
+    return {str(doc["_id"]): doc for doc in cursor}
+
+
+def apply_agent_update(
+    ticket_id: str,
+    changes: Dict[str, Any],
+    history: Dict[str, Any],
+    expected: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    `$set` an agent's changes on a ticket and, if it was modified, append
+    `history` to the audit collection, bump the write generation and drop
+    the API's cached copy.
+    With `expected` (a filter such as {"status": "Open"}), the ticket is
+    only updated while it still matches. Returns whether the ticket was
+    modified.
+    """
+    obj_id = ObjectId(ticket_id)
+    db = get_db()
+    result = db[TICKETS_COLLECTION].update_one({**(expected or {}), "_id": obj_id}, {"$set": changes})
+    if result.modified_count == 0:
+        return False
+
+    db[AUDIT_COLLECTION].insert_one({"timestamp": datetime.utcnow(), **history, "ticket_id": obj_id})
+    db[COUNTERS_COLLECTION].update_one({"_id": GENERATION_ID}, {"$inc": {"seq": 1}}, upsert=True)
+    invalidate_tickets(str(obj_id))
+    return True
+
+
+def find_breached(
+    cutoff: datetime,
+    statuses: List[str],
+    priorities: List[str],
+    fields: List[str]
+) -> Iterator[Dict[str, Any]]:
+    """
+    Tickets in one of `statuses` and `priorities` not updated since
+    `cutoff`, with only `fields` fetched. Served by the
+    (status, priority, updated_at) index.
+    """
+    query = {
+        "status": {"$in": statuses},
+        "priority": {"$in": priorities},
+        "updated_at": {"$lt": cutoff},
+    }
+    return get_db()[TICKETS_COLLECTION].find(query, {field: 1 for field in fields})
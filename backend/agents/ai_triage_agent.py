@@ -4,6 +4,11 @@ import json
 import boto3
 import logging
 
+try:
+    from .payload import extend_payload, read_section, upgrade_payload
+except ImportError:  # Lambda runs this module top-level
+    from payload import extend_payload, read_section, upgrade_payload
+
 # --- Configuration ---
 # Model ID for Claude 3 Sonnet on Bedrock
 BEDROCK_MODEL_ID = "anthropic.claude-3-sonnet-20240229-v1:0"
@@ -40,20 +45,20 @@ def lambda_handler(event, context):
     """
     Lambda handler that uses Bedrock to triage a ticket.
     
-    Input: The output from the 'duplicate_detector' agent.
-           { "ticket_data": {...}, "duplicate_check": {...} }
-    Output: The input, plus new 'triage_results'.
+    Input: The workflow payload from the 'duplicate_detector' agent (see payload.py).
+    Output: The payload, plus a 'triage' section. The 'ticket' section is
+            dropped: the update agent only needs the results.
     """
     logger.info(f"Received event: {json.dumps(event)}")
     
     try:
-        # 1. Get ticket data from the event
-        # The 'event' is the JSON output from the previous agent
-        ticket_data = event.get('ticket_data')
-        duplicate_check = event.get('duplicate_check')
+        # 1. Get ticket data from the payload
+        ticket_id = upgrade_payload(event)['ticket_id']
+        ticket_data = read_section(event, 'ticket')
+        duplicate_check = read_section(event, 'duplicate')
         
         if not ticket_data:
-            raise ValueError("Event is missing 'ticket_data'")
+            raise ValueError("Payload is missing the 'ticket' section")
         
         title = ticket_data.get('title')
         description = ticket_data.get('description')
@@ -61,18 +66,14 @@ def lambda_handler(event, context):
         if not all([title, description]):
             raise ValueError("Ticket data is missing title or description")
 
-        logger.info(f"Triaging ticket: {ticket_data.get('id')}")
+        logger.info(f"Triaging ticket: {ticket_id}")
 
         # 2. Check for duplicates
         # If it's a duplicate, we can skip the AI triage
         if duplicate_check and duplicate_check.get('is_duplicate'):
             logger.info("Ticket is a duplicate. Skipping AI triage.")
-            # Pass the data through, the update_agent will handle it
-            return {
-                "ticket_data": ticket_data,
-                "duplicate_check": duplicate_check,
-                "triage_results": None # Explicitly set to None
-            }
+            # Pass the results through, the update_agent will handle it
+            return extend_payload(event, drop=('ticket',), triage=None)
 
         # 3. Craft the User Prompt for Bedrock
         user_prompt = f"Please triage this ticket:\n\nTitle: {title}\nDescription: {description}"
@@ -108,14 +109,8 @@ def lambda_handler(event, context):
         # Parse the JSON string into a Python dict
         triage_results = json.loads(raw_json_response)
         
-        # 6. Return all data (original + new)
-        # We must return everything, so the final agent
-        # has all the info it needs to update the database.
-        return {
-            "ticket_data": ticket_data,
-            "duplicate_check": duplicate_check,
-            "triage_results": triage_results
-        }
+        # 6. Return the payload with the triage results added
+        return extend_payload(event, drop=('ticket',), triage=triage_results)
 
     except Exception as e:
         logger.error(f"ERROR: {e}")
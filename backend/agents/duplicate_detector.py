@@ -6,11 +6,37 @@ import logging
 from opensearchpy import OpenSearch, RequestsHttpConnection
 from requests_aws4auth import AWS4Auth
 
+try:
+    from .agent_db import get_db
+    from .embedding_cache import embedding_cache
+    from .embeddings import create_embedding_provider
+    from .lexical_prefilter import (
+        LEXICAL_INDEX_BACKEND, LEXICAL_INDEX_COLLECTION, LexicalPrefilter,
+        LocalLexicalIndex, MongoLexicalIndex
+    )
+    from .payload import extend_payload, read_section, upgrade_payload
+    from .vector_index import (
+        RECENT_VECTORS_COLLECTION, VECTOR_INDEX_BACKEND, LocalVectorIndex,
+        OpenSearchVectorIndex, RecentVectorBuffer
+    )
+except ImportError:  # Lambda runs this module top-level
+    from agent_db import get_db
+    from embedding_cache import embedding_cache
+    from embeddings import create_embedding_provider
+    from lexical_prefilter import (
+        LEXICAL_INDEX_BACKEND, LEXICAL_INDEX_COLLECTION, LexicalPrefilter,
+        LocalLexicalIndex, MongoLexicalIndex
+    )
+    from payload import extend_payload, read_section, upgrade_payload
+    from vector_index import (
+        RECENT_VECTORS_COLLECTION, VECTOR_INDEX_BACKEND, LocalVectorIndex,
+        OpenSearchVectorIndex, RecentVectorBuffer
+    )
+
 # --- Configuration ---
 # We MUST set OPENSEARCH_HOST as an environment variable in this Lambda
 OPENSEARCH_HOST = os.environ.get("OPENSEARCH_HOST", "") 
 OPENSEARCH_INDEX = "tickets-index" # The name of our index
-BEDROCK_MODEL_ID = "amazon.titan-embed-text-v1" # The embedding model
 
 # Setup logging
 logger = logging.getLogger()
@@ -18,20 +44,8 @@ logger.setLevel(logging.INFO)
 
 # --- Boto3 Clients (reusable) ---
 bedrock_runtime = boto3.client(service_name="bedrock-runtime")
-session = boto3.Session()
-credentials = session.get_credentials()
-region = session.region_name or "us-east-1"
 service = 'aoss' # 'Amazon OpenSearch Serverless'
 
-# Create the AWS authentication object
-awsauth = AWS4Auth(
-    credentials.access_key,
-    credentials.secret_key,
-    region,
-    service,
-    session_token=credentials.token
-)
-
 # --- OpenSearch Client (reusable) ---
 os_client = None
 
@@ -48,6 +62,17 @@ def get_opensearch_client():
         raise ValueError("OPENSEARCH_HOST environment variable is not set.")
 
     logger.info(f"Initializing OpenSearch client for host: {OPENSEARCH_HOST}")
+
+    # Create the AWS authentication object
+    session = boto3.Session()
+    credentials = session.get_credentials()
+    awsauth = AWS4Auth(
+        credentials.access_key,
+        credentials.secret_key,
+        session.region_name or "us-east-1",
+        service,
+        session_token=credentials.token
+    )
     
     os_client = OpenSearch(
         hosts=[{'host': OPENSEARCH_HOST, 'port': 443}],
@@ -59,93 +84,128 @@ def get_opensearch_client():
     )
     return os_client
 
+# --- Vector Index (reusable) ---
+vector_index = None
+
+def get_vector_index():
+    """
+    Returns the reusable vector index: the OpenSearch kNN collection, or a
+    local memory-mapped index when VECTOR_INDEX_BACKEND is "local".
+    OpenSearch writes are not refreshed immediately, so tickets indexed
+    in the last few minutes are also searched in a recent-vectors buffer.
+    """
+    global vector_index
+    if vector_index is None:
+        if VECTOR_INDEX_BACKEND == "local":
+            vector_index = LocalVectorIndex()
+        else:
+            vector_index = OpenSearchVectorIndex(
+                lambda: get_opensearch_client(),
+                OPENSEARCH_INDEX,
+                recent=RecentVectorBuffer(lambda: get_db()[RECENT_VECTORS_COLLECTION])
+            )
+    return vector_index
+
+# --- Embedding Provider (reusable) ---
+embedding_provider = None
+
+def get_embedding_provider():
+    """
+    Returns the reusable embedding provider: Bedrock Titan, or a local
+    sentence-transformers model when EMBEDDING_PROVIDER is "local".
+    """
+    global embedding_provider
+    if embedding_provider is None:
+        embedding_provider = create_embedding_provider(lambda: bedrock_runtime)
+    return embedding_provider
+
+# --- Lexical Prefilter (reusable) ---
+lexical_prefilter = None
+
+def get_lexical_prefilter():
+    """
+    Returns the reusable MinHash/LSH prefilter, or None when
+    LEXICAL_INDEX_BACKEND is "off".
+    """
+    global lexical_prefilter
+    if lexical_prefilter is None and LEXICAL_INDEX_BACKEND != "off":
+        if LEXICAL_INDEX_BACKEND == "local":
+            lexical_prefilter = LexicalPrefilter(LocalLexicalIndex())
+        else:
+            lexical_prefilter = LexicalPrefilter(MongoLexicalIndex(lambda: get_db()[LEXICAL_INDEX_COLLECTION]))
+    return lexical_prefilter
+
 # --- Lambda Handler (The main function) ---
 def lambda_handler(event, context):
     """
     Lambda handler that detects duplicate tickets.
     
-    Input: The full ticket document from the 'get_ticket_details' agent.
-    Output: The original ticket document, plus new 'duplicate_check' data.
+    Input: The workflow payload from the 'get_ticket_details' agent (see payload.py).
+    Output: The same payload, plus a 'duplicate' section. Its 'stage' says
+    which stage decided: "lexical" (MinHash/LSH, score is the estimated
+    Jaccard similarity) or "semantic" (embedding kNN).
     """
     logger.info(f"Received event: {json.dumps(event)}")
     
     try:
-        # 1. Get ticket data from the event
-        # The 'event' is the entire ticket JSON from the previous step
-        ticket_id = event.get('id') or event.get('_id') # Handle both 'id' and '_id'
-        title = event.get('title')
-        description = event.get('description')
+        # 1. Get ticket data from the payload
+        ticket_id = upgrade_payload(event)['ticket_id']
+        ticket = read_section(event, 'ticket')
+        title = ticket.get('title')
+        description = ticket.get('description')
         
         if not all([ticket_id, title, description]):
             raise ValueError("Event is missing ticket_id, title, or description")
 
         logger.info(f"Processing ticket: {ticket_id}")
 
-        # 2. Generate Vector from Bedrock
+        # 2. Lexical prefilter: near-verbatim copies (alert storms,
+        # re-submitted forms) are resolved without an embedding
+        prefilter = get_lexical_prefilter()
+        if prefilter is not None:
+            match = prefilter.check(ticket_id, title, description)
+            prefilter.log_stats()
+            if match:
+                logger.info(f"Found lexical duplicate: {match[0]} with estimated Jaccard {match[1]}")
+                return extend_payload(event, duplicate={
+                    "is_duplicate": True,
+                    "duplicate_of": match[0],
+                    "duplicate_score": match[1],
+                    "stage": "lexical"
+                })
+
+        # 3. Generate Vector with the embedding provider, unless this exact
+        # text has been embedded before (retries, re-runs, templated alerts)
         text_to_embed = f"Title: {title}\nDescription: {description}"
-        body = json.dumps({"inputText": text_to_embed})
-        
-        response = bedrock_runtime.invoke_model(
-            body=body, 
-            modelId=BEDROCK_MODEL_ID, 
-            accept="application/json", 
-            contentType="application/json"
-        )
-        response_body = json.loads(response.get("body").read())
-        vector = response_body.get("embedding")
+        provider = get_embedding_provider()
+        embedding_cache.reset_stats()
+        vector = embedding_cache.get_or_compute(text_to_embed, provider.model_id, provider.embed)
+        embedding_cache.log_stats()
         
         if not vector:
-            raise Exception("Failed to generate vector from Bedrock")
+            raise Exception(f"Failed to generate vector with {provider.model_id}")
             
         logger.info(f"Successfully generated vector for ticket {ticket_id}")
 
-        # 3. Connect to OpenSearch
-        client = get_opensearch_client()
-        
-        # 4. Index the document in OpenSearch
+        # 4. Index the vector
         # This saves the vector so future tickets can find *this* ticket.
-        doc_to_index = {
-            'ticket_id': ticket_id,
-            'title': title,
-            'description': description,
-            'ticket_vector': vector # The vector field
-        }
-        
-        client.index(
-            index=OPENSEARCH_INDEX,
-            body=doc_to_index,
-            id=ticket_id,
-            refresh=True # Force refresh for the demo (not for production)
-        )
+        index = get_vector_index()
+        index.add(ticket_id, vector, title=title, description=description)
         logger.info(f"Successfully indexed document {ticket_id}")
 
-        # 5. Query for Duplicates (k-NN Vector Search)
-        knn_query = {
-            "size": 3, # Find the top 3 similar tickets
-            "query": {
-                "knn": {
-                    "ticket_vector": {
-                        "vector": vector,
-                        "k": 3
-                    }
-                }
-            }
-        }
-        
-        response = client.search(index=OPENSEARCH_INDEX, body=knn_query)
-        logger.info(f"OpenSearch KNN response: {response}")
+        # 5. Query for Duplicates (top 3 similar tickets)
+        hits = index.search(vector, k=3)
+        logger.info(f"Vector index hits: {hits}")
 
         # 6. Analyze Results and Prepare Output
         duplicate_check_result = {
             "is_duplicate": False,
             "duplicate_of": None,
-            "duplicate_score": 0
+            "duplicate_score": 0,
+            "stage": "semantic"
         }
 
-        for hit in response['hits']['hits']:
-            hit_id = hit['_id']
-            hit_score = hit['_score']
-
+        for hit_id, hit_score in hits:
             # Don't match with itself!
             if hit_id == ticket_id:
                 continue
@@ -156,18 +216,15 @@ def lambda_handler(event, context):
                 logger.info(f"Found duplicate: {hit_id} with score {hit_score}")
                 duplicate_check_result = {
                     "is_duplicate": True,
-                    "duplicate_of": hit['_source']['ticket_id'],
-                    "duplicate_score": hit_score
+                    "duplicate_of": hit_id,
+                    "duplicate_score": hit_score,
+                    "stage": "semantic"
                 }
                 break # Stop at the first match
 
-        # 7. Return the combined data
-        # We must return the original ticket data AND our new results
-        # so the next agent (AI Triage) can use them.
-        return {
-            "ticket_data": event, # The original input event
-            "duplicate_check": duplicate_check_result
-        }
+        # 7. Return the payload with our results added, so the next agent
+        # (AI Triage) can use them
+        return extend_payload(event, duplicate=duplicate_check_result)
         
     except Exception as e:
         logger.error(f"ERROR: {e}")
@@ -0,0 +1,172 @@
+# backend/agents/embedding_cache.py
+"""
+Content-hash cache for text embeddings.
+
+The same title and description get embedded again on Step Functions
+retries, re-runs and tickets templated from monitoring alerts. Embeddings
+are cached under a hash of the model id and the normalized text, in two
+tiers:
+
+- an in-process LRU, reused by a warm Lambda container
+- the `embedding_cache` Mongo collection, shared by every container
+
+Mongo entries carry `last_used_at`; a TTL index on it (see
+backend/utils/indexes.py) expires entries unused for
+EMBEDDING_CACHE_TTL_SECONDS, and `evict`, `evict_model` and `evict_stale`
+remove entries explicitly. The cache never fails the caller: if Mongo is
+unavailable it falls back to the local tier for a while (see
+agent_db.OptionalCollection).
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+try:
+    from .agent_db import OptionalCollection, get_db
+except ImportError:  # Lambda runs this module top-level
+    from agent_db import OptionalCollection, get_db
+
+EMBEDDING_CACHE_COLLECTION = "embedding_cache"
+EMBEDDING_CACHE_LOCAL_SIZE = int(os.environ.get("EMBEDDING_CACHE_LOCAL_SIZE", "1024"))
+# Must match the TTL index in backend/utils/indexes.py
+EMBEDDING_CACHE_TTL_SECONDS = 30 * 24 * 3600
+
+# Assumed cost of one embedding call until one has been timed
+DEFAULT_EMBEDDING_MS = 150.0
+
+logger = logging.getLogger()
+
+
+def normalize_text(text: str) -> str:
+    """
+    Unicode NFKC with runs of whitespace collapsed. Case is kept: it can
+    change the embedding, so differently cased texts are different entries.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def cache_key(model_id: str, text: str) -> str:
+    return hashlib.sha256(f"{model_id}\0{normalize_text(text)}".encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """Two-tier (local LRU, then Mongo) cache of embeddings by content hash."""
+
+    def __init__(self, collection: Callable[[], Any], local_size: int = EMBEDDING_CACHE_LOCAL_SIZE):
+        self._db = OptionalCollection(collection, "Embedding cache collection unavailable, using the local tier only")
+        self._local: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.local_size = local_size
+        # Running average of embedding call latency, for the saved-time estimate
+        self._compute_ms_total = 0.0
+        self._computes = 0
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        """Start a new reporting window (one per invocation)."""
+        self._stats = {"local_hits": 0, "db_hits": 0, "misses": 0, "compute_ms": 0.0, "lookup_ms": 0.0}
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._local[key] = vector
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    def get_or_compute(self, text: str, model_id: str, compute: Callable[[str], List[float]]) -> List[float]:
+        """The embedding of `text` under `model_id`, computed with `compute` only on a miss."""
+        key = cache_key(model_id, text)
+
+        vector = self._local.get(key)
+        if vector is not None:
+            self._local.move_to_end(key)
+            self._stats["local_hits"] += 1
+            return vector
+
+        collection = self._db.get()
+        if collection is not None:
+            started = time.perf_counter()
+            try:
+                doc = collection.find_one_and_update(
+                    {"_id": key},
+                    {"$set": {"last_used_at": datetime.utcnow()}},
+                    projection={"vector": 1}
+                )
+            except Exception as e:
+                self._db.failed(e)
+                collection = doc = None
+            self._stats["lookup_ms"] += (time.perf_counter() - started) * 1000
+            if doc is not None:
+                self._stats["db_hits"] += 1
+                self._remember(key, doc["vector"])
+                return doc["vector"]
+
+        started = time.perf_counter()
+        vector = compute(text)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._stats["misses"] += 1
+        self._stats["compute_ms"] += elapsed_ms
+        self._compute_ms_total += elapsed_ms
+        self._computes += 1
+        if not vector:
+            return vector  # A failed embedding is the caller's to handle, never cached
+
+        self._remember(key, vector)
+        if collection is not None:
+            now = datetime.utcnow()
+            try:
+                collection.update_one(
+                    {"_id": key},
+                    {"$set": {"model_id": model_id, "vector": vector, "created_at": now, "last_used_at": now}},
+                    upsert=True
+                )
+            except Exception as e:
+                self._db.failed(e)
+        return vector
+
+    def evict(self, text: str, model_id: str) -> None:
+        """Remove one entry from both tiers."""
+        key = cache_key(model_id, text)
+        self._local.pop(key, None)
+        collection = self._db.get()
+        if collection is not None:
+            collection.delete_one({"_id": key})
+
+    def evict_model(self, model_id: str) -> int:
+        """Remove every stored entry for `model_id` (e.g. after a model upgrade)."""
+        self._local.clear()  # Local keys cannot be traced back to a model
+        collection = self._db.get()
+        return collection.delete_many({"model_id": model_id}).deleted_count if collection is not None else 0
+
+    def evict_stale(self, max_age_seconds: float = EMBEDDING_CACHE_TTL_SECONDS) -> int:
+        """Remove stored entries unused for `max_age_seconds`; returns how many."""
+        collection = self._db.get()
+        if collection is None:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+        return collection.delete_many({"last_used_at": {"$lt": cutoff}}).deleted_count
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and estimated time saved in the current window."""
+        s = self._stats
+        hits = s["local_hits"] + s["db_hits"]
+        lookups = hits + s["misses"]
+        avg_compute_ms = self._compute_ms_total / self._computes if self._computes else DEFAULT_EMBEDDING_MS
+        return {
+            **{name: s[name] for name in ("local_hits", "db_hits", "misses")},
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            "compute_ms": round(s["compute_ms"], 1),
+            "lookup_ms": round(s["lookup_ms"], 1),
+            "saved_ms": round(max(hits * avg_compute_ms - s["lookup_ms"], 0.0), 1),
+            "local_entries": len(self._local),
+        }
+
+    def log_stats(self) -> None:
+        logger.info(f"Embedding cache stats: {json.dumps(self.stats())}")
+
+
+embedding_cache = EmbeddingCache(lambda: get_db()[EMBEDDING_CACHE_COLLECTION])
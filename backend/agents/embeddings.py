@@ -0,0 +1,199 @@
+# backend/agents/embeddings.py
+"""
+Embedding providers for the agents.
+
+Every provider turns text into a vector through the same interface
+(`model_id`, `embed`, `embed_many`), so the duplicate detector, or any
+other agent, can switch between them with EMBEDDING_PROVIDER:
+
+- "bedrock" (default): BedrockEmbeddingProvider, one remote Titan call per
+  text.
+- "local": SentenceTransformerProvider, a CPU sentence-transformers model
+  (EMBEDDING_MODEL_NAME) loaded once per process. Concurrent `embed`
+  calls are micro-batched into a single `encode` call. Needs the
+  sentence-transformers package (requirements-ml.txt), so it is meant
+  for container-image Lambdas and long-running workers.
+
+Providers do not cache; callers wrap calls in the embedding cache, keyed by
+`model_id`, so vectors from different models never mix. Vectors from
+different models also differ in dimension: each model needs its own
+vector index.
+"""
+import os
+import json
+import queue
+import threading
+import time
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+EMBEDDING_PROVIDER = os.environ.get("EMBEDDING_PROVIDER", "bedrock")
+BEDROCK_EMBEDDING_MODEL_ID = "amazon.titan-embed-text-v1"
+EMBEDDING_MODEL_NAME = os.environ.get("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+
+# Micro-batching: a batch is encoded once it holds this many texts or the
+# first text in it has waited this long
+EMBEDDING_MAX_BATCH_SIZE = int(os.environ.get("EMBEDDING_MAX_BATCH_SIZE", "32"))
+EMBEDDING_MAX_WAIT_MS = float(os.environ.get("EMBEDDING_MAX_WAIT_MS", "5"))
+
+logger = logging.getLogger()
+
+Vector = List[float]
+
+
+class EmbeddingProvider(ABC):
+    """Turns text into embedding vectors with one model."""
+
+    model_id: str
+
+    def embed(self, text: str) -> Vector:
+        return self.embed_many([text])[0]
+
+    @abstractmethod
+    def embed_many(self, texts: Sequence[str]) -> List[Vector]:
+        pass
+
+
+class BedrockEmbeddingProvider(EmbeddingProvider):
+    """Amazon Titan embeddings through Bedrock, one request per text."""
+
+    def __init__(self, client: Callable[[], Any], model_id: str = BEDROCK_EMBEDDING_MODEL_ID):
+        self._client = client
+        self.model_id = model_id
+
+    def embed(self, text):
+        response = self._client().invoke_model(
+            body=json.dumps({"inputText": text}),
+            modelId=self.model_id,
+            accept="application/json",
+            contentType="application/json"
+        )
+        return json.loads(response.get("body").read()).get("embedding")
+
+    def embed_many(self, texts):
+        # Titan text embeddings take one input per request
+        return [self.embed(text) for text in texts]
+
+
+_models: Dict[str, Any] = {}
+_models_lock = threading.Lock()
+
+
+def load_sentence_transformer(model_name: str) -> Any:
+    """The process's instance of `model_name`, loaded on first use."""
+    with _models_lock:
+        if model_name not in _models:
+            from sentence_transformers import SentenceTransformer
+            started = time.perf_counter()
+            _models[model_name] = SentenceTransformer(model_name, device="cpu")
+            logger.info(f"Loaded embedding model {model_name} in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return _models[model_name]
+
+
+class _MicroBatcher:
+    """
+    Collects texts submitted from any thread and encodes them together on
+    one worker thread, up to `max_batch_size` texts or `max_wait_ms` after
+    the first one arrived.
+    """
+
+    def __init__(self, encode: Callable[[List[str]], List[Vector]], max_batch_size: int, max_wait_ms: float):
+        self._encode = encode
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, text: str) -> "Future[Vector]":
+        future: "Future[Vector]" = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._thread.start()
+        self._queue.put((text, future))
+        return future
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                vectors = self._encode([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+
+class SentenceTransformerProvider(EmbeddingProvider):
+    """A local sentence-transformers model on CPU, with micro-batched `embed`."""
+
+    def __init__(
+        self,
+        model_name: str = EMBEDDING_MODEL_NAME,
+        max_batch_size: int = EMBEDDING_MAX_BATCH_SIZE,
+        max_wait_ms: float = EMBEDDING_MAX_WAIT_MS,
+        model: Any = None
+    ):
+        self.model_id = model_name
+        self._model = model
+        self.max_batch_size = max_batch_size
+        self._batcher = _MicroBatcher(self.embed_many, max_batch_size, max_wait_ms)
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            self._model = load_sentence_transformer(self.model_id)
+        return self._model
+
+    def embed(self, text):
+        return self._batcher.submit(text).result()
+
+    def embed_many(self, texts):
+        vectors = self.model.encode(
+            list(texts),
+            batch_size=self.max_batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return [vector.tolist() for vector in vectors]
+
+    def stats(self) -> Dict[str, Any]:
+        batcher = self._batcher
+        return {
+            "batches": batcher.batches,
+            "texts": batcher.items,
+            "avg_batch_size": round(batcher.items / batcher.batches, 2) if batcher.batches else None,
+        }
+
+
+def create_embedding_provider(bedrock_client: Callable[[], Any]) -> EmbeddingProvider:
+    """The provider EMBEDDING_PROVIDER selects."""
+    if EMBEDDING_PROVIDER == "local":
+        return SentenceTransformerProvider()
+    return BedrockEmbeddingProvider(bedrock_client)
+
+
+def measure_throughput(provider: EmbeddingProvider, texts: Sequence[str], concurrency: int = 8) -> float:
+    """Tickets embedded per second when `concurrency` callers each `embed` one text at a time."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(provider.embed, texts))
+    return len(texts) / (time.perf_counter() - started)
@@ -3,14 +3,14 @@ import os
 import json
 import boto3
 import logging
-from pymongo import MongoClient
-from bson import ObjectId
 from datetime import datetime, timedelta
 
+try:
+    from .agent_db import find_breached, apply_agent_update, log_connection_stats
+except ImportError:  # Lambda runs this module top-level
+    from agent_db import find_breached, apply_agent_update, log_connection_stats
+
 # --- Configuration ---
-SECRET_ID = os.environ.get("SECRET_ID", "priorityops/docdb")
-DB_NAME = "priorityopsdb"
-COLLECTION_NAME = "tickets"
 # This Lambda MUST have this environment variable set to send alerts
 SNS_TOPIC_ARN = os.environ.get("SNS_TOPIC_ARN", "") 
 # Define our SLA. We'll escalate tickets older than 1 hour.
@@ -20,39 +20,9 @@ SLA_HOURS = 1
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# --- Boto3 and DB Clients (reusable) ---
-db_client = None
+# --- Boto3 Clients (reusable) ---
 sns_client = boto3.client("sns")
 
-def get_db_connection():
-    """
-    Initializes and returns a synchronous pymongo client.
-    Fetches credentials from AWS Secrets Manager.
-    """
-    global db_client
-    if db_client:
-        logger.info("Reusing existing MongoDB connection.")
-        return db_client
-
-    logger.info("Initializing new MongoDB Atlas connection...")
-    try:
-        sm_client = boto3.client("secretsmanager")
-        secret_val = sm_client.get_secret_value(SecretId=SECRET_ID)
-        secret = json.loads(secret_val["SecretString"])
-        
-        conn_str = secret["connection_string"].replace("<password>", secret["password"])
-        
-        client = MongoClient(conn_str)
-        client.admin.command('ismaster')
-        
-        logger.info("MongoDB Atlas (sync) connection successful.")
-        db_client = client[DB_NAME]
-        return db_client
-        
-    except Exception as e:
-        logger.error(f"FATAL: Could not connect to MongoDB Atlas: {e}")
-        raise
-
 # --- Lambda Handler (The main function) ---
 def lambda_handler(event, context):
     """
@@ -68,45 +38,43 @@ def lambda_handler(event, context):
         # We'll query for tickets that haven't been *updated* in 1 hour
         sla_breach_time = datetime.utcnow() - timedelta(hours=SLA_HOURS)
         
-        # 2. Build the query
-        query = {
-            "status": "Open",  # Only find open tickets
-            "priority": {"$in": ["High", "Critical"]}, # That are high or critical
-            "updated_at": {"$lt": sla_breach_time} # And haven't been touched
-        }
-
-        # 3. Get DB connection and find tickets
-        db = get_db_connection()
-        collection = db[COLLECTION_NAME]
-        
-        # Use .find() to get a cursor, which is memory-efficient
-        breached_tickets = collection.find(query)
+        # 2. Find open high/critical tickets that haven't been touched,
+        # fetching only what the alert needs. The cursor is memory-efficient.
+        breached_tickets = find_breached(
+            sla_breach_time,
+            statuses=["Open"],
+            priorities=["High", "Critical"],
+            fields=["status", "priority", "title"]
+        )
         
         escalated_count = 0
         
-        # 4. Process each breached ticket
+        # 3. Process each breached ticket
         for ticket in breached_tickets:
             ticket_id = ticket["_id"]
             ticket_id_str = str(ticket_id)
             logger.warning(f"SLA BREACH detected for ticket: {ticket_id_str}")
             
             try:
-                # 4a. Update the ticket status in MongoDB
-                history_entry = {
-                    "agent": "EscalationAgent",
-                    "action": f"Breached {SLA_HOURS}-hour SLA. Status set to Escalated.",
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-                
-                collection.update_one(
-                    {"_id": ticket_id},
+                # 3a. Update the ticket status in MongoDB
+                escalated = apply_agent_update(
+                    ticket_id_str,
+                    {"status": "Escalated", "updated_at": datetime.utcnow()},
                     {
-                        "$set": {"status": "Escalated", "updated_at": datetime.utcnow()},
-                        "$push": {"agent_history": history_entry}
-                    }
+                        "agent": "EscalationAgent",
+                        "action": f"Breached {SLA_HOURS}-hour SLA. Status set to Escalated.",
+                        "field": "status",
+                        "old_value": ticket.get("status"),
+                        "new_value": "Escalated",
+                    },
+                    # Only while it is still open and untouched: it may have
+                    # been closed, reassigned or updated since the query
+                    expected={"status": "Open", "updated_at": {"$lt": sla_breach_time}}
                 )
+                if not escalated:
+                    continue # Changed since the query; nothing to alert on
                 
-                # 4b. Publish an alert to the SNS Topic
+                # 3b. Publish an alert to the SNS Topic
                 if not SNS_TOPIC_ARN:
                     logger.warning("SNS_TOPIC_ARN is not set. Cannot send alert.")
                     continue # Move to the next ticket
@@ -138,6 +106,7 @@ def lambda_handler(event, context):
                 pass
                 
         logger.info(f"Escalation run complete. Escalated {escalated_count} ticket(s).")
+        log_connection_stats()
         return {
             "status": "SUCCESS",
             "escalated_count": escalated_count
@@ -1,118 +1,199 @@
 # backend/agents/get_ticket_details.py
-import os
 import json
-import boto3
 import logging
-from pymongo import MongoClient
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
+from pymongo.errors import PyMongoError
 
-# --- Configuration ---
-# We'll set SECRET_ID as an environment variable in our Lambda
-SECRET_ID = os.environ.get("SECRET_ID", "priorityops/docdb")
-DB_NAME = "priorityopsdb"
-COLLECTION_NAME = "tickets"
+try:
+    from .agent_db import fetch_tickets, log_connection_stats
+    from .payload import TICKET_FIELDS, new_payload
+except ImportError:  # Lambda runs this module top-level
+    from agent_db import fetch_tickets, log_connection_stats
+    from payload import TICKET_FIELDS, new_payload
 
 # Setup logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# --- Database Connection (Singleton for Lambda) ---
-# This client can be reused across "warm" Lambda invocations
-db_client = None
+# --- BSON/JSON Conversion Helper ---
+def to_json_safe(value):
+    """
+    Converts BSON types (ObjectId, datetime) to JSON-safe values in one
+    pass over the document, without a dumps/loads round trip.
+    """
+    if isinstance(value, dict):
+        return {key: to_json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_json_safe(item) for item in value]
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
 
-def get_db_connection():
+def _event_detail(event):
+    """The payload of an EventBridge event, or the event itself."""
+    # The 'detail' from EventBridge might be a string,
+    # but in a Step Function, it's passed as the event itself.
+    detail = event.get('detail', event)
+    if isinstance(detail, str):
+        detail = json.loads(detail)
+    return detail
+
+
+def _requested_ids(event):
     """
-    Initializes and returns a synchronous pymongo client.
-    Fetches credentials from AWS Secrets Manager.
+    The ticket ids a batch event asks for, as (ticket_id, item_identifier)
+    pairs, or None for a single-ticket event. Accepts:
+
+    - an SQS batch: { "Records": [{ "messageId": ..., "body": "{...}" }] },
+      each body holding a ticket_id or an EventBridge event
+    - a Step Functions Map batch: { "Items": ["id", { "ticket_id": ... }] }
+    - a direct list: { "ticket_ids": [...] } (also inside 'detail')
     """
-    global db_client
-    if db_client:
-        logger.info("Reusing existing MongoDB connection.")
-        return db_client
+    if 'Records' in event:
+        requested = []
+        for record in event['Records']:
+            try:
+                ticket_id = _event_detail(json.loads(record['body'])).get('ticket_id')
+            except (ValueError, TypeError, AttributeError):
+                ticket_id = None
+            requested.append((ticket_id, record.get('messageId')))
+        return requested
+
+    if 'Items' in event:
+        return [
+            (item.get('ticket_id') if isinstance(item, dict) else item, None)
+            for item in event['Items']
+        ]
 
-    logger.info("Initializing new MongoDB Atlas connection...")
+    detail = _event_detail(event)
+    if 'ticket_ids' in detail:
+        return [(ticket_id, None) for ticket_id in detail['ticket_ids']]
+    return None
+
+
+def get_ticket_details(requested):
+    """
+    Fetches the requested tickets with one `$in` query.
+
+    Returns (payloads, failed): a workflow payload per ticket in request
+    order (see payload.py), and
+    a { ticket_id, error, item_identifier, transient } entry for every item
+    that could not be served. Only database errors are transient; an
+    invalid or unknown id fails the same way on every retry.
+    """
+    # By position: ids come from untrusted events and may be any JSON value
+    object_ids = []
+    for ticket_id, _ in requested:
+        try:
+            # ObjectId(None) would generate a fresh id rather than fail
+            object_ids.append(ObjectId(ticket_id) if isinstance(ticket_id, str) else None)
+        except InvalidId:
+            object_ids.append(None)
+
+    valid = {obj_id for obj_id in object_ids if obj_id is not None}
+    # Only the fields the workflow payload carries are read (see payload.py)
     try:
-        # Get credentials from Secrets Manager
-        sm_client = boto3.client("secretsmanager")
-        secret_val = sm_client.get_secret_value(SecretId=SECRET_ID)
-        secret = json.loads(secret_val["SecretString"])
-        
-        # Build connection string
-        conn_str = secret["connection_string"].replace("<password>", secret["password"])
-        
-        # Create the client
-        client = MongoClient(conn_str)
-        client.admin.command('ismaster') # Test connection
-        
-        logger.info("MongoDB Atlas (sync) connection successful.")
-        db_client = client[DB_NAME] # Get the database instance
-        return db_client
-        
-    except Exception as e:
-        logger.error(f"FATAL: Could not connect to MongoDB Atlas: {e}")
-        raise # Fail the Lambda if DB connection fails
+        docs = fetch_tickets(valid, TICKET_FIELDS) if valid else {}
+        db_error = None
+    except PyMongoError as e:
+        logger.error(f"Could not fetch tickets: {e}")
+        docs, db_error = {}, "Database unavailable"
+
+    payloads = []
+    failed = []
+    for (ticket_id, item_identifier), obj_id in zip(requested, object_ids):
+        if obj_id is None:
+            error = "Invalid ticket ID"
+        elif db_error:
+            failed.append({"ticket_id": ticket_id, "error": db_error,
+                           "item_identifier": item_identifier, "transient": True})
+            continue
+        else:
+            doc = docs.get(str(obj_id))
+            if doc is not None:
+                payloads.append(new_payload(ticket_id, to_json_safe(doc)))
+                continue
+            error = "Ticket not found"
+        failed.append({"ticket_id": ticket_id, "error": error,
+                       "item_identifier": item_identifier, "transient": False})
+    return payloads, failed
 
-# --- BSON/JSON Conversion Helper ---
-def mongo_converter(o):
-    """Converts non-serializable BSON types to strings for JSON."""
-    if isinstance(o, ObjectId):
-        return str(o)
-    if isinstance(o, datetime):
-        return o.isoformat()
-    logger.warning(f"Type {type(o)} not serializable")
-    raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
 
 # --- Lambda Handler (The main function) ---
 def lambda_handler(event, context):
     """
-    Lambda handler that fetches a full ticket document from MongoDB.
-    
-    This function is triggered by EventBridge.
-    The 'event' it receives is the { "detail": { "ticket_id": "..." } }
+    Lambda handler that fetches ticket documents from MongoDB.
+
+    Single ticket: triggered by EventBridge with { "detail": { "ticket_id": "..." } }
+    (or invoked by the Step Function with { "ticket_id": "..." }); returns
+    the ticket's workflow payload and fails the invocation if it cannot be
+    fetched.
+
+    Batch: see _requested_ids for the accepted shapes. Returns
+    { "payloads": [...], "failed": [...] } plus, for SQS, the
+    "batchItemFailures" partial batch response so only messages that failed
+    on a database error are retried; the rest are reported in "failed" and
+    deleted. Other batches fail the invocation on a database error so the
+    Step Function's retry covers them.
     """
     logger.info(f"Received event: {json.dumps(event)}")
-    
+
     try:
-        # 1. Get ticket_id from the event
-        # The 'detail' from EventBridge might be a string,
-        # but in a Step Function, it's passed as the event itself.
-        # We'll check for both.
-        
-        if 'detail' in event:
-            # Event came directly from EventBridge
-            event_detail = event['detail']
-            if isinstance(event_detail, str):
-                event_detail = json.loads(event_detail)
-        else:
-            # Event is from a Step Function test or direct invoke
-            event_detail = event 
-            
-        ticket_id = event_detail.get('ticket_id')
-        if not ticket_id:
-            raise ValueError("Missing 'ticket_id' in event payload")
-
-        logger.info(f"Processing ticket_id: {ticket_id}")
-
-        # 2. Get DB connection
-        db = get_db_connection()
-        collection = db[COLLECTION_NAME]
-        
-        # 3. Fetch the ticket
-        obj_id = ObjectId(ticket_id)
-        ticket_doc = collection.find_one({"_id": obj_id})
-        
-        if not ticket_doc:
-            raise Exception(f"No ticket found with ID: {ticket_id}")
-            
-        logger.info(f"Successfully fetched ticket: {ticket_id}")
-
-        # 4. Return the full document (made JSON serializable)
-        # What we RETURN here becomes the INPUT for the next agent
-        return json.loads(json.dumps(ticket_doc, default=mongo_converter))
-        
+        # 1. Get the ticket id(s) from the event
+        requested = _requested_ids(event)
+        if requested is None:
+            ticket_id = _event_detail(event).get('ticket_id')
+            if not ticket_id:
+                raise ValueError("Missing 'ticket_id' in event payload")
+
+            logger.info(f"Processing ticket_id: {ticket_id}")
+
+            # 2. Fetch the ticket
+            payloads, failed = get_ticket_details([(ticket_id, None)])
+            log_connection_stats()
+            if failed and failed[0]["transient"]:
+                raise Exception(f"Could not fetch ticket {ticket_id}: {failed[0]['error']}")
+            if failed:
+                raise Exception(f"No ticket found with ID: {ticket_id}")
+
+            logger.info(f"Successfully fetched ticket: {ticket_id}")
+
+            # 3. Return the compact payload
+            # What we RETURN here becomes the INPUT for the next agent
+            return payloads[0]
+
+        # 2. Fetch the whole batch in one query
+        logger.info(f"Processing a batch of {len(requested)} ticket(s)")
+        payloads, failed = get_ticket_details(requested)
+        log_connection_stats()
+
+        for failure in failed:
+            logger.warning(f"Could not fetch ticket {failure['ticket_id']}: {failure['error']}")
+        logger.info(f"Fetched {len(payloads)} ticket(s), {len(failed)} failed")
+        transient = [failure for failure in failed if failure["transient"]]
+        if transient and 'Records' not in event:
+            raise Exception(f"Could not fetch {len(transient)} ticket(s): {transient[0]['error']}")
+
+        # 3. Report partial failures per item
+        result = {
+            "payloads": payloads,
+            "failed": [
+                {"ticket_id": failure["ticket_id"], "error": failure["error"]} for failure in failed
+            ]
+        }
+        if 'Records' in event:
+            result["batchItemFailures"] = [
+                {"itemIdentifier": failure["item_identifier"]} for failure in transient
+            ]
+        return result
+
     except Exception as e:
         logger.error(f"ERROR: {e}")
         # Re-raise the exception to fail the Lambda
         # This will allow our Step Function to catch the error
-        raise Exception(str(e))
\ No newline at end of file
+        raise Exception(str(e))
@@ -0,0 +1,221 @@
+# backend/agents/lexical_prefilter.py
+"""
+MinHash/LSH lexical prefilter for duplicate detection.
+
+Alert storms and re-submitted forms produce near-verbatim copies, which do
+not need an embedding and a kNN query to be recognised. Each ticket's
+title and description are reduced to lowercased word 3-gram shingles
+and a MinHash signature of NUM_PERM values. Signatures are split into
+LSH_BANDS bands; tickets sharing any band are candidates, and a candidate
+whose estimated Jaccard similarity reaches LEXICAL_DUPLICATE_THRESHOLD
+resolves the ticket as a duplicate. Band keys include a digest of the
+ticket's numbers, so only tickets with the same error codes, hosts, order
+numbers and so on are ever candidates. Anything else, including texts too
+short for a confident estimate, falls through to the embedding stage.
+
+LEXICAL_INDEX_BACKEND selects where band keys live:
+
+- "mongo" (default): the `ticket_minhash` collection, shared by every
+  container, expiring after 30 days (see backend/utils/indexes.py).
+- "local": an in-process dict, for workers and tests.
+- "off": no prefilter.
+
+The permutations are seeded, so signatures stored by one container stay
+comparable with those computed by another.
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+import unicodedata
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+try:
+    from .agent_db import OptionalCollection
+except ImportError:  # Lambda runs this module top-level
+    from agent_db import OptionalCollection
+
+LEXICAL_INDEX_BACKEND = os.environ.get("LEXICAL_INDEX_BACKEND", "mongo")
+LEXICAL_DUPLICATE_THRESHOLD = float(os.environ.get("LEXICAL_DUPLICATE_THRESHOLD", "0.8"))
+LEXICAL_INDEX_COLLECTION = "ticket_minhash"
+
+SHINGLE_SIZE = 3
+# Fewer shingles than this is too little text to call a duplicate lexically
+MIN_SHINGLES = 8
+NUM_PERM = 128
+# 32 bands of 4 rows: pairs above ~0.45 Jaccard usually share a band
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERM // LSH_BANDS
+# Candidates compared per ticket, bounding the work in an alert storm
+CANDIDATE_LIMIT = 200
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: stored signatures must stay comparable across containers
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+logger = logging.getLogger()
+
+Match = Tuple[str, float]
+
+
+def shingles(text: str) -> Set[str]:
+    """
+    Word SHINGLE_SIZE-grams of `text`, lowercased. Numbers are kept: tickets
+    that differ only in an error code, host or order number are different
+    problems, and are left to the embedding stage.
+    """
+    words = re.findall(r"\w+", unicodedata.normalize("NFKC", text).lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def number_key(text: str) -> str:
+    """A digest of the distinct tokens in `text` that contain a digit."""
+    numbers = sorted({word for word in re.findall(r"\w+", unicodedata.normalize("NFKC", text).lower())
+                      if re.search(r"\d", word)})
+    return hashlib.blake2b("\0".join(numbers).encode(), digest_size=8).hexdigest()
+
+
+def minhash(shingle_set: Set[str]) -> np.ndarray:
+    """The NUM_PERM-value MinHash signature (uint32) of a non-empty shingle set."""
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little") for s in shingle_set],
+        dtype=np.uint64
+    )
+    permuted = (hashes[:, None] * _PERM_A + _PERM_B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray, numbers: str = "") -> List[str]:
+    """
+    One key per LSH band, scoped to the `numbers` key; tickets sharing a
+    key are candidates.
+    """
+    return [
+        f"{band}:{numbers}:{hashlib.blake2b(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(LSH_BANDS)
+    ]
+
+
+def estimate_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+class LexicalIndex(ABC):
+    """MinHash signatures by ticket id, looked up by LSH band key."""
+
+    @abstractmethod
+    def add(self, ticket_id: str, signature: np.ndarray, bands: List[str]) -> None:
+        pass
+
+    @abstractmethod
+    def candidates(self, bands: List[str]) -> List[Tuple[str, np.ndarray]]:
+        pass
+
+
+class LocalLexicalIndex(LexicalIndex):
+    """Band keys in process memory."""
+
+    def __init__(self):
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[str, Set[str]] = {}
+
+    def add(self, ticket_id, signature, bands):
+        self._signatures[ticket_id] = signature
+        for key in bands:
+            self._buckets.setdefault(key, set()).add(ticket_id)
+
+    def candidates(self, bands):
+        ids = set().union(*(self._buckets.get(key, set()) for key in bands))
+        return [(ticket_id, self._signatures[ticket_id]) for ticket_id in list(ids)[:CANDIDATE_LIMIT]]
+
+
+class MongoLexicalIndex(LexicalIndex):
+    """
+    Band keys in a Mongo collection (one document per ticket, with a
+    multikey index on `bands`). Never fails the caller: if Mongo is
+    unavailable the index is skipped for a while.
+    """
+
+    def __init__(self, collection: Callable[[], Any]):
+        self._db = OptionalCollection(collection, "Lexical index unavailable, skipping the prefilter")
+
+    def add(self, ticket_id, signature, bands):
+        collection = self._db.get()
+        if collection is None:
+            return
+        try:
+            collection.update_one(
+                {"_id": ticket_id},
+                {"$set": {"bands": bands, "signature": signature.tobytes(), "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            self._db.failed(e)
+
+    def candidates(self, bands):
+        collection = self._db.get()
+        if collection is None:
+            return []
+        try:
+            docs = collection.find({"bands": {"$in": bands}}, {"signature": 1}).limit(CANDIDATE_LIMIT)
+            return [(doc["_id"], np.frombuffer(doc["signature"], dtype=np.uint32)) for doc in docs]
+        except Exception as e:
+            self._db.failed(e)
+            return []
+
+
+class LexicalPrefilter:
+    """Resolves near-verbatim duplicates before they are embedded."""
+
+    def __init__(self, index: LexicalIndex, threshold: float = LEXICAL_DUPLICATE_THRESHOLD,
+                 min_shingles: int = MIN_SHINGLES):
+        self.index = index
+        self.threshold = threshold
+        self.min_shingles = min_shingles
+        self._stats = {"checked": 0, "resolved": 0, "too_short": 0}
+
+    def check(self, ticket_id: str, title: str, description: str) -> Optional[Match]:
+        """
+        The (ticket_id, estimated Jaccard) of the closest earlier ticket at
+        or above the threshold, or None when this stage is not confident.
+        The ticket is added to the index either way.
+        """
+        self._stats["checked"] += 1
+        text = f"{title}\n{description}"
+        shingle_set = shingles(text)
+        if len(shingle_set) < self.min_shingles:
+            self._stats["too_short"] += 1
+            return None
+
+        signature = minhash(shingle_set)
+        bands = band_keys(signature, number_key(text))
+        best = None
+        for other_id, other_signature in self.index.candidates(bands):
+            if other_id == ticket_id:
+                continue
+            score = estimate_jaccard(signature, other_signature)
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (other_id, score)
+        self.index.add(ticket_id, signature, bands)
+
+        if best is not None:
+            self._stats["resolved"] += 1
+        return best
+
+    def stats(self) -> Dict[str, Any]:
+        """Tickets checked and resolved since the container started."""
+        s = self._stats
+        return {**s, "resolved_fraction": round(s["resolved"] / s["checked"], 3) if s["checked"] else None}
+
+    def log_stats(self) -> None:
+        logger.info(f"Lexical prefilter stats: {json.dumps(self.stats())}")
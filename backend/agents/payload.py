@@ -0,0 +1,196 @@
+# backend/agents/payload.py
+"""
+The compact payload the cognitive workflow's agents pass to each other.
+
+Step Functions carries each agent's return value to the next state, and a
+state's payload is capped at 256 KB. Rather than forwarding the whole
+ticket document, the agents exchange a small versioned envelope holding
+the ticket id and only the sections later stages read:
+
+    {
+      "v": 1,
+      "ticket_id": "...",
+      "ticket": {"title": "...", "description": "..."},    # detection, triage
+      "duplicate": {"is_duplicate": ..., ...},            # triage, update
+      "triage": {"priority": ..., ...}                    # update
+    }
+
+A section no later stage reads is dropped (triage drops "ticket").
+Any section value whose JSON is larger than PAYLOAD_INLINE_LIMIT_BYTES is
+put in the payload store and replaced by {"$ref": "<key>"}; `read_section`
+resolves references transparently. The store is an S3 bucket
+(PAYLOAD_STORE_BUCKET); without one, values stay inline.
+"""
+import os
+import json
+import hashlib
+from typing import Any, Dict, Optional
+
+PAYLOAD_VERSION = 1
+
+# Step Functions' limit on a state's input/output
+MAX_STATE_BYTES = 256 * 1024
+
+# Section values larger than this go to the payload store
+PAYLOAD_INLINE_LIMIT_BYTES = int(os.environ.get("PAYLOAD_INLINE_LIMIT_BYTES", "4096"))
+
+PAYLOAD_STORE_BUCKET = os.environ.get("PAYLOAD_STORE_BUCKET", "")
+PAYLOAD_STORE_PREFIX = os.environ.get("PAYLOAD_STORE_PREFIX", "agent-payloads/")
+
+# The ticket fields carried in the "ticket" section
+TICKET_FIELDS = ("title", "description")
+
+SECTIONS = ("ticket", "duplicate", "triage")
+
+
+class PayloadError(ValueError):
+    """A payload that cannot be encoded or decoded."""
+
+
+class LocalPayloadStore:
+    """In-memory payload store, for tests and local runs."""
+
+    def __init__(self):
+        self.objects: Dict[str, bytes] = {}
+
+    def put(self, key: str, data: bytes) -> None:
+        self.objects[key] = data
+
+    def get(self, key: str) -> bytes:
+        try:
+            return self.objects[key]
+        except KeyError:
+            raise PayloadError(f"Unknown payload reference: {key}")
+
+
+class S3PayloadStore:
+    """Payload store backed by an S3 bucket; expiry is left to a lifecycle rule."""
+
+    def __init__(self, bucket: str, prefix: str = PAYLOAD_STORE_PREFIX):
+        import boto3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3")
+
+    def put(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def get(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"].read()
+
+
+_store = None
+
+
+def get_payload_store():
+    """The configured payload store, or None to keep every value inline."""
+    global _store
+    if _store is None and PAYLOAD_STORE_BUCKET:
+        _store = S3PayloadStore(PAYLOAD_STORE_BUCKET)
+    return _store
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), default=str).encode()
+
+
+def _encode_value(value: Any) -> Any:
+    """`value`, or a reference to it in the payload store if it is large."""
+    store = get_payload_store()
+    data = _dumps(value)
+    if store is None or len(data) <= PAYLOAD_INLINE_LIMIT_BYTES:
+        return value
+    # Content-addressed, so re-encoding the same value reuses the object
+    key = hashlib.sha256(data).hexdigest()
+    store.put(key, data)
+    return {"$ref": key}
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and set(value) == {"$ref"}:
+        store = get_payload_store()
+        if store is None:
+            raise PayloadError("Payload holds a reference but no payload store is configured")
+        return json.loads(store.get(value["$ref"]))
+    return value
+
+
+def _encode_section(section: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if section is None:
+        return None
+    return {key: _encode_value(value) for key, value in section.items()}
+
+
+def payload_size(payload: Dict[str, Any]) -> int:
+    """The size of `payload` as Step Functions will carry it, in bytes."""
+    return len(_dumps(payload))
+
+
+def _checked(payload: Dict[str, Any]) -> Dict[str, Any]:
+    size = payload_size(payload)
+    if size > MAX_STATE_BYTES:
+        raise PayloadError(f"Payload for ticket {payload['ticket_id']} is {size} bytes, over the {MAX_STATE_BYTES} byte limit")
+    return payload
+
+
+def new_payload(ticket_id: str, ticket: Dict[str, Any]) -> Dict[str, Any]:
+    """The payload that starts the workflow, from a ticket document."""
+    return _checked({
+        "v": PAYLOAD_VERSION,
+        "ticket_id": str(ticket_id),
+        "ticket": _encode_section({field: ticket.get(field) for field in TICKET_FIELDS}),
+    })
+
+
+def extend_payload(payload: Dict[str, Any], drop=(), **sections: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    A copy of `payload` with a stage's result `sections` added and the
+    sections in `drop` removed. Sections already in the payload are passed
+    on as they are, references included.
+    """
+    payload = upgrade_payload(payload)
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        raise PayloadError(f"Unknown payload section(s): {', '.join(sorted(unknown))}")
+
+    extended = {key: value for key, value in payload.items() if key not in drop}
+    for name, section in sections.items():
+        extended[name] = _encode_section(section)
+    return _checked(extended)
+
+
+def read_section(payload: Dict[str, Any], section: str) -> Optional[Dict[str, Any]]:
+    """A section of `payload` with its references resolved, or None."""
+    value = upgrade_payload(payload).get(section)
+    if value is None:
+        return None
+    return {key: _decode_value(item) for key, item in value.items()}
+
+
+def upgrade_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    `payload` in the current version. Executions started before the compact
+    payload pass either the ticket document itself or
+    { "ticket_data", "duplicate_check", "triage_results" }; those are
+    converted so a deployment does not fail in-flight executions.
+    """
+    version = payload.get("v")
+    if version == PAYLOAD_VERSION:
+        return payload
+    if version is not None:
+        raise PayloadError(f"Unsupported payload version: {version}")
+
+    ticket = payload.get("ticket_data", payload)
+    ticket_id = ticket.get("id") or ticket.get("_id")
+    if not ticket_id:
+        raise PayloadError("Payload is missing the ticket id")
+    upgraded = {
+        "v": PAYLOAD_VERSION,
+        "ticket_id": str(ticket_id),
+        "ticket": {field: ticket.get(field) for field in TICKET_FIELDS},
+    }
+    if payload.get("duplicate_check") is not None:
+        upgraded["duplicate"] = payload["duplicate_check"]
+    if payload.get("triage_results") is not None:
+        upgraded["triage"] = payload["triage_results"]
+    return upgraded
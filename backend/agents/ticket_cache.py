@@ -0,0 +1,44 @@
+# backend/agents/ticket_cache.py
+"""
+Invalidation of the API's shared ticket cache after agent writes.
+
+The API caches ticket details in Redis when TICKET_CACHE_REDIS_URL is set.
+Agents that modify tickets delete those entries so the API does not keep
+serving the pre-agent version until the entry expires. Without the
+variable this is a no-op; with it but without the redis package, a warning
+is logged once and invalidation is skipped.
+"""
+import os
+import logging
+
+TICKET_CACHE_REDIS_URL = os.environ.get("TICKET_CACHE_REDIS_URL", "")
+
+# Must match the cache name TicketService uses ("ticket")
+CACHE_KEY_PREFIX = "ticket:"
+
+logger = logging.getLogger()
+
+_redis_client = None
+_redis_missing = False
+
+
+def invalidate_tickets(*ticket_ids):
+    """Best-effort delete of the cached entries for the given ticket ids."""
+    global _redis_client, _redis_missing
+    if not TICKET_CACHE_REDIS_URL or not ticket_ids or _redis_missing:
+        return
+
+    try:
+        if _redis_client is None:
+            try:
+                import redis
+            except ImportError:
+                _redis_missing = True
+                logger.warning("TICKET_CACHE_REDIS_URL is set but the redis package is not installed; "
+                               "agent writes will not invalidate the API's ticket cache")
+                return
+            _redis_client = redis.Redis.from_url(TICKET_CACHE_REDIS_URL, socket_timeout=0.5)
+        _redis_client.delete(*[f"{CACHE_KEY_PREFIX}{ticket_id}" for ticket_id in ticket_ids])
+    except Exception as e:
+        # The API-side TTL still bounds staleness; never fail the agent over it
+        logger.warning(f"Could not invalidate cached tickets {ticket_ids}: {e}")
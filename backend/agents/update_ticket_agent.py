@@ -1,88 +1,41 @@
 # backend/agents/update_ticket_agent.py
-import os
 import json
-import boto3
 import logging
-from pymongo import MongoClient
-from bson import ObjectId
 from datetime import datetime
 
-# --- Configuration ---
-SECRET_ID = os.environ.get("SECRET_ID", "priorityops/docdb")
-DB_NAME = "priorityopsdb"
-COLLECTION_NAME = "tickets"
+try:
+    from .agent_db import apply_agent_update, log_connection_stats
+    from .payload import read_section, upgrade_payload
+except ImportError:  # Lambda runs this module top-level
+    from agent_db import apply_agent_update, log_connection_stats
+    from payload import read_section, upgrade_payload
 
 # Setup logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# --- Database Connection (Singleton for Lambda) ---
-db_client = None
-
-def get_db_connection():
-    """
-    Initializes and returns a synchronous pymongo client.
-    Fetches credentials from AWS Secrets Manager.
-    """
-    global db_client
-    if db_client:
-        logger.info("Reusing existing MongoDB connection.")
-        return db_client
-
-    logger.info("Initializing new MongoDB Atlas connection...")
-    try:
-        sm_client = boto3.client("secretsmanager")
-        secret_val = sm_client.get_secret_value(SecretId=SECRET_ID)
-        secret = json.loads(secret_val["SecretString"])
-        
-        conn_str = secret["connection_string"].replace("<password>", secret["password"])
-        
-        client = MongoClient(conn_str)
-        client.admin.command('ismaster') # Test connection
-        
-        logger.info("MongoDB Atlas (sync) connection successful.")
-        db_client = client[DB_NAME]
-        return db_client
-        
-    except Exception as e:
-        logger.error(f"FATAL: Could not connect to MongoDB Atlas: {e}")
-        raise
-
 # --- Lambda Handler (The main function) ---
 def lambda_handler(event, context):
     """
     Lambda handler that updates the ticket in MongoDB with AI results.
     
-    Input: The output from the 'ai_triage_agent'.
-           { "ticket_data": {...}, 
-             "duplicate_check": {...},
-             "triage_results": {...} }
+    Input: The workflow payload from the 'ai_triage_agent' (see payload.py),
+           with 'duplicate' and 'triage' sections.
     """
     logger.info(f"Received event: {json.dumps(event)}")
     
     try:
-        # 1. Parse all data from the event
-        ticket_data = event.get('ticket_data')
-        duplicate_check = event.get('duplicate_check')
-        triage_results = event.get('triage_results') # This might be None
-
-        ticket_id = ticket_data.get('id') or ticket_data.get('_id')
-        if not ticket_id:
-            raise ValueError("Event is missing 'ticket_data.id'")
+        # 1. Parse all data from the payload
+        ticket_id = upgrade_payload(event)['ticket_id']
+        duplicate_check = read_section(event, 'duplicate') or {}
+        triage_results = read_section(event, 'triage') # This might be None
 
         logger.info(f"Updating ticket: {ticket_id}")
 
-        # 2. Get DB connection
-        db = get_db_connection()
-        collection = db[COLLECTION_NAME]
-        obj_id = ObjectId(ticket_id)
-
         update_payload = {}
-        history_entry = {
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        history_entry = {}
 
-        # 3. Decide what to update (Duplicate vs. New Triage)
+        # 2. Decide what to update (Duplicate vs. New Triage)
         if duplicate_check.get('is_duplicate'):
             # --- IT'S A DUPLICATE ---
             logger.info("Ticket is a duplicate. Updating status to 'Closed'.")
@@ -122,21 +75,15 @@ def lambda_handler(event, context):
                 "message": "No action taken."
             }
 
-        # 4. Execute the update in MongoDB
-        result = collection.update_one(
-            {"_id": obj_id},
-            {
-                "$set": update_payload,
-                "$push": {"agent_history": history_entry}
-            }
-        )
-
-        if result.modified_count == 0:
+        # 3. Execute the update in MongoDB; history goes to the append-only
+        # audit collection rather than into the ticket document
+        if not apply_agent_update(ticket_id, update_payload, history_entry):
             logger.warning(f"Ticket {ticket_id} was not updated (maybe already updated or not found).")
+        log_connection_stats()
 
         logger.info(f"Successfully updated ticket: {ticket_id}")
         
-        # 5. Return success
+        # 4. Return success
         return {
             "status": "SUCCESS",
             "ticket_id": ticket_id
@@ -0,0 +1,361 @@
+# backend/agents/vector_index.py
+"""
+Vector index backends for duplicate detection.
+
+Both backends store one embedding per ticket id and return the nearest
+tickets as (ticket_id, score) pairs, best first:
+
+- OpenSearchVectorIndex: the OpenSearch Serverless kNN collection.
+- LocalVectorIndex: L2-normalized float32 embeddings in a contiguous,
+  memory-mapped matrix on disk. A top-k cosine query is one matrix-vector
+  product and an argpartition; no network hop or managed service. Suited
+  to small and medium deployments. The path can live on /tmp or an EFS
+  mount, and only one process may write to it at a time.
+
+VECTOR_INDEX_BACKEND selects the backend ("opensearch" or "local").
+Both return scores on the scale of OpenSearch's `cosinesimil` kNN score,
+1 / (2 - cosine), so one duplicate threshold holds for either backend.
+
+OpenSearch writes are not refreshed on every ticket: forcing a refresh
+writes a tiny segment per document and throttles indexing during bursts.
+A new document only becomes searchable at the collection's next refresh,
+so OpenSearchVectorIndex also keeps the last few minutes of vectors in a
+RecentVectorBuffer (the `recent_ticket_vectors` Mongo collection, shared
+by every container). Each search scores those vectors exactly and merges
+them with the kNN hits, so duplicates that arrive seconds apart are still
+found.
+"""
+import os
+import json
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .agent_db import OptionalCollection
+except ImportError:  # Lambda runs this module top-level
+    from agent_db import OptionalCollection
+
+VECTOR_INDEX_BACKEND = os.environ.get("VECTOR_INDEX_BACKEND", "opensearch")
+LOCAL_VECTOR_INDEX_PATH = os.environ.get("LOCAL_VECTOR_INDEX_PATH", "/tmp/priorityops-vectors/tickets")
+
+# Rows allocated when the local matrix first grows; doubled when full
+INITIAL_CAPACITY = 1024
+# Deleted rows are compacted away once they are this share of the matrix
+COMPACT_DELETED_RATIO = 0.25
+
+RECENT_VECTORS_COLLECTION = "recent_ticket_vectors"
+# How far back the recent buffer is searched; longer than the collection's
+# refresh interval. Must not exceed the TTL index in backend/utils/indexes.py
+RECENT_VECTOR_WINDOW_SECONDS = float(os.environ.get("RECENT_VECTOR_WINDOW_SECONDS", "120"))
+RECENT_VECTORS_TTL_SECONDS = 600
+# Most recent vectors scored per search, bounding the work in an alert storm
+RECENT_VECTOR_LIMIT = 2000
+
+logger = logging.getLogger()
+
+Hit = Tuple[str, float]
+
+
+class VectorIndex(ABC):
+    """One embedding per ticket id, searchable by similarity."""
+
+    @abstractmethod
+    def add(self, ticket_id: str, vector: List[float]) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, ticket_id: str) -> None:
+        pass
+
+    @abstractmethod
+    def search(self, vector: List[float], k: int) -> List[Hit]:
+        pass
+
+
+def score_from_cosine(cosine: float) -> float:
+    """The kNN score a `cosinesimil` index gives a hit with this cosine similarity."""
+    return 1 / (2 - cosine)
+
+
+def cosine_top_k(matrix: np.ndarray, vector, k: int) -> List[Tuple[int, float]]:
+    """(row, cosine similarity) of the `k` rows of `matrix` most similar to `vector`, best first."""
+    if len(matrix) == 0 or k <= 0:
+        return []
+    q = np.asarray(vector, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(q)
+    scores = (matrix @ q) / np.where(norms == 0, 1, norms)
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(int(row), float(scores[row])) for row in top]
+
+
+class RecentVectorBuffer:
+    """
+    Vectors added in the last `window_seconds`, stored as float32 bytes in
+    a TTL-expired Mongo collection and searched exactly. Never fails the
+    caller: if Mongo is unavailable the buffer is skipped for a while.
+    """
+
+    def __init__(self, collection: Callable[[], Any], window_seconds: float = RECENT_VECTOR_WINDOW_SECONDS):
+        self._db = OptionalCollection(collection, "Recent vector buffer unavailable, searching the index only")
+        self.window_seconds = window_seconds
+
+    def add(self, ticket_id: str, vector: List[float]) -> None:
+        collection = self._db.get()
+        if collection is None:
+            return
+        try:
+            collection.update_one(
+                {"_id": ticket_id},
+                {"$set": {"vector": np.asarray(vector, dtype=np.float32).tobytes(), "added_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            self._db.failed(e)
+
+    def delete(self, ticket_id: str) -> None:
+        collection = self._db.get()
+        if collection is None:
+            return
+        try:
+            collection.delete_one({"_id": ticket_id})
+        except Exception as e:
+            self._db.failed(e)
+
+    def search(self, vector: List[float], k: int) -> List[Hit]:
+        """The `k` most cosine-similar recent tickets, best first."""
+        collection = self._db.get()
+        if collection is None:
+            return []
+        cutoff = datetime.utcnow() - timedelta(seconds=self.window_seconds)
+        try:
+            docs = list(collection.find({"added_at": {"$gte": cutoff}}, {"vector": 1})
+                        .sort("added_at", -1).limit(RECENT_VECTOR_LIMIT))
+        except Exception as e:
+            self._db.failed(e)
+            return []
+
+        dim = len(vector)
+        docs = [doc for doc in docs if len(doc["vector"]) == dim * 4]  # Skip other models' vectors
+        if not docs:
+            return []
+        matrix = np.frombuffer(b"".join(doc["vector"] for doc in docs), dtype=np.float32).reshape(len(docs), dim)
+        return [(docs[row]["_id"], score) for row, score in cosine_top_k(matrix, vector, k)]
+
+
+class OpenSearchVectorIndex(VectorIndex):
+    """
+    Embeddings in an OpenSearch kNN index (the `ticket_vector` field),
+    written without a forced refresh. With a `recent` buffer, tickets
+    written since the last refresh are found too.
+    """
+
+    def __init__(self, client: Callable, index_name: str, recent: Optional[RecentVectorBuffer] = None):
+        self._client = client
+        self.index_name = index_name
+        self.recent = recent
+
+    def add(self, ticket_id, vector, **source):
+        if self.recent is not None:
+            self.recent.add(ticket_id, vector)
+        self._client().index(
+            index=self.index_name,
+            body={"ticket_id": ticket_id, **source, "ticket_vector": vector},
+            id=ticket_id
+        )
+
+    def delete(self, ticket_id):
+        if self.recent is not None:
+            self.recent.delete(ticket_id)
+        self._client().delete(index=self.index_name, id=ticket_id)
+
+    def search(self, vector, k):
+        knn_query = {
+            "size": k,
+            "query": {"knn": {"ticket_vector": {"vector": vector, "k": k}}}
+        }
+        response = self._client().search(index=self.index_name, body=knn_query)
+        hits = [(hit["_source"]["ticket_id"], hit["_score"]) for hit in response["hits"]["hits"]]
+        if self.recent is None:
+            return hits
+
+        # Merge in the exact scores of tickets the index may not show yet
+        scores = dict(hits)
+        for ticket_id, cosine in self.recent.search(vector, k):
+            scores[ticket_id] = max(scores.get(ticket_id, 0.0), score_from_cosine(cosine))
+        return sorted(scores.items(), key=lambda hit: hit[1], reverse=True)[:k]
+
+
+class LocalVectorIndex(VectorIndex):
+    """
+    Embeddings in a memory-mapped float32 matrix, `<path>.<gen>.f32`, with
+    the ticket id of each row appended to `<path>.<gen>.ids` and deleted
+    rows to `<path>.<gen>.deleted`. A row is written before its id, so a
+    crash between the two leaves the row unused rather than the files
+    inconsistent. Compaction writes the next generation's files and then
+    switches `<path>.meta.json` to it with an atomic rename.
+    """
+
+    def __init__(self, path: str = LOCAL_VECTOR_INDEX_PATH, dim: Optional[int] = None):
+        self.path = path
+        self.dim = dim
+        self._generation = 0
+        self._matrix: Optional[np.memmap] = None
+        self._ids: List[str] = []
+        self._rows = {}  # ticket id -> row of its live vector
+        self._live = np.zeros(0, dtype=bool)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._load()
+
+    # --- Storage ---
+
+    def _file(self, suffix: str, generation: Optional[int] = None) -> str:
+        generation = self._generation if generation is None else generation
+        return f"{self.path}.{generation}.{suffix}"
+
+    def _write_meta(self) -> None:
+        meta = f"{self.path}.meta.json"
+        with open(meta + ".tmp", "w") as f:
+            json.dump({"dim": self.dim, "generation": self._generation}, f)
+        os.replace(meta + ".tmp", meta)
+
+    def _load(self) -> None:
+        if os.path.exists(f"{self.path}.meta.json"):
+            with open(f"{self.path}.meta.json") as f:
+                meta = json.load(f)
+            if self.dim is not None and self.dim != meta["dim"]:
+                raise ValueError(f"Index at {self.path} holds {meta['dim']}-dimensional vectors, not {self.dim}")
+            self.dim = meta["dim"]
+            self._generation = meta["generation"]
+        else:
+            return  # Empty; the first add creates the files
+
+        if os.path.exists(self._file("ids")):
+            with open(self._file("ids")) as f:
+                self._ids = f.read().splitlines()
+        deleted = set()
+        if os.path.exists(self._file("deleted")):
+            with open(self._file("deleted")) as f:
+                deleted = {int(line) for line in f if line.strip()}
+
+        rows_on_disk = os.path.getsize(self._file("f32")) // (self.dim * 4) if os.path.exists(self._file("f32")) else 0
+        self._open(max(len(self._ids), rows_on_disk, INITIAL_CAPACITY))
+        self._live = np.zeros(self.capacity, dtype=bool)
+        for row, ticket_id in enumerate(self._ids):
+            if row not in deleted:
+                previous = self._rows.get(ticket_id)
+                if previous is not None:
+                    self._live[previous] = False
+                self._rows[ticket_id] = row
+                self._live[row] = True
+
+    def _open(self, capacity: int) -> None:
+        """Map the matrix file, growing it to `capacity` rows if needed."""
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        size = capacity * self.dim * 4
+        mode = "r+b" if os.path.exists(self._file("f32")) else "w+b"
+        with open(self._file("f32"), mode) as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < size:
+                f.truncate(size)
+        self._matrix = np.memmap(self._file("f32"), dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._matrix is None else self._matrix.shape[0]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # --- Updates ---
+
+    def _normalized(self, vector) -> np.ndarray:
+        v = np.asarray(vector, dtype=np.float32)
+        if v.shape != (self.dim,):
+            raise ValueError(f"Expected a {self.dim}-dimensional vector, got shape {v.shape}")
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def add(self, ticket_id, vector, **source):
+        """Append (or replace) the embedding for `ticket_id`."""
+        if self._matrix is None:
+            self.dim = self.dim or len(vector)
+            self._write_meta()
+            self._open(INITIAL_CAPACITY)
+            self._live = np.zeros(self.capacity, dtype=bool)
+
+        row = len(self._ids)
+        if row == self.capacity:
+            self._open(self.capacity * 2)
+            self._live = np.concatenate([self._live, np.zeros(self.capacity - len(self._live), dtype=bool)])
+
+        self._matrix[row] = self._normalized(vector)
+        self._matrix.flush()
+        with open(self._file("ids"), "a") as f:
+            f.write(ticket_id + "\n")
+        self._ids.append(ticket_id)
+
+        previous = self._rows.get(ticket_id)
+        if previous is not None:
+            self._mark_deleted(previous)
+        self._rows[ticket_id] = row
+        self._live[row] = True
+
+    def delete(self, ticket_id):
+        row = self._rows.pop(ticket_id, None)
+        if row is None:
+            return
+        self._mark_deleted(row)
+        if len(self._ids) - len(self._rows) > COMPACT_DELETED_RATIO * len(self._ids):
+            self.compact()
+
+    def _mark_deleted(self, row: int) -> None:
+        self._live[row] = False
+        with open(self._file("deleted"), "a") as f:
+            f.write(f"{row}\n")
+
+    def compact(self) -> None:
+        """Rewrite the files with only the live rows."""
+        rows = sorted(self._rows.values())
+        vectors = np.array(self._matrix[rows]) if rows else np.zeros((0, self.dim), dtype=np.float32)
+        ids = [self._ids[row] for row in rows]
+
+        previous = self._generation
+        self._matrix = None
+        self._generation += 1
+        self._open(max(len(ids), INITIAL_CAPACITY))
+        self._matrix[:len(ids)] = vectors
+        self._matrix.flush()
+        with open(self._file("ids"), "w") as f:
+            f.write("".join(f"{ticket_id}\n" for ticket_id in ids))
+        self._write_meta()
+        for suffix in ("f32", "ids", "deleted"):
+            if os.path.exists(self._file(suffix, previous)):
+                os.remove(self._file(suffix, previous))
+
+        self._ids = ids
+        self._rows = {ticket_id: row for row, ticket_id in enumerate(ids)}
+        self._live = np.zeros(self.capacity, dtype=bool)
+        self._live[:len(ids)] = True
+
+    # --- Queries ---
+
+    def search(self, vector, k):
+        """The `k` most cosine-similar live tickets, best first, on the kNN score scale."""
+        if not self._rows or k <= 0:
+            return []
+        n = len(self._ids)
+        scores = np.asarray(self._matrix[:n] @ self._normalized(vector))
+        scores[~self._live[:n]] = -np.inf
+
+        k = min(k, len(self._rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[row], score_from_cosine(float(scores[row]))) for row in top]
@@ -1,5 +1,11 @@
 """Configuration package for PriorityOps backend."""
 
-from .settings import settings, Settings
+from .settings import Settings, get_settings
 
-__all__ = ["settings", "Settings"]
\ No newline at end of file
+__all__ = ["settings", "Settings", "get_settings"]
+
+
+def __getattr__(name):
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
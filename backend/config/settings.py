@@ -4,9 +4,14 @@ Configuration module for PriorityOps backend.
 Centralizes all environment variable handling and configuration settings.
 """
 
-import os
+from functools import lru_cache
 from typing import List
-from pydantic import BaseSettings, Field
+from pydantic import Field
+
+try:
+    from pydantic_settings import BaseSettings
+except ImportError:  # pydantic v1
+    from pydantic import BaseSettings
 
 
 class Settings(BaseSettings):
@@ -36,6 +41,9 @@ class Settings(BaseSettings):
     escalation_time_threshold_minutes: int = Field(default=60, env="ESCALATION_TIME_THRESHOLD_MINUTES")
     escalation_check_interval_minutes: int = Field(default=15, env="ESCALATION_CHECK_INTERVAL_MINUTES")
     
+    # Ticket Counter Configuration
+    counter_reconcile_interval_minutes: int = Field(default=15, env="COUNTER_RECONCILE_INTERVAL_MINUTES")
+    
     # Security Configuration
     secret_key: str = Field(default="dev-secret-key", env="SECRET_KEY")
     cors_origins: str = Field(default="http://localhost:3000,http://localhost:5173", env="CORS_ORIGINS")
@@ -60,5 +68,14 @@ class Settings(BaseSettings):
         return self.environment.lower() == "development"
 
 
-# Global settings instance
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """The application settings, read from the environment on first use."""
+    return Settings()
+
+
+def __getattr__(name):
+    # `settings` is built on first access rather than at import
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
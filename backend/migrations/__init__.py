@@ -0,0 +1 @@
+"""One-off data migrations, each runnable with `python -m backend.migrations.<name>`."""
@@ -0,0 +1,78 @@
+# backend/migrations/create_indexes.py
+"""
+Creates the indexes declared in the index registry (utils/indexes.py).
+
+    python -m backend.migrations.create_indexes [--force]
+
+Run once per deployment rather than on every start-up. The registry is
+hashed into a version that is stored in a marker document in the
+`migrations` collection after every index has been built; when the marker
+already holds the current version there is nothing to do, so running it
+again costs a single read. `--force` rebuilds regardless of the marker.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from backend.utils.database import connect_to_mongo, get_database, close_mongo_connection
+from backend.utils.indexes import INDEXES
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_COLLECTION = "migrations"
+MARKER_ID = "indexes"
+
+
+def index_version() -> str:
+    """A hash of every registered index, changing whenever one does."""
+    spec = repr([(s.collection, s.keys, sorted(s.options.items())) for s in INDEXES])
+    return hashlib.sha1(spec.encode()).hexdigest()[:16]
+
+
+async def ensure_indexes(force: bool = False) -> bool:
+    """Create the registered indexes unless the marker is current; returns whether it did."""
+    db = await get_database()
+    markers = db[MIGRATIONS_COLLECTION]
+    version = index_version()
+
+    if not force:
+        marker = await markers.find_one({"_id": MARKER_ID})
+        if marker and marker.get("version") == version:
+            logger.info(f"Indexes are current (version {version})")
+            return False
+
+    for spec in INDEXES:
+        await db[spec.collection].create_index(spec.keys, **spec.options)
+
+    await markers.update_one(
+        {"_id": MARKER_ID},
+        {"$set": {"version": version, "count": len(INDEXES), "applied_at": datetime.utcnow()}},
+        upsert=True
+    )
+    logger.info(f"Database indexes created/verified successfully ({len(INDEXES)} indexes, version {version})")
+    return True
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="Create the indexes even if the marker is current")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=os.environ.get("LOG_LEVEL", "INFO"),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    await connect_to_mongo()
+    try:
+        await ensure_indexes(force=args.force)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
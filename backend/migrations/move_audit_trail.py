@@ -0,0 +1,135 @@
+# backend/migrations/move_audit_trail.py
+"""
+Moves embedded ticket history into the `ticket_audit` collection.
+
+    python -m backend.migrations.move_audit_trail [--batch-size N]
+
+Tickets used to carry their history inline: an `audit_trail` list and the
+`agent_history` array the Lambda agents pushed to. This copies both into
+one audit document per entry and then unsets the arrays, `--batch-size`
+tickets at a time in `_id` order.
+
+Safe to re-run or resume after an interruption: every entry's `_id` is
+derived from its ticket, array and position, so entries copied by an
+earlier run are skipped as duplicates, and a ticket's arrays are only
+unset after its entries are stored.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from backend.utils.database import connect_to_mongo, get_database, close_mongo_connection
+
+logger = logging.getLogger(__name__)
+
+AUDIT_COLLECTION = "ticket_audit"
+EMBEDDED_FIELDS = ("audit_trail", "agent_history")
+DEFAULT_BATCH_SIZE = 500
+
+DUPLICATE_KEY = 11000
+
+
+def _entry_id(ticket_id: ObjectId, field: str, index: int) -> ObjectId:
+    """A stable _id for the `index`th element of a ticket's embedded array."""
+    digest = hashlib.sha1(f"{ticket_id}:{field}:{index}".encode()).hexdigest()
+    return ObjectId(digest[:24])
+
+
+def _timestamp(value: Any, fallback: datetime) -> datetime:
+    """Embedded timestamps are datetimes or, from the agents, ISO strings."""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return fallback
+
+
+def to_audit_entries(ticket: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Audit documents for every entry embedded in a ticket document."""
+    fallback = ticket.get("updated_at") or ticket["_id"].generation_time.replace(tzinfo=None)
+    entries = []
+    for field in EMBEDDED_FIELDS:
+        for index, item in enumerate(ticket.get(field) or []):
+            entries.append({
+                **{key: value for key, value in item.items() if key != "_id"},
+                "_id": _entry_id(ticket["_id"], field, index),
+                "ticket_id": ticket["_id"],
+                "timestamp": _timestamp(item.get("timestamp"), fallback),
+                "action": item.get("action") or "updated",
+            })
+    return entries
+
+
+async def migrate(batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+    """Run the migration; returns the number of tickets and entries moved."""
+    db = await get_database()
+    tickets = db.tickets
+    audit = db[AUDIT_COLLECTION]
+
+    has_history = {"$or": [{f"{field}.0": {"$exists": True}} for field in EMBEDDED_FIELDS]}
+    projection = {field: 1 for field in (*EMBEDDED_FIELDS, "updated_at")}
+    moved = {"tickets": 0, "entries": 0}
+    last_id: Optional[ObjectId] = None
+
+    while True:
+        query = dict(has_history)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await tickets.find(query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+
+        entries = [entry for ticket in batch for entry in to_audit_entries(ticket)]
+        if entries:
+            try:
+                await audit.insert_many(entries, ordered=False)
+            except BulkWriteError as e:
+                # Copied by an earlier, interrupted run
+                errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY]
+                if errors:
+                    raise
+
+        ids = [ticket["_id"] for ticket in batch]
+        await tickets.update_many(
+            {"_id": {"$in": ids}},
+            {"$unset": {field: "" for field in EMBEDDED_FIELDS}}
+        )
+
+        moved["tickets"] += len(batch)
+        moved["entries"] += len(entries)
+        last_id = ids[-1]
+        logger.info(f"Moved history of {moved['tickets']} ticket(s), {moved['entries']} entr(ies)")
+
+    return moved
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Tickets per batch")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=os.environ.get("LOG_LEVEL", "INFO"),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    await connect_to_mongo()
+    try:
+        moved = await migrate(args.batch_size)
+        logger.info(f"Done: {moved['tickets']} ticket(s), {moved['entries']} audit entries")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
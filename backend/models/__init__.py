@@ -7,6 +7,6 @@ This package contains Pydantic models for:
 - Agent configurations
 """
 
-from .ticket import Ticket, Priority, Status, TicketCreate, TicketUpdate
+from .ticket import Ticket, TicketSummary, TicketSearchResult, Priority, Status, TicketCreate, TicketUpdate, BulkTicketUpdate
 
-__all__ = ["Ticket", "Priority", "Status", "TicketCreate", "TicketUpdate"]
\ No newline at end of file
+__all__ = ["Ticket", "TicketSummary", "TicketSearchResult", "Priority", "Status", "TicketCreate", "TicketUpdate", "BulkTicketUpdate"]
\ No newline at end of file
@@ -1,6 +1,6 @@
 # backend/models/ticket.py
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Optional, List, Dict
 from enum import Enum
 from datetime import datetime
 import uuid
@@ -12,19 +12,30 @@ class Priority(str, Enum):
     CRITICAL = "critical"
 
 class Status(str, Enum):
+    PENDING = "pending"
     OPEN = "open"
     IN_PROGRESS = "in_progress"
     RESOLVED = "resolved"
     CLOSED = "closed"
     ESCALATED = "escalated"
 
+class EventTypes:
+    """Detail types published to the EventBridge bus."""
+    TICKET_CREATED = "ticket.created"
+    TICKET_UPDATED = "ticket.updated"
+    TICKET_DELETED = "ticket.deleted"
+
 class AuditEntry(BaseModel):
+    """One entry of a ticket's history, stored in the `ticket_audit` collection."""
+    id: Optional[str] = None
+    ticket_id: Optional[str] = None
     timestamp: datetime
     action: str
     field: Optional[str] = None
-    old_value: Optional[str] = None
-    new_value: Optional[str] = None
+    old_value: Optional[Any] = None
+    new_value: Optional[Any] = None
     user: Optional[str] = None
+    agent: Optional[str] = None
 
 class Ticket(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -38,9 +49,32 @@ class Ticket(BaseModel):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     resolved_at: Optional[datetime] = None
     escalated_at: Optional[datetime] = None
-    audit_trail: List[AuditEntry] = Field(default_factory=list)
     tags: List[str] = Field(default_factory=list)
 
+# Columns shown in ticket tables; the default projection for list endpoints
+SUMMARY_FIELDS = ["title", "priority", "status", "department", "assignee", "created_at", "updated_at"]
+
+class TicketSummary(BaseModel):
+    """Partial ticket returned by list endpoints; only projected fields are set."""
+    id: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    priority: Optional[Priority] = None
+    status: Optional[Status] = None
+    department: Optional[str] = None
+    assignee: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    resolved_at: Optional[datetime] = None
+    escalated_at: Optional[datetime] = None
+    tags: Optional[List[str]] = None
+
+class TicketSearchResult(BaseModel):
+    """A full-text search hit: summary columns, relevance and highlighted snippets."""
+    ticket: TicketSummary
+    score: float
+    highlights: Dict[str, str] = {}
+
 class TicketCreate(BaseModel):
     title: str = Field(..., min_length=1, max_length=200)
     description: Optional[str] = Field(None, max_length=2000)
@@ -58,6 +92,36 @@ class TicketUpdate(BaseModel):
     assignee: Optional[str] = Field(None, max_length=100)
     tags: Optional[List[str]] = None
 
+class TicketIdUpdate(TicketUpdate):
+    id: str
+
+class BulkTicketUpdate(BaseModel):
+    """
+    Either one `update` applied to every ticket in `ids`, or per-ticket
+    `updates` that each carry their own `id`.
+    """
+    ids: Optional[List[str]] = None
+    update: Optional[TicketUpdate] = None
+    updates: Optional[List[TicketIdUpdate]] = None
+
+    @model_validator(mode="after")
+    def check_shape(self):
+        if self.updates is not None:
+            if self.ids is not None or self.update is not None:
+                raise ValueError("Send either ids with update, or updates, not both")
+        elif self.ids is None or self.update is None:
+            raise ValueError("Send either ids with update, or updates")
+        return self
+
+    def pairs(self) -> List[tuple]:
+        """The (ticket_id, TicketUpdate) pairs to apply, in request order."""
+        if self.updates is not None:
+            return [
+                (item.id, TicketUpdate(**item.model_dump(include=item.model_fields_set - {"id"})))
+                for item in self.updates
+            ]
+        return [(ticket_id, self.update) for ticket_id in self.ids]
+
 class TicketFilter(BaseModel):
     status: Optional[Status] = None
     priority: Optional[Priority] = None
@@ -1,27 +1,50 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import Optional
+from datetime import datetime
 import logging
 
 from backend.services.analytics_service import analytics_service
+from backend.services.ticket_service import ticket_service
 from backend.models.analytics import TicketStats, TrendData, PriorityDistribution, PerformanceMetrics
+from backend.utils.etag import make_etag, query_key, check_etag
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
+async def _check_etag(request: Request, response: Response) -> Optional[Response]:
+    """
+    Conditional GET for analytics: the ETag changes with the tickets
+    collection's generation, the query, and the UTC date (the time windows
+    are relative to today). Returns a 304 response if the client is current.
+    """
+    etag = make_etag(
+        request.url.path,
+        query_key(request),
+        datetime.utcnow().date(),
+        await ticket_service.get_generation()
+    )
+    return check_etag(request, response, etag)
+
 @router.get("/summary", response_model=TicketStats)
-async def get_analytics_summary():
+async def get_analytics_summary(request: Request, response: Response):
     """Get overall ticket statistics summary."""
     try:
+        not_modified = await _check_etag(request, response)
+        if not_modified:
+            return not_modified
         return await analytics_service.get_ticket_summary()
     except Exception as e:
         logger.error(f"Error getting analytics summary: {e}")
         raise HTTPException(status_code=500, detail="Failed to get analytics summary")
 
 @router.get("/priority", response_model=list[PriorityDistribution])
-async def get_priority_distribution():
+async def get_priority_distribution(request: Request, response: Response):
     """Get distribution of tickets by priority level."""
     try:
+        not_modified = await _check_etag(request, response)
+        if not_modified:
+            return not_modified
         return await analytics_service.get_priority_distribution()
     except Exception as e:
         logger.error(f"Error getting priority distribution: {e}")
@@ -29,19 +52,27 @@ async def get_priority_distribution():
 
 @router.get("/trends", response_model=list[TrendData])
 async def get_trend_data(
+    request: Request,
+    response: Response,
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze")
 ):
     """Get trend data for ticket creation and resolution over time."""
     try:
+        not_modified = await _check_etag(request, response)
+        if not_modified:
+            return not_modified
         return await analytics_service.get_trend_data(days=days)
     except Exception as e:
         logger.error(f"Error getting trend data: {e}")
         raise HTTPException(status_code=500, detail="Failed to get trend data")
 
 @router.get("/performance", response_model=PerformanceMetrics)
-async def get_performance_metrics():
+async def get_performance_metrics(request: Request, response: Response):
     """Get performance metrics for ticket resolution."""
     try:
+        not_modified = await _check_etag(request, response)
+        if not_modified:
+            return not_modified
         return await analytics_service.get_performance_metrics()
     except Exception as e:
         logger.error(f"Error getting performance metrics: {e}")
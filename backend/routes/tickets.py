@@ -1,14 +1,20 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Any, AsyncIterator, List, Optional
 from datetime import datetime
 import logging
 
 from backend.models.ticket import (
-    Ticket, TicketCreate, TicketUpdate, TicketFilter, 
-    Priority, Status, AuditEntry
+    Ticket, TicketCreate, TicketUpdate, BulkTicketUpdate, TicketFilter, TicketSummary, TicketSearchResult,
+    Priority, Status, AuditEntry, SUMMARY_FIELDS
 )
-from backend.services.ticket_service import ticket_service
+from backend.services.ticket_service import ticket_service, BULK_INSERT_CHUNK_SIZE
+from backend.services.audit_service import audit_service
+from backend.utils.etag import make_etag, query_key, check_etag
+from backend.utils.export import ndjson_lines, csv_lines
+from backend.utils.pagination import InvalidCursorError
+from backend.utils.serialization import FastJSONResponse
 
 logger = logging.getLogger(__name__)
 
@@ -19,17 +25,72 @@ router = APIRouter(
 
 # Response models
 class TicketListResponse(BaseModel):
-    tickets: List[Ticket]
+    tickets: List[TicketSummary]
     total: int
     page: int
     per_page: int
     total_pages: int
+    next_cursor: Optional[str] = None
+
+class TicketSearchResponse(BaseModel):
+    results: List[TicketSearchResult]
+    next_cursor: Optional[str] = None
+
+class AuditTrailResponse(BaseModel):
+    entries: List[AuditEntry]
+    next_cursor: Optional[str] = None
 
 class TicketResponse(BaseModel):
     success: bool
     message: str
     ticket: Optional[Ticket] = None
 
+class BulkItemResult(BaseModel):
+    index: int
+    success: bool
+    ticket_id: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkCreateResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
+
+class BulkUpdateResponse(BaseModel):
+    updated: int
+    failed: int
+    results: List[BulkItemResult]
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+EXPORT_FIELDS = [field for field in Ticket.model_fields if field != "id"]
+
+async def _iter_bulk_items(request: Request) -> AsyncIterator[Any]:
+    """Yield raw items from a JSON array body or a streamed NDJSON body."""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    
+    if content_type not in NDJSON_MEDIA_TYPES:
+        try:
+            items = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        for item in items:
+            yield item
+        return
+    
+    # NDJSON: parse line by line as the body streams in
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
 # ➕ Create a ticket
 @router.post("/", response_model=Ticket)
 async def create_ticket(ticket_data: TicketCreate):
@@ -43,59 +104,254 @@ async def create_ticket(ticket_data: TicketCreate):
         logger.error(f"Error creating ticket: {e}")
         raise HTTPException(status_code=500, detail="Failed to create ticket")
 
+# 📦 Create tickets in bulk
+@router.post("/bulk", response_model=BulkCreateResponse)
+async def create_tickets_bulk(request: Request):
+    """
+    Create many tickets from a JSON array or a streamed NDJSON body
+    (`Content-Type: application/x-ndjson`).
+    
+    Items are validated individually and written in unordered batches, so
+    invalid or failed items are reported without rejecting the rest.
+    """
+    results: List[BulkItemResult] = []
+    pending: List[tuple] = []
+    
+    async def flush():
+        outcomes = await ticket_service.create_tickets([ticket for _, ticket in pending])
+        for (index, _), (ticket_id, error) in zip(pending, outcomes):
+            results.append(BulkItemResult(index=index, success=error is None, ticket_id=ticket_id, error=error))
+        pending.clear()
+    
+    try:
+        index = 0
+        async for item in _iter_bulk_items(request):
+            try:
+                if isinstance(item, bytes):
+                    pending.append((index, TicketCreate.model_validate_json(item)))
+                else:
+                    pending.append((index, TicketCreate.model_validate(item)))
+            except ValidationError as e:
+                results.append(BulkItemResult(index=index, success=False, error=str(e)))
+            index += 1
+            
+            if len(pending) >= BULK_INSERT_CHUNK_SIZE:
+                await flush()
+        
+        if pending:
+            await flush()
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during bulk ticket creation: {e}")
+        raise HTTPException(status_code=500, detail="Failed to create tickets")
+    
+    results.sort(key=lambda r: r.index)
+    created = sum(1 for r in results if r.success)
+    logger.info(f"Bulk created {created} ticket(s), {len(results) - created} failed")
+    return BulkCreateResponse(created=created, failed=len(results) - created, results=results)
+
+# 📦 Update tickets in bulk
+@router.patch("/bulk", response_model=BulkUpdateResponse)
+async def update_tickets_bulk(bulk_update: BulkTicketUpdate):
+    """
+    Update many tickets at once: either `ids` plus one `update` applied to
+    all of them, or `updates`, a list of per-ticket updates with an `id`.
+    
+    Updates are written with unordered bulk writes and their events sent
+    in batches; each ticket's outcome is reported by its position in the
+    request without failing the rest.
+    """
+    pairs = bulk_update.pairs()
+    try:
+        outcomes = await ticket_service.update_tickets(pairs)
+    except Exception as e:
+        logger.error(f"Error during bulk ticket update: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update tickets")
+    
+    results = [
+        BulkItemResult(index=index, success=error is None, ticket_id=ticket_id, error=error)
+        for index, ((ticket_id, _), (_, error)) in enumerate(zip(pairs, outcomes))
+    ]
+    updated = sum(1 for r in results if r.success)
+    logger.info(f"Bulk updated {updated} ticket(s), {len(results) - updated} failed")
+    return BulkUpdateResponse(updated=updated, failed=len(results) - updated, results=results)
+
 # 📄 Get tickets with filtering and pagination
-@router.get("/", response_model=TicketListResponse)
+@router.get("/", response_model=TicketListResponse, response_model_exclude_unset=True)
 async def get_tickets(
+    request: Request,
+    response: Response,
+    
     # Pagination
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (ignored when a cursor is given)"),
     per_page: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor"),
     
     # Filtering
     status: Optional[Status] = Query(None, description="Filter by status"),
     priority: Optional[Priority] = Query(None, description="Filter by priority"),
     assignee: Optional[str] = Query(None, description="Filter by assignee"),
+    exact: bool = Query(False, description="Count matching tickets directly instead of using the maintained counters"),
+    
+    # Sparse fieldsets
+    fields: Optional[str] = Query(None, description="Comma-separated ticket fields to return (default: summary columns)"),
 ):
-    """Get tickets with filtering, pagination, and sorting"""
+    """
+    Get tickets with filtering, pagination, and sorting.
+    
+    Page mode (`page`) skips over earlier results and gets slower with depth.
+    Cursor mode (`cursor`) resumes from `next_cursor` with a bounded index
+    range scan, so every page costs the same. Both modes return `next_cursor`,
+    so a client can switch to cursor mode after the first page.
+    
+    `total` comes from incrementally maintained counters that are reconciled
+    periodically; pass `exact=true` for a direct count.
+    
+    Tickets only carry the summary columns unless `fields` asks for others,
+    e.g. `fields=title,description,tags`. `id` is always included.
+    
+    Responses carry an ETag derived from the collection's change generation
+    and the query; `If-None-Match` with a current ETag returns 304.
+    
+    Tickets are mapped straight from the documents and encoded with orjson;
+    `TicketListResponse` documents the shape but is not validated against.
+    """
+    selected = _parse_fields(fields)
     try:
-        # Calculate pagination
-        skip = (page - 1) * per_page
+        etag = make_etag("tickets", await ticket_service.get_generation(), query_key(request))
+        not_modified = check_etag(request, response, etag)
+        if not_modified:
+            return not_modified
         
-        # Get tickets and total count
-        tickets = await ticket_service.get_tickets(
-            skip=skip,
+        tickets, next_cursor = await ticket_service.get_tickets_page(
+            cursor=cursor,
+            skip=(page - 1) * per_page,
             limit=per_page,
             status=status,
             priority=priority,
-            assignee=assignee
+            assignee=assignee,
+            fields=selected,
+            raw=True
         )
         
         total = await ticket_service.get_ticket_count(
             status=status,
             priority=priority,
-            assignee=assignee
+            assignee=assignee,
+            exact=exact
         )
         total_pages = (total + per_page - 1) // per_page
         
-        return TicketListResponse(
-            tickets=tickets,
-            total=total,
-            page=page,
-            per_page=per_page,
-            total_pages=total_pages
-        )
+        content = {
+            "tickets": tickets,
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "total_pages": total_pages,
+            "next_cursor": next_cursor,
+        }
+        return FastJSONResponse(content, headers=dict(response.headers))
         
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching tickets: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch tickets")
 
+def _parse_fields(fields: Optional[str], default: List[str] = SUMMARY_FIELDS) -> List[str]:
+    """Validate a comma-separated `fields` parameter against the Ticket model."""
+    if not fields:
+        return default
+    selected = [f.strip() for f in fields.split(",") if f.strip() and f.strip() != "id"]
+    unknown = [f for f in selected if f not in Ticket.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(selected))
+
+# 🔍 Search tickets
+@router.get("/search", response_model=TicketSearchResponse, response_model_exclude_unset=True)
+async def search_tickets(
+    q: str = Query(..., min_length=1, max_length=200, description="Search terms; supports \"phrases\" and -exclusions"),
+    per_page: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous response's next_cursor"),
+    status: Optional[Status] = Query(None, description="Filter by status"),
+    priority: Optional[Priority] = Query(None, description="Filter by priority"),
+    assignee: Optional[str] = Query(None, description="Filter by assignee"),
+):
+    """
+    Full-text search over ticket titles and descriptions.
+    
+    Results are ranked by relevance and carry the summary columns plus
+    `highlights`: the title and a description snippet with matches wrapped
+    in `<mark>` (HTML-escaped). Page with `next_cursor`.
+    """
+    try:
+        results, next_cursor = await ticket_service.search_tickets(
+            q,
+            cursor=cursor,
+            limit=per_page,
+            status=status,
+            priority=priority,
+            assignee=assignee
+        )
+        return TicketSearchResponse(results=results, next_cursor=next_cursor)
+    
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching tickets for {q!r}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to search tickets")
+
+# 📤 Export tickets
+@router.get("/export")
+async def export_tickets(
+    filters: TicketFilter = Depends(),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Export format: ndjson or csv"),
+    fields: Optional[str] = Query(None, description="Comma-separated ticket fields to export (default: all)"),
+):
+    """
+    Stream every ticket matching the filters as NDJSON or CSV.
+    
+    Rows are encoded straight from the database cursor as they arrive, so
+    memory use does not depend on how many tickets match.
+    """
+    selected = _parse_fields(fields, default=EXPORT_FIELDS)
+    docs = ticket_service.iter_tickets(filters, fields=selected)
+    
+    if format == "csv":
+        body = csv_lines(docs, ["id", *selected])
+        media_type = "text/csv"
+    else:
+        body = ndjson_lines(docs)
+        media_type = "application/x-ndjson"
+    
+    filename = f"tickets-{datetime.utcnow():%Y%m%dT%H%M%SZ}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # 🆔 Get one ticket
 @router.get("/{ticket_id}", response_model=Ticket)
-async def get_ticket(ticket_id: str):
-    """Get a specific ticket by ID"""
+async def get_ticket(ticket_id: str, request: Request, response: Response):
+    """
+    Get a specific ticket by ID.
+    
+    The ETag is derived from the ticket's id and `updated_at`;
+    `If-None-Match` with a current ETag returns 304.
+    """
     ticket = await ticket_service.get_ticket(ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    return ticket
+    
+    not_modified = check_etag(request, response, make_etag("ticket", ticket.id, ticket.updated_at.isoformat()))
+    if not_modified:
+        return not_modified
+    # The cached ticket was validated when it was loaded; serialize it as is
+    return FastJSONResponse(ticket, headers=dict(response.headers))
 
 # ✍️ Update a ticket with audit trail
 @router.put("/{ticket_id}", response_model=Ticket)
@@ -136,10 +392,28 @@ async def delete_ticket(ticket_id: str):
         raise HTTPException(status_code=500, detail="Failed to delete ticket")
 
 # 📊 Get ticket audit trail
-@router.get("/{ticket_id}/audit")
-async def get_ticket_audit_trail(ticket_id: str):
-    """Get the audit trail for a specific ticket"""
+@router.get("/{ticket_id}/audit", response_model=AuditTrailResponse)
+async def get_ticket_audit_trail(
+    ticket_id: str,
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of entries to return"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor")
+):
+    """
+    Get the audit trail for a specific ticket, newest entry first.
+    
+    Pages through the ticket's entries in the audit collection; pass
+    `next_cursor` back as `cursor` to fetch the next page.
+    """
     ticket = await ticket_service.get_ticket(ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    return {"audit_trail": "Feature not implemented yet"}
+    
+    try:
+        entries, next_cursor = await audit_service.get_entries(ticket.id, cursor=cursor, limit=limit)
+        return AuditTrailResponse(entries=entries, next_cursor=next_cursor)
+    
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error fetching audit trail for ticket {ticket_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch audit trail")
@@ -1,13 +1,25 @@
 # server.py
+# Imported first so the cold-start report covers the other imports
+from backend.utils.coldstart import cold_start, PROCESS_START
+
+import asyncio
+import os
+import time
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 from backend.config.settings import settings
 from backend.routes import tickets, analytics
-from backend.utils.database import connect_to_mongo, close_mongo_connection
+from backend.utils.database import (
+    DB_BOOTSTRAP, connect_to_mongo, start_mongo_connection, close_mongo_connection
+)
+from backend.migrations.create_indexes import ensure_indexes
+from backend.utils.events import event_publisher
+from backend.services.counter_service import counter_service
+from backend.services.ticket_service import ticket_service
 from mangum import Mangum
 
 # Load environment variables
@@ -21,20 +33,67 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+async def _ensure_indexes_logged():
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        logger.error(f"Failed to create indexes: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager for startup and shutdown events."""
     # Startup
-    logger.info("Starting PriorityOps Backend...")
-    await connect_to_mongo()
-    logger.info("Database connection established")
+    index_task = None
+    with cold_start.phase("startup"):
+        logger.info("Starting PriorityOps Backend...")
+        if DB_BOOTSTRAP == "lazy":
+            # The secret fetch and client creation overlap with the rest of
+            # startup; the first database call waits for them
+            start_mongo_connection()
+        else:
+            await connect_to_mongo()
+            logger.info("Database connection established")
+            # A long-running server checks the index marker off the
+            # request path; Lambda relies on the deploy-time migration
+            index_task = asyncio.create_task(_ensure_indexes_logged())
+        
+        # Ticket events are queued by request handlers and sent in the background
+        with cold_start.phase("event_publisher"):
+            event_publisher.start()
+        
+        # Keep the ticket counters honest against writes made outside the
+        # API. Under Mangum this lifespan runs per invocation, so Lambda
+        # deployments run backend.workers.counter_reconciler on a schedule
+        reconcile_task = None
+        if not os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+            reconcile_task = asyncio.create_task(
+                counter_service.run_periodic_reconciliation(settings.counter_reconcile_interval_minutes * 60)
+            )
+    cold_start.ready()
     
     yield
     
     # Shutdown
     logger.info("Shutting down PriorityOps Backend...")
-    await close_mongo_connection()
-    logger.info("Database connection closed")
+    if reconcile_task is not None:
+        reconcile_task.cancel()
+    if index_task is not None and not index_task.done():
+        # The marker is only written once every index exists, so the next
+        # startup picks the build up again; wait so it stops using the
+        # client before the connection is closed
+        index_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await index_task
+    await counter_service.drain()
+    # Under Mangum the lifespan wraps every invocation, so this also sends
+    # the invocation's events before Lambda freezes the process
+    await event_publisher.close()
+    if DB_BOOTSTRAP != "lazy":
+        # In lazy mode the client outlives the invocation so a warm
+        # container reuses its connections
+        await close_mongo_connection()
+        logger.info("Database connection closed")
 
 
 # Initialize FastAPI app with lifespan manager
@@ -52,12 +111,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # Include routers
 app.include_router(tickets.router, prefix="/api/v1", tags=["tickets"])
 app.include_router(analytics.router, prefix="/api/v1", tags=["analytics"])
 
+cold_start.record("imports", PROCESS_START, time.perf_counter())
+
 
 @app.get("/")
 async def root():
@@ -80,5 +142,15 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """In-process cache, event publisher and cold-start statistics for this instance."""
+    return {
+        "ticket_cache": ticket_service.cache.stats(),
+        "events": event_publisher.stats(),
+        "cold_start": cold_start.report()
+    }
+
+
 # Lambda handler for AWS deployment
 handler = Mangum(app)
@@ -0,0 +1,115 @@
+"""
+Audit service for ticket history.
+
+History lives in the append-only `ticket_audit` collection, one document
+per change, indexed by (ticket_id, timestamp). Keeping it out of the ticket
+document means reads, list pages and updates never move a ticket's whole
+history around, however long it gets.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+
+from backend.models.ticket import AuditEntry
+from backend.utils.database import get_database
+from backend.utils.pagination import encode_cursor, decode_cursor, keyset_filter
+
+logger = logging.getLogger(__name__)
+
+# Newest first; _id breaks ties between entries written by one update
+AUDIT_SORT = [("timestamp", -1), ("_id", -1)]
+
+# Ticket fields whose changes are not worth an audit entry
+UNAUDITED_FIELDS = ("updated_at",)
+
+
+def _value(v: Any) -> Any:
+    """Store enum members by their plain value."""
+    return getattr(v, "value", v)
+
+
+class AuditService:
+    """Service class for ticket audit operations."""
+
+    def __init__(self):
+        self.collection_name = "ticket_audit"
+
+    @staticmethod
+    def diff(
+        ticket_id: ObjectId,
+        before: Dict[str, Any],
+        changes: Dict[str, Any],
+        timestamp: datetime,
+        user: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """One "updated" entry per field whose value actually changed."""
+        entries = []
+        for field, new_value in changes.items():
+            if field in UNAUDITED_FIELDS:
+                continue
+            old_value = _value(before.get(field))
+            new_value = _value(new_value)
+            if old_value == new_value:
+                continue
+            entries.append({
+                "ticket_id": ticket_id,
+                "timestamp": timestamp,
+                "action": "updated",
+                "field": field,
+                "old_value": old_value,
+                "new_value": new_value,
+                "user": user,
+            })
+        return entries
+
+    async def append(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Write entries before the caller reports its update as done. The
+        trail cannot be rebuilt afterwards, so a failed write is raised to
+        the caller rather than logged and dropped.
+        """
+        if not entries:
+            return
+        db = await get_database()
+        await db[self.collection_name].insert_many(entries, ordered=False)
+
+    async def record_updated(self, before: Dict[str, Any], changes: Dict[str, Any]) -> None:
+        await self.append(self.diff(before["_id"], before, changes, changes["updated_at"]))
+
+    async def get_entries(
+        self,
+        ticket_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Tuple[List[AuditEntry], Optional[str]]:
+        """
+        Get a page of a ticket's audit entries, newest first, and the
+        cursor for the page after it.
+
+        Raises InvalidCursorError if the cursor is malformed.
+        """
+        db = await get_database()
+        collection = db[self.collection_name]
+
+        query: Dict[str, Any] = {"ticket_id": ObjectId(ticket_id)}
+        if cursor:
+            query.update(keyset_filter(*decode_cursor(cursor), field="timestamp"))
+
+        docs = await collection.find(query).sort(AUDIT_SORT).limit(limit + 1).to_list(limit + 1)
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1]["timestamp"], str(docs[-1]["_id"]))
+
+        entries = [
+            AuditEntry(**{**doc, "id": str(doc["_id"]), "ticket_id": str(doc["ticket_id"])})
+            for doc in docs
+        ]
+        return entries, next_cursor
+
+
+# Global service instance
+audit_service = AuditService()
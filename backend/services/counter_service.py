@@ -0,0 +1,243 @@
+"""
+Counter service for incrementally maintained ticket totals.
+
+Keeps one document per (status, priority, assignee) combination in the
+`ticket_counters` collection. Ticket writes adjust those documents with
+`$inc` off the request path, so list totals can be read from a handful of
+small documents instead of counting the whole filtered ticket set.
+
+The same collection holds the tickets' write generation, a sequence every
+write path bumps (see TicketService.get_generation).
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from pymongo import UpdateOne, InsertOne, DeleteOne
+from pymongo.errors import BulkWriteError
+
+from backend.models.ticket import Priority, Status
+from backend.utils.database import get_database
+
+logger = logging.getLogger(__name__)
+
+# Ticket fields the counters are keyed on
+COUNTER_FIELDS = ("status", "priority", "assignee")
+
+# The generation document's id; counter ids always contain "|". The agents
+# bump it too (backend/agents/agent_db.py)
+GENERATION_ID = "generation"
+
+
+def _value(v: Any) -> Any:
+    """Store enum members by their plain value."""
+    return getattr(v, "value", v)
+
+
+class CounterService:
+    """Service class for ticket counter operations."""
+
+    def __init__(self):
+        self.collection_name = "ticket_counters"
+        self.tickets_collection_name = "tickets"
+        self._pending = set()
+
+    @staticmethod
+    def counter_key(doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the (status, priority, assignee) key from a ticket document."""
+        return {field: _value(doc.get(field)) for field in COUNTER_FIELDS}
+
+    @staticmethod
+    def _counter_id(key: Dict[str, Any]) -> str:
+        return "|".join("" if key[field] is None else str(key[field]) for field in COUNTER_FIELDS)
+
+    def _inc_op(self, key: Dict[str, Any], delta: int) -> UpdateOne:
+        return UpdateOne(
+            {"_id": self._counter_id(key)},
+            {"$inc": {"count": delta}, "$set": key},
+            upsert=True
+        )
+
+    @staticmethod
+    def _generation_op() -> UpdateOne:
+        return UpdateOne({"_id": GENERATION_ID}, {"$inc": {"seq": 1}}, upsert=True)
+
+    async def apply(self, deltas: List[tuple]) -> None:
+        """
+        Apply (key, delta) adjustments and bump the generation in a single
+        round trip.
+
+        Each adjustment is an atomic `$inc` on the counter document for that
+        key. Zero-sum pairs (a write that did not move the ticket between
+        keys) are dropped before anything is sent; the generation is bumped
+        either way.
+        """
+        merged: Dict[str, Any] = {}
+        for key, delta in deltas:
+            counter_id = self._counter_id(key)
+            if counter_id in merged:
+                merged[counter_id] = (key, merged[counter_id][1] + delta)
+            else:
+                merged[counter_id] = (key, delta)
+
+        operations = [self._inc_op(key, delta) for key, delta in merged.values() if delta]
+        operations.append(self._generation_op())
+
+        db = await get_database()
+        await db[self.collection_name].bulk_write(operations, ordered=False)
+
+    def schedule(self, deltas: List[tuple]) -> None:
+        """
+        Apply adjustments in the background so single-ticket writes stay at
+        one round trip. Anything lost to a crash is corrected by the
+        scheduled reconciliation.
+        """
+        task = asyncio.get_running_loop().create_task(self._apply_logged(deltas))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _apply_logged(self, deltas: List[tuple]) -> None:
+        try:
+            await self.apply(deltas)
+        except Exception as e:
+            logger.error(f"Failed to update ticket counters: {e}")
+
+    async def drain(self) -> None:
+        """Wait for scheduled counter adjustments to finish."""
+        while self._pending:
+            await asyncio.gather(*list(self._pending))
+
+    def record_created(self, doc: Dict[str, Any]) -> None:
+        self.schedule([(self.counter_key(doc), 1)])
+
+    def record_updated(self, before: Dict[str, Any], changes: Dict[str, Any]) -> None:
+        after = {**before, **changes}
+        if self.counter_key(before) != self.counter_key(after):
+            self.schedule([(self.counter_key(before), -1), (self.counter_key(after), 1)])
+        else:
+            self.schedule([])  # Only the generation moves
+
+    def record_deleted(self, doc: Dict[str, Any]) -> None:
+        self.schedule([(self.counter_key(doc), -1)])
+
+    async def get_count(
+        self,
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None,
+        assignee: Optional[str] = None
+    ) -> int:
+        """Sum the counters matching the given filters."""
+        db = await get_database()
+        collection = db[self.collection_name]
+
+        match = {}
+        if status:
+            match["status"] = _value(status)
+        if priority:
+            match["priority"] = _value(priority)
+        if assignee:
+            match["assignee"] = assignee
+
+        pipeline = [
+            {"$match": match},
+            {"$group": {"_id": None, "total": {"$sum": "$count"}}}
+        ]
+        result = await collection.aggregate(pipeline).to_list(1)
+        return max(result[0]["total"], 0) if result else 0
+
+    async def get_generation(self) -> int:
+        """The tickets' write generation; 0 before the first write."""
+        db = await get_database()
+        doc = await db[self.collection_name].find_one({"_id": GENERATION_ID})
+        return doc["seq"] if doc else 0
+
+    async def _stored_counts(self, counters) -> Dict[str, int]:
+        return {
+            doc["_id"]: doc.get("count", 0)
+            async for doc in counters.find({"_id": {"$ne": GENERATION_ID}}, {"count": 1})
+        }
+
+    async def reconcile(self) -> int:
+        """
+        Recompute every counter from the tickets collection.
+
+        Fixes drift from writes that bypass TicketService (the Lambda agents)
+        or from increments lost to crashes. Returns the number of counters
+        that were corrected.
+
+        Live `$inc`s are never overwritten. The counters are read before and
+        after the aggregation, and any counter that moved in between is left
+        for the next run. Each correction is an `$inc` of the difference,
+        applied only while the counter still holds the value it was computed
+        from. A write landing meanwhile makes the correction miss rather than
+        be lost.
+        """
+        db = await get_database()
+        tickets = db[self.tickets_collection_name]
+        counters = db[self.collection_name]
+
+        before = await self._stored_counts(counters)
+        pipeline = [
+            {"$group": {
+                "_id": {field: f"${field}" for field in COUNTER_FIELDS},
+                "count": {"$sum": 1}
+            }}
+        ]
+        actual = {}
+        async for row in tickets.aggregate(pipeline):
+            key = {field: _value(row["_id"].get(field)) for field in COUNTER_FIELDS}
+            actual[self._counter_id(key)] = (key, row["count"])
+        stored = await self._stored_counts(counters)
+
+        operations = []
+        for counter_id in set(actual) | set(stored):
+            current = stored.get(counter_id)
+            if before.get(counter_id) != current:
+                continue  # Moved during the aggregation
+            if counter_id not in actual:
+                operations.append(DeleteOne({"_id": counter_id, "count": current}))
+            elif current is None:
+                # A concurrent first $inc makes this a duplicate key error
+                key, count = actual[counter_id]
+                operations.append(InsertOne({"_id": counter_id, **key, "count": count}))
+            elif current != actual[counter_id][1]:
+                operations.append(UpdateOne(
+                    {"_id": counter_id, "count": current},
+                    {"$inc": {"count": actual[counter_id][1] - current}}
+                ))
+
+        if not operations:
+            return 0
+        try:
+            result = await counters.bulk_write(operations, ordered=False)
+            corrected = result.inserted_count + result.modified_count + result.deleted_count
+        except BulkWriteError as e:
+            details = e.details
+            corrected = details.get("nInserted", 0) + details.get("nModified", 0) + details.get("nRemoved", 0)
+        if corrected:
+            # Totals changed without a ticket write
+            await counters.bulk_write([self._generation_op()])
+            logger.info(f"Reconciled ticket counters: {corrected} correction(s)")
+        return corrected
+
+    async def run_periodic_reconciliation(self, interval_seconds: float) -> None:
+        """
+        Reconcile counters now and then every `interval_seconds` until
+        cancelled. For long-running processes only; see
+        backend/workers/counter_reconciler.py.
+        """
+        while True:
+            try:
+                started = datetime.utcnow()
+                await self.reconcile()
+                logger.debug(f"Counter reconciliation took {(datetime.utcnow() - started).total_seconds():.2f}s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Counter reconciliation failed: {e}")
+            await asyncio.sleep(interval_seconds)
+
+
+# Global service instance
+counter_service = CounterService()
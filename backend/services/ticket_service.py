@@ -5,14 +5,63 @@ This module contains the business logic for ticket operations,
 separate from the API route handlers.
 """
 
-from typing import List, Optional, Dict, Any
+import asyncio
+import os
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple, Union
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
 
-from backend.models.ticket import Ticket, TicketCreate, TicketUpdate, Priority, Status, EventTypes
+from backend.models.ticket import (
+    Ticket, TicketCreate, TicketUpdate, TicketSummary, TicketFilter, TicketSearchResult,
+    Priority, Status, EventTypes, SUMMARY_FIELDS
+)
 # --- CHANGE: Import the correct event function ---
 from backend.utils.database import get_database
-from backend.utils.events import fire_event  # <-- This is our new boto3-based function
+from backend.services.counter_service import counter_service, COUNTER_FIELDS
+from backend.services.audit_service import audit_service
+from backend.utils.events import fire_event, fire_events  # <-- This is our new boto3-based function
+from backend.utils.pagination import (
+    encode_cursor, decode_cursor, keyset_filter,
+    encode_score_cursor, decode_score_cursor, score_keyset_filter
+)
+from backend.utils.search import search_pattern, highlight
+from backend.utils.cache import ReadThroughCache, RedisCacheBackend
+from backend.utils.serialization import ticket_dict
+
+# Newest first, with _id as a tiebreaker so the order is total and
+# keyset cursors can resume from any position.
+TICKET_SORT = [("created_at", -1), ("_id", -1)]
+
+# Documents per insert_many call during bulk ingestion
+BULK_INSERT_CHUNK_SIZE = 500
+
+# Operations per bulk_write call during bulk updates
+BULK_UPDATE_CHUNK_SIZE = 500
+
+# Documents per cursor batch when streaming exports
+EXPORT_BATCH_SIZE = 1000
+
+# Characters of description shown around the first match in search results
+SEARCH_SNIPPET_LENGTH = 160
+
+# History used to be embedded in ticket documents; until the move_audit_trail
+# migration has run, keep those arrays out of every ticket read.
+LEGACY_HISTORY_EXCLUDED = {"audit_trail": 0, "agent_history": 0}
+
+# Ticket detail cache. The in-process tier is only invalidated by this
+# process, so its TTL bounds how stale a read can be after a write made
+# elsewhere; the shared tier is also invalidated by the agents.
+TICKET_CACHE_TTL_SECONDS = float(os.environ.get("TICKET_CACHE_TTL_SECONDS", "30"))
+TICKET_CACHE_MAX_ENTRIES = int(os.environ.get("TICKET_CACHE_MAX_ENTRIES", "10000"))
+TICKET_CACHE_REDIS_URL = os.environ.get("TICKET_CACHE_REDIS_URL")
+
+
+def _utcnow() -> datetime:
+    """Current UTC time at the millisecond precision BSON stores."""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond - now.microsecond % 1000)
 
 
 class TicketService:
@@ -20,26 +69,30 @@ class TicketService:
     
     def __init__(self):
         self.collection_name = "tickets"
+        self.cache = ReadThroughCache(
+            "ticket",
+            maxsize=TICKET_CACHE_MAX_ENTRIES,
+            ttl=TICKET_CACHE_TTL_SECONDS,
+            shared=RedisCacheBackend(TICKET_CACHE_REDIS_URL) if TICKET_CACHE_REDIS_URL else None,
+            shared_ttl=TICKET_CACHE_TTL_SECONDS * 10,
+            dumps=lambda ticket: ticket.model_dump_json(),
+            loads=Ticket.model_validate_json
+        )
     
     async def create_ticket(self, ticket_data: TicketCreate) -> Ticket:
         """Create a new ticket."""
         db = await get_database()
         collection = db[self.collection_name]
         
-        # --- CHANGE: Use .model_dump() instead of .dict() ---
-        ticket_dict = ticket_data.model_dump()
-        ticket_dict["created_at"] = datetime.utcnow()
-        ticket_dict["updated_at"] = datetime.utcnow()
-        # Add default values for a new ticket
-        ticket_dict["status"] = Status.PENDING
-        ticket_dict["priority"] = Priority.MEDIUM # Default, AI will change this
+        ticket_dict = self._new_ticket_document(ticket_data)
         
-        # Insert into database
+        # Insert into database. The stored document is exactly ticket_dict
+        # (insert_one fills in its _id), so there is nothing to read back.
         result = await collection.insert_one(ticket_dict)
         
-        # Retrieve the created ticket
-        created_ticket = await collection.find_one({"_id": result.inserted_id})
-        ticket = Ticket(**created_ticket, id=str(created_ticket["_id"]))
+        counter_service.record_created(ticket_dict)
+        
+        ticket = Ticket(**ticket_dict, id=str(result.inserted_id))
         
         # --- CHANGE: Use fire_event and simplify the payload ---
         # The AI pipeline only needs the ID. It can fetch the rest.
@@ -50,17 +103,69 @@ class TicketService:
         
         return ticket
     
-    async def get_ticket(self, ticket_id: str) -> Optional[Ticket]:
-        """Get a ticket by ID."""
+    async def create_tickets(
+        self,
+        tickets_data: List[TicketCreate],
+        chunk_size: int = BULK_INSERT_CHUNK_SIZE
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Create many tickets with batched inserts and batched events.
+        
+        Writes with unordered insert_many calls of up to `chunk_size`
+        documents, so one bad document does not stop the rest. Returns a
+        (ticket_id, error) pair per input, in input order.
+        """
         db = await get_database()
         collection = db[self.collection_name]
         
+        results: List[Tuple[Optional[str], Optional[str]]] = []
+        for start in range(0, len(tickets_data), chunk_size):
+            docs = [self._new_ticket_document(t) for t in tickets_data[start:start + chunk_size]]
+            # Assign ids up front so every document can be reported on
+            for doc in docs:
+                doc["_id"] = ObjectId()
+            
+            errors: Dict[int, str] = {}
+            try:
+                await collection.insert_many(docs, ordered=False)
+            except BulkWriteError as e:
+                for write_error in e.details.get("writeErrors", []):
+                    errors[write_error["index"]] = write_error.get("errmsg", "Write failed")
+            
+            inserted = [doc for i, doc in enumerate(docs) if i not in errors]
+            if inserted:
+                await counter_service.apply([(counter_service.counter_key(doc), 1) for doc in inserted])
+                fire_events(
+                    EventTypes.TICKET_CREATED,
+                    [{"ticket_id": str(doc["_id"])} for doc in inserted]
+                )
+            
+            results.extend(
+                (None, errors[i]) if i in errors else (str(doc["_id"]), None)
+                for i, doc in enumerate(docs)
+            )
+        
+        return results
+    
+    async def get_ticket(self, ticket_id: str) -> Optional[Ticket]:
+        """
+        Get a ticket by ID.
+        
+        Reads through the ticket cache; concurrent misses for the same ID
+        share one database fetch.
+        """
         try:
             obj_id = ObjectId(ticket_id)
         except Exception:
             return None # Invalid ID format
-            
-        ticket_doc = await collection.find_one({"_id": obj_id})
+        
+        return await self.cache.get(str(obj_id), lambda: self._load_ticket(obj_id))
+    
+    async def _load_ticket(self, obj_id: ObjectId) -> Optional[Ticket]:
+        db = await get_database()
+        collection = db[self.collection_name]
+        
+        ticket_doc = await collection.find_one({"_id": obj_id}, LEGACY_HISTORY_EXCLUDED)
         if not ticket_doc:
             return None
         
@@ -72,30 +177,173 @@ class TicketService:
         limit: int = 100,
         status: Optional[Status] = None,
         priority: Optional[Priority] = None,
-        assignee: Optional[str] = None
-    ) -> List[Ticket]:
+        assignee: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> List[Union[Ticket, TicketSummary]]:
         """Get tickets with optional filtering."""
+        tickets, _ = await self.get_tickets_page(
+            skip=skip,
+            limit=limit,
+            status=status,
+            priority=priority,
+            assignee=assignee,
+            fields=fields
+        )
+        return tickets
+    
+    async def get_tickets_page(
+        self,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None,
+        assignee: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        raw: bool = False
+    ) -> Tuple[List[Union[Ticket, TicketSummary, Dict[str, Any]]], Optional[str]]:
+        """
+        Get a page of tickets and the cursor for the page after it.
+        
+        With a `cursor`, resumes strictly after the (created_at, _id)
+        position it encodes, so every page is a bounded index range scan no
+        matter how deep it is; `skip` is only used without a cursor. The
+        returned cursor is None when there are no more tickets.
+        
+        With `fields`, only those fields are fetched from Mongo and the
+        tickets come back as TicketSummary with just those fields set.
+        
+        With `raw`, tickets come back as response dicts mapped straight from
+        the documents (see `ticket_dict`), skipping model validation.
+        
+        Raises InvalidCursorError if the cursor is malformed.
+        """
         db = await get_database()
         collection = db[self.collection_name]
         
-        # Build filter query
-        filter_query = {}
-        if status:
-            filter_query["status"] = status
-        if priority:
-            filter_query["priority"] = priority
-        if assignee:
-            filter_query["assignee"] = assignee
+        filter_query = self._build_filter_query(status, priority, assignee)
+        if cursor:
+            filter_query.update(keyset_filter(*decode_cursor(cursor)))
+            skip = 0
         
-        # Execute query
-        cursor = collection.find(filter_query).skip(skip).limit(limit).sort("created_at", -1)
-        tickets = []
+        # created_at is always fetched because the next cursor is built from it
+        projection = LEGACY_HISTORY_EXCLUDED
+        if fields is not None:
+            projection = {field: 1 for field in fields}
+            projection["created_at"] = 1
         
-        async for ticket_doc in cursor:
-            ticket = Ticket(**ticket_doc, id=str(ticket_doc["_id"]))
-            tickets.append(ticket)
+        # Fetch one extra document to learn whether another page exists
+        docs = await (
+            collection.find(filter_query, projection)
+            .sort(TICKET_SORT)
+            .skip(skip)
+            .limit(limit + 1)
+            .to_list(limit + 1)
+        )
         
-        return tickets
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            last = docs[-1]
+            next_cursor = encode_cursor(last["created_at"], str(last["_id"]))
+        
+        if raw:
+            tickets = [ticket_dict(doc, fields) for doc in docs]
+        elif fields is None:
+            tickets = [Ticket(**doc, id=str(doc["_id"])) for doc in docs]
+        else:
+            tickets = [
+                TicketSummary(id=str(doc["_id"]), **{f: doc[f] for f in fields if f in doc})
+                for doc in docs
+            ]
+        return tickets, next_cursor
+    
+    async def search_tickets(
+        self,
+        query: str,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None,
+        assignee: Optional[str] = None
+    ) -> Tuple[List[TicketSearchResult], Optional[str]]:
+        """
+        Full-text search over title and description, best match first.
+        
+        Runs a single `$text` aggregation on the text index, combined with
+        the usual filters, ordered by (textScore, _id) descending. With a
+        `cursor`, resumes strictly after the (score, _id) position it
+        encodes. Only the summary columns and description are fetched; the
+        description is used for the highlighted snippet and not returned.
+        
+        Raises InvalidCursorError if the cursor is malformed.
+        """
+        db = await get_database()
+        collection = db[self.collection_name]
+        
+        match = self._build_filter_query(status, priority, assignee)
+        match["$text"] = {"$search": query}
+        
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": match},
+            {"$project": {
+                **{field: 1 for field in SUMMARY_FIELDS},
+                "description": 1,
+                "score": {"$meta": "textScore"}
+            }},
+        ]
+        if cursor:
+            pipeline.append({"$match": score_keyset_filter(*decode_score_cursor(cursor))})
+        pipeline += [
+            {"$sort": {"score": -1, "_id": -1}},
+            # One extra document tells us whether another page exists
+            {"$limit": limit + 1},
+        ]
+        
+        docs = await collection.aggregate(pipeline).to_list(limit + 1)
+        
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_score_cursor(docs[-1]["score"], str(docs[-1]["_id"]))
+        
+        pattern = search_pattern(query)
+        results = []
+        for doc in docs:
+            highlights = {
+                "title": highlight(doc.get("title"), pattern),
+                "description": highlight(doc.get("description"), pattern, SEARCH_SNIPPET_LENGTH),
+            }
+            results.append(TicketSearchResult(
+                ticket=TicketSummary(id=str(doc["_id"]), **{f: doc[f] for f in SUMMARY_FIELDS if f in doc}),
+                score=doc["score"],
+                highlights={field: text for field, text in highlights.items() if text}
+            ))
+        return results, next_cursor
+    
+    async def iter_tickets(
+        self,
+        filters: TicketFilter,
+        fields: Optional[List[str]] = None,
+        batch_size: int = EXPORT_BATCH_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream every ticket matching `filters` as a plain dict, newest first.
+        
+        Documents are pulled from the Motor cursor `batch_size` at a time
+        and yielded one by one without model validation, so memory stays
+        flat however many tickets match. `_id` is renamed to `id`.
+        """
+        db = await get_database()
+        collection = db[self.collection_name]
+        
+        filter_query = self._build_filter_query(**filters.model_dump())
+        projection = {field: 1 for field in fields} if fields is not None else LEGACY_HISTORY_EXCLUDED
+        
+        cursor = collection.find(filter_query, projection).sort(TICKET_SORT).batch_size(batch_size)
+        async for doc in cursor:
+            doc["id"] = str(doc.pop("_id"))
+            yield doc
     
     async def update_ticket(self, ticket_id: str, ticket_update: TicketUpdate) -> Optional[Ticket]:
         """Update a ticket."""
@@ -109,19 +357,29 @@ class TicketService:
         
         # --- CHANGE: Use .model_dump() instead of .dict() ---
         update_data = ticket_update.model_dump(exclude_unset=True)
-        update_data["updated_at"] = datetime.utcnow()
+        update_data["updated_at"] = _utcnow()
         
-        # Update ticket
-        result = await collection.update_one(
+        # Update ticket in one round trip. We ask for the pre-image rather
+        # than ReturnDocument.AFTER because the counters need the old
+        # (status, priority, assignee) key; a top-level $set makes the
+        # post-image simply the pre-image with update_data applied. The
+        # pre-image also gives the audit diff its old values.
+        previous = await collection.find_one_and_update(
             {"_id": obj_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection=LEGACY_HISTORY_EXCLUDED,
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if previous is None:
             return None
         
-        # Get updated ticket
-        updated_ticket = await self.get_ticket(ticket_id)
+        await self.cache.invalidate(str(obj_id))
+        counter_service.record_updated(previous, update_data)
+        await audit_service.record_updated(previous, update_data)
+        
+        updated_doc = {**previous, **update_data}
+        updated_ticket = Ticket(**updated_doc, id=str(updated_doc["_id"]))
         
         # --- CHANGE: Use fire_event ---
         if updated_ticket:
@@ -137,6 +395,123 @@ class TicketService:
         
         return updated_ticket
     
+    async def update_tickets(
+        self,
+        updates: List[Tuple[str, TicketUpdate]],
+        chunk_size: int = BULK_UPDATE_CHUNK_SIZE
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Apply many (ticket_id, update) pairs with batched writes and events.
+        
+        Per chunk of up to `chunk_size` updates, the pre-images the counters
+        and audit diffs need are read with one `$in` query and the updates
+        go out in one unordered bulk_write, so one failed update does not
+        stop the rest. A ticket may appear only once per call. Returns a
+        (ticket_id, error) pair per input, in input order.
+        
+        Each update only applies while the ticket still has the status,
+        priority and assignee it was read with, so the counter deltas match
+        what was written. When the write matches fewer tickets than it was
+        sent, one more query finds which were updated (they carry this
+        chunk's `updated_at`); the rest are reported as changed concurrently.
+        """
+        db = await get_database()
+        collection = db[self.collection_name]
+        
+        results: List[Tuple[Optional[str], Optional[str]]] = []
+        for start in range(0, len(updates), chunk_size):
+            chunk = updates[start:start + chunk_size]
+            errors: Dict[int, str] = {}
+            
+            obj_ids: Dict[int, ObjectId] = {}
+            seen = set()
+            for i, (ticket_id, _) in enumerate(chunk):
+                try:
+                    obj_id = ObjectId(ticket_id)
+                except Exception:
+                    errors[i] = "Invalid ticket ID"
+                    continue
+                if obj_id in seen:
+                    errors[i] = "Duplicate ticket ID in request"
+                    continue
+                seen.add(obj_id)
+                obj_ids[i] = obj_id
+            
+            changes = {i: ticket_update.model_dump(exclude_unset=True) for i, (_, ticket_update) in enumerate(chunk)}
+            projection = {field: 1 for field in COUNTER_FIELDS}
+            for i in obj_ids:
+                projection.update((field, 1) for field in changes[i])
+            
+            previous = {}
+            if obj_ids:
+                previous = {
+                    doc["_id"]: doc
+                    async for doc in collection.find({"_id": {"$in": list(obj_ids.values())}}, projection)
+                }
+            
+            now = _utcnow()
+            positions: List[int] = []
+            operations = []
+            for i, obj_id in obj_ids.items():
+                if obj_id not in previous:
+                    errors[i] = "Ticket not found"
+                    continue
+                changes[i]["updated_at"] = now
+                positions.append(i)
+                guard = counter_service.counter_key(previous[obj_id])
+                operations.append(UpdateOne({"_id": obj_id, **guard}, {"$set": changes[i]}))
+            
+            if operations:
+                try:
+                    matched = (await collection.bulk_write(operations, ordered=False)).matched_count
+                except BulkWriteError as e:
+                    matched = e.details.get("nMatched", 0)
+                    for write_error in e.details.get("writeErrors", []):
+                        errors[positions[write_error["index"]]] = write_error.get("errmsg", "Write failed")
+                
+                written = [i for i in positions if i not in errors]
+                if matched < len(written):
+                    applied = {
+                        doc["_id"]
+                        async for doc in collection.find(
+                            {"_id": {"$in": [obj_ids[i] for i in written]}, "updated_at": now}, {"_id": 1}
+                        )
+                    }
+                    for i in written:
+                        if obj_ids[i] not in applied:
+                            errors[i] = "Ticket was changed or deleted during the update"
+            
+            updated = [i for i in positions if i not in errors]
+            if updated:
+                await asyncio.gather(*(self.cache.invalidate(str(obj_ids[i])) for i in updated))
+                
+                deltas = []
+                audit_entries = []
+                details = []
+                for i in updated:
+                    before = previous[obj_ids[i]]
+                    after = {**before, **changes[i]}
+                    if counter_service.counter_key(before) != counter_service.counter_key(after):
+                        deltas += [(counter_service.counter_key(before), -1), (counter_service.counter_key(after), 1)]
+                    audit_entries += audit_service.diff(obj_ids[i], before, changes[i], now)
+                    details.append({
+                        "ticket_id": str(obj_ids[i]),
+                        "changes": changes[i],
+                        "status": after.get("status"),
+                        "priority": after.get("priority")
+                    })
+                
+                counter_service.schedule(deltas)
+                await audit_service.append(audit_entries)
+                fire_events(EventTypes.TICKET_UPDATED, details)
+            
+            results.extend(
+                (None, errors[i]) if i in errors else (str(obj_ids[i]), None)
+                for i in range(len(chunk))
+            )
+        
+        return results
+    
     async def delete_ticket(self, ticket_id: str) -> bool:
         """Delete a ticket."""
         db = await get_database()
@@ -147,9 +522,14 @@ class TicketService:
         except Exception:
             return False # Invalid ID format
             
-        result = await collection.delete_one({"_id": obj_id})
+        deleted = await collection.find_one_and_delete(
+            {"_id": obj_id},
+            projection={field: 1 for field in COUNTER_FIELDS}
+        )
         
-        if result.deleted_count > 0:
+        if deleted is not None:
+            await self.cache.invalidate(str(obj_id))
+            counter_service.record_deleted(deleted)
             # --- CHANGE: Use fire_event ---
             fire_event(
                 EventTypes.TICKET_DELETED, # "ticket.deleted"
@@ -163,13 +543,71 @@ class TicketService:
         self,
         status: Optional[Status] = None,
         priority: Optional[Priority] = None,
-        assignee: Optional[str] = None
+        assignee: Optional[str] = None,
+        exact: bool = False
     ) -> int:
-        """Get count of tickets with optional filtering."""
+        """
+        Get count of tickets with optional filtering.
+        
+        Served from the incrementally maintained counters by default; pass
+        exact=True to count the matching tickets directly.
+        """
+        if not exact:
+            return await counter_service.get_count(status, priority, assignee)
+        
         db = await get_database()
         collection = db[self.collection_name]
         
-        # Build filter query
+        filter_query = self._build_filter_query(status, priority, assignee)
+        
+        return await collection.count_documents(filter_query)
+    
+    async def get_generation(self) -> str:
+        """
+        A token that changes whenever a ticket is created, updated or
+        deleted, whether by the API or by the agents, and whenever the
+        counters behind list totals are reconciled.
+        
+        Built from the write generation every write path bumps (see
+        counter_service), plus the collection's document count and latest
+        `updated_at`. The API bumps the generation in the background with
+        its counter updates, so the latter two still move if that bump is
+        lost to a crash.
+        """
+        db = await get_database()
+        collection = db[self.collection_name]
+        
+        seq, count, latest = await asyncio.gather(
+            counter_service.get_generation(),
+            collection.estimated_document_count(),
+            collection.find({}, {"updated_at": 1}).sort("updated_at", -1).limit(1).to_list(1)
+        )
+        if not latest:
+            return f"{seq}:{count}"
+        return f"{seq}:{count}:{latest[0].get('updated_at')}:{latest[0]['_id']}"
+    
+    @staticmethod
+    def _new_ticket_document(ticket_data: TicketCreate) -> Dict[str, Any]:
+        """Build the stored document for a newly created ticket."""
+        # --- CHANGE: Use .model_dump() instead of .dict() ---
+        ticket_dict = ticket_data.model_dump()
+        ticket_dict["created_at"] = _utcnow()
+        ticket_dict["updated_at"] = ticket_dict["created_at"]
+        # Add default values for a new ticket
+        ticket_dict["status"] = Status.PENDING
+        ticket_dict["priority"] = Priority.MEDIUM # Default, AI will change this
+        return ticket_dict
+    
+    @staticmethod
+    def _build_filter_query(
+        status: Optional[Status] = None,
+        priority: Optional[Priority] = None,
+        assignee: Optional[str] = None,
+        department: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Build the Mongo filter shared by listing, counting and exporting."""
         filter_query = {}
         if status:
             filter_query["status"] = status
@@ -177,8 +615,15 @@ class TicketService:
             filter_query["priority"] = priority
         if assignee:
             filter_query["assignee"] = assignee
-        
-        return await collection.count_documents(filter_query)
+        if department:
+            filter_query["department"] = department
+        if created_after or created_before:
+            filter_query["created_at"] = {}
+            if created_after:
+                filter_query["created_at"]["$gte"] = created_after
+            if created_before:
+                filter_query["created_at"]["$lt"] = created_before
+        return filter_query
 
 
 # Global service instance
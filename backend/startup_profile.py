@@ -0,0 +1,134 @@
+# backend/startup_profile.py
+"""
+Start-up profiler for the API package.
+
+    python -m backend.startup_profile [--target backend.server] [--top 20] [--budget-ms N]
+
+Imports the target in a fresh interpreter with `-X importtime` and
+reports the slowest modules by self time, the time per top-level package
+and the total import time against a budget (STARTUP_BUDGET_MS). It also
+lists any heavy module the import pulled in: the LLM and embedding
+libraries and boto3 are only ever loaded on first use, never by the
+request-serving path. Exits non-zero when the budget is exceeded or a
+heavy module was loaded.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+DEFAULT_TARGET = "backend.server"
+
+# Total import time allowed for the target, in milliseconds
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "1500"))
+
+# Top-level packages that must not be imported at start-up
+HEAVY_MODULES = (
+    "boto3", "botocore", "langchain", "langchain_core", "openai",
+    "sentence_transformers", "torch", "numpy", "sklearn", "opensearchpy",
+)
+
+# Settings that must be present for `backend.server` to import; the
+# profile never connects to anything, so placeholders are enough
+PLACEHOLDER_ENV = {
+    "MONGODB_URI": "mongodb://localhost:27017",
+    "OPENAI_API_KEY": "unused",
+}
+
+
+@dataclass
+class ModuleTiming:
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class ImportProfile:
+    target: str
+    total_ms: float
+    modules: List[ModuleTiming] = field(default_factory=list)
+
+    @property
+    def heavy_modules(self) -> List[str]:
+        """Heavy top-level packages that were imported."""
+        loaded = {m.name.split(".")[0] for m in self.modules}
+        return [name for name in HEAVY_MODULES if name in loaded]
+
+    def slowest(self, n: int) -> List[ModuleTiming]:
+        return sorted(self.modules, key=lambda m: m.self_us, reverse=True)[:n]
+
+    def by_package(self) -> Dict[str, float]:
+        """Self time per top-level package, in milliseconds, slowest first."""
+        totals: Dict[str, int] = defaultdict(int)
+        for m in self.modules:
+            totals[m.name.split(".")[0]] += m.self_us
+        return {name: us / 1000 for name, us in sorted(totals.items(), key=lambda item: item[1], reverse=True)}
+
+
+def parse_importtime(stderr: str) -> List[ModuleTiming]:
+    """Parses `-X importtime` lines: `import time: self | cumulative | name`."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # The header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append(ModuleTiming(name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def profile_imports(target: str = DEFAULT_TARGET, env: Optional[Dict[str, str]] = None) -> ImportProfile:
+    """Import `target` in a fresh interpreter and time every module it loads."""
+    child_env = {**PLACEHOLDER_ENV, **os.environ, **(env or {})}
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {target}; "
+        "print((time.perf_counter() - started) * 1000)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=child_env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{result.stderr[-2000:]}")
+    return ImportProfile(target, float(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr))
+
+
+def format_report(profile: ImportProfile, top: int, budget_ms: float) -> str:
+    lines = [f"Import profile for {profile.target}", ""]
+    lines.append(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for m in profile.slowest(top):
+        lines.append(f"{m.self_us / 1000:9.1f} {m.cumulative_us / 1000:9.1f}  {m.name}")
+    lines += ["", f"{'self ms':>9}  package"]
+    for name, ms in list(profile.by_package().items())[:top]:
+        lines.append(f"{ms:9.1f}  {name}")
+    verdict = "within" if profile.total_ms <= budget_ms else "OVER"
+    lines += ["", f"Total: {profile.total_ms:.1f} ms ({verdict} the {budget_ms:.0f} ms budget)"]
+    heavy = profile.heavy_modules
+    lines.append(f"Heavy modules loaded: {', '.join(heavy) if heavy else 'none'}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default=DEFAULT_TARGET, help="Module to import")
+    parser.add_argument("--top", type=int, default=20, help="Modules and packages to list")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS, help="Total import time allowed")
+    args = parser.parse_args(argv)
+
+    profile = profile_imports(args.target)
+    print(format_report(profile, args.top, args.budget_ms))
+    return 0 if profile.total_ms <= args.budget_ms and not profile.heavy_modules else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,8 +5,27 @@ This package contains utility modules for:
 - Database connections and operations
 - Event system management
 - LLM client integrations
+- Cursor pagination helpers
+- Streaming export encoders
+- Read-through caching
+- Conditional GET (ETag) helpers
+- Ticket search queries
+- Response serialization
+- Index registration and auditing
+- Cold-start timing
 """
 
-from . import database, events, llm_client
+import importlib
 
-__all__ = ["database", "events", "llm_client"]
\ No newline at end of file
+__all__ = [
+    "cache", "coldstart", "database", "etag", "events", "export", "index_audit",
+    "indexes", "llm_client", "pagination", "search", "serialization",
+]
+
+
+def __getattr__(name):
+    # Submodules load on first use, so importing one utility does not pull
+    # in the others (and their dependencies) at start-up
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,250 @@
+# backend/utils/cache.py
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    In-process LRU cache with a per-entry TTL and a size bound.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Any:
+        """Returns the cached value, or _MISSING."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return _MISSING
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SharedCacheBackend(ABC):
+    """
+    A cache shared between processes, used as the second tier behind the
+    in-process LRU. Values are strings.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+
+class InMemoryCacheBackend(SharedCacheBackend):
+    """
+    Dict-backed stand-in for a shared backend, for local runs and tests.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, tuple] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._entries[key] = (value, time.monotonic() + ttl)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class RedisCacheBackend(SharedCacheBackend):
+    """
+    Shared tier backed by Redis (or any server speaking its protocol).
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise ImportError("RedisCacheBackend requires the 'redis' package") from e
+        self._client = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self._client.set(key, value, px=int(ttl * 1000))
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(key)
+
+
+class ReadThroughCache:
+    """
+    Read-through cache: an in-process LRU in front of an optional shared
+    backend in front of a loader (usually a database read).
+
+    Concurrent misses for the same key share a single load. A key
+    invalidated while its load is in flight is marked, and that load
+    repopulates neither tier with its possibly stale data.
+    Loader results of None are returned but never cached.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int = 1024,
+        ttl: float = 30.0,
+        shared: Optional[SharedCacheBackend] = None,
+        shared_ttl: Optional[float] = None,
+        dumps: Callable[[Any], str] = str,
+        loads: Callable[[str], Any] = lambda s: s,
+    ):
+        self.name = name
+        self.local = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.shared = shared
+        self.shared_ttl = shared_ttl or ttl
+        self._dumps = dumps
+        self._loads = loads
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Keys invalidated while their load was in flight; an entry lives
+        # only as long as that load
+        self._stale: Set[str] = set()
+        self.loads = 0
+        self.coalesced = 0
+        self.shared_hits = 0
+        self.shared_errors = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.local.get(key)
+        if value is not _MISSING:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._fetch(key, loader)
+            if value is not None and key not in self._stale:
+                self.local.set(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not logged
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+            self._stale.discard(key)
+
+    async def _fetch(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if self.shared is not None:
+            try:
+                raw = await self.shared.get(self._key(key))
+                if raw is not None:
+                    self.shared_hits += 1
+                    return self._loads(raw)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Shared cache read failed for {self._key(key)}: {e}")
+
+        self.loads += 1
+        value = await loader()
+
+        if value is not None and self.shared is not None and key not in self._stale:
+            try:
+                await self.shared.set(self._key(key), self._dumps(value), self.shared_ttl)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Shared cache write failed for {self._key(key)}: {e}")
+        return value
+
+    async def invalidate(self, key: str) -> None:
+        if key in self._inflight:
+            self._stale.add(key)
+        self.local.delete(key)
+        if self.shared is not None:
+            try:
+                await self.shared.delete(self._key(key))
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Shared cache delete failed for {self._key(key)}: {e}")
+
+    def clear(self) -> None:
+        """Drops the in-process tier only."""
+        self.local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        local = self.local
+        lookups = local.hits + local.misses
+        return {
+            "size": len(local),
+            "max_size": local.maxsize,
+            "ttl_seconds": local.ttl,
+            "hits": local.hits,
+            "misses": local.misses,
+            "hit_rate": round(local.hits / lookups, 4) if lookups else 0.0,
+            "evictions": local.evictions,
+            "expirations": local.expirations,
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "shared_backend": type(self.shared).__name__ if self.shared else None,
+            "shared_hits": self.shared_hits,
+            "shared_errors": self.shared_errors,
+        }
@@ -0,0 +1,67 @@
+# backend/utils/coldstart.py
+"""
+Cold-start timing: how long each phase of process start-up took.
+
+`server.py` records the imports, and the lifespan and database bootstrap
+record their own phases. Phases may overlap when they run concurrently,
+so each one reports its offset from process start as well as its
+duration. The report is logged once the first request can be served and
+is available on `/metrics`.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# As close to process start as this package can measure
+PROCESS_START = time.perf_counter()
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+class ColdStartTimer:
+    """Records named phases of the first start-up in this process."""
+
+    def __init__(self, origin: float = PROCESS_START):
+        self._origin = origin
+        self._phases: Dict[str, Dict[str, float]] = {}
+        self._ready_at: Optional[float] = None
+
+    def record(self, name: str, started: float, ended: float) -> None:
+        """Record a phase once; later runs of it (warm invocations) are ignored."""
+        if self._ready_at is None and name not in self._phases:
+            self._phases[name] = {
+                "start_ms": _ms(started - self._origin),
+                "duration_ms": _ms(ended - started),
+            }
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, time.perf_counter())
+
+    def ready(self) -> None:
+        """Mark the process ready to serve and log the report, once."""
+        if self._ready_at is None:
+            self._ready_at = time.perf_counter()
+            report = self.report()
+            phases = ", ".join(f"{name} {p['duration_ms']} ms" for name, p in report["phases"].items())
+            logger.info(f"Cold start ready in {report['ready_ms']} ms ({phases})")
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "ready_ms": None if self._ready_at is None else _ms(self._ready_at - self._origin),
+            "phases": dict(sorted(self._phases.items(), key=lambda item: item[1]["start_ms"])),
+        }
+
+
+# Global timer instance
+cold_start = ColdStartTimer()
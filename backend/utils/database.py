@@ -1,11 +1,13 @@
 # backend/utils/database.py
 import os
 import json
-import boto3
+import time
+import asyncio
 import logging
-from typing import Optional
+from typing import Any, Dict, Optional
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from botocore.exceptions import ClientError, NoCredentialsError
+
+from backend.utils.coldstart import cold_start
 
 logger = logging.getLogger(__name__)
 
@@ -13,44 +15,80 @@ logger = logging.getLogger(__name__)
 SECRET_ID = os.environ.get("SECRET_ID", "priorityops/docdb")
 DB_NAME = "priorityopsdb"
 
+# How long resolved credentials are reused before Secrets Manager is asked
+# again; a warm Lambda container skips the fetch entirely within this window.
+SECRET_CACHE_TTL_SECONDS = float(os.environ.get("SECRET_CACHE_TTL_SECONDS", "900"))
+
+# "lazy" starts the connection in the background at startup, without the
+# ping, and lets the first database call wait for it; the client is kept
+# for the container's later invocations. "eager" connects and pings before
+# serving. Lazy is the default on Lambda, where startup runs per invocation.
+DB_BOOTSTRAP = os.environ.get(
+    "DB_BOOTSTRAP", "lazy" if os.environ.get("AWS_LAMBDA_FUNCTION_NAME") else "eager"
+)
+
 # --- Global Client Instance ---
 _mongo_client: Optional[AsyncIOMotorClient] = None
 _database: Optional[AsyncIOMotorDatabase] = None
+_connecting: Optional[asyncio.Task] = None
+
+# --- Cached secret ---
+_secrets_client = None
+_credentials: Optional[Dict[str, Any]] = None
+_credentials_fetched_at = 0.0
+
+
+def _fetch_secret() -> Dict[str, Any]:
+    """Fetch and parse the MongoDB secret (blocking)."""
+    global _secrets_client
+    # boto3 is imported here rather than at module level: it is the slowest
+    # import on the API's start-up path and only this fetch needs it
+    import boto3
+    from botocore.exceptions import ClientError, NoCredentialsError
+    try:
+        if _secrets_client is None:
+            _secrets_client = boto3.session.Session().client(service_name='secretsmanager')
+
+        logger.info(f"Fetching MongoDB credentials from secret: {SECRET_ID}")
+        response = _secrets_client.get_secret_value(SecretId=SECRET_ID)
+        credentials = json.loads(response['SecretString'])
+        logger.info("Successfully retrieved MongoDB credentials.")
+        return credentials
+
+    except (ClientError, NoCredentialsError) as e:
+        logger.error(f"Failed to retrieve AWS secret {SECRET_ID}: {e}")
+        raise Exception("Failed to get DB credentials from AWS Secrets Manager")
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse secret JSON from {SECRET_ID}: {e}")
+        raise Exception("Invalid JSON format in AWS secret")
 
 
-async def connect_to_mongo():
+async def get_credentials() -> Dict[str, Any]:
     """
-    Connect to MongoDB Atlas asynchronously on app startup.
-    Fetches credentials from AWS Secrets Manager.
+    MongoDB credentials from AWS Secrets Manager, cached for
+    SECRET_CACHE_TTL_SECONDS. The fetch runs in a worker thread so it does
+    not block other start-up work on the event loop.
     """
+    global _credentials, _credentials_fetched_at
+
+    if _credentials is not None and time.monotonic() - _credentials_fetched_at < SECRET_CACHE_TTL_SECONDS:
+        return _credentials
+
+    with cold_start.phase("secret"):
+        _credentials = await asyncio.to_thread(_fetch_secret)
+    _credentials_fetched_at = time.monotonic()
+    return _credentials
+
+
+async def _connect(ping: bool) -> None:
     global _mongo_client, _database
-    
-    if _mongo_client:
-        logger.info("MongoDB connection already established.")
-        return
 
     logger.info("Initializing new MongoDB Atlas (async) connection...")
-    
+
     try:
-        # 1. Get secret from AWS Secrets Manager (This is a sync call, but OK once at startup)
-        try:
-            session = boto3.session.Session()
-            sm_client = session.client(service_name='secretsmanager')
-            
-            logger.info(f"Fetching MongoDB credentials from secret: {SECRET_ID}")
-            response = sm_client.get_secret_value(SecretId=SECRET_ID)
-            secret_string = response['SecretString']
-            credentials = json.loads(secret_string)
-            logger.info("Successfully retrieved MongoDB credentials.")
-            
-        except (ClientError, NoCredentialsError) as e:
-            logger.error(f"Failed to retrieve AWS secret {SECRET_ID}: {e}")
-            raise Exception("Failed to get DB credentials from AWS Secrets Manager")
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse secret JSON from {SECRET_ID}: {e}")
-            raise Exception("Invalid JSON format in AWS secret")
-
-        # 2. Get connection details from secret
+        credentials = await get_credentials()
+
+        # Get connection details from secret
         username = credentials.get('username')
         password = credentials.get('password')
         conn_string_template = credentials.get('connection_string')
@@ -58,24 +96,27 @@ async def connect_to_mongo():
         if not all([username, password, conn_string_template]):
              raise Exception("Secret is missing 'username', 'password', or 'connection_string'")
 
-        # 3. Inject password into the connection string
+        # Inject password into the connection string
         mongodb_uri = conn_string_template.replace("<password>", password)
 
-        # 4. Create the ASYNC client
-        _mongo_client = AsyncIOMotorClient(
-            mongodb_uri,
-            maxPoolSize=50,
-            minPoolSize=5
-        )
-        
-        # Test the connection
-        await _mongo_client.admin.command('ping')
-        
-        _database = _mongo_client[DB_NAME]
-        
-        # Create indexes
-        await create_indexes()
-        
+        # Create the ASYNC client. Motor connects in the background, so
+        # without the ping the first query is what waits for the server.
+        with cold_start.phase("mongo_client"):
+            client = AsyncIOMotorClient(
+                mongodb_uri,
+                maxPoolSize=50,
+                minPoolSize=5
+            )
+
+        if ping:
+            with cold_start.phase("mongo_ping"):
+                await client.admin.command('ping')
+
+        _mongo_client = client
+        _database = client[DB_NAME]
+
+        # Indexes are created by the versioned migration
+        # (python -m backend.migrations.create_indexes), not here.
         logger.info(f"Successfully connected to MongoDB and database '{DB_NAME}'")
 
     except Exception as e:
@@ -85,49 +126,61 @@ async def connect_to_mongo():
         raise # Re-raise exception to stop the app if DB connection fails
 
 
+async def connect_to_mongo(ping: bool = True):
+    """
+    Connect to MongoDB Atlas asynchronously on app startup.
+    Fetches credentials from AWS Secrets Manager (cached with a TTL).
+
+    Concurrent callers share one connection attempt.
+    """
+    global _connecting
+
+    if _database is not None:
+        logger.info("MongoDB connection already established.")
+        return
+
+    if _connecting is None or _connecting.done():
+        _connecting = asyncio.get_running_loop().create_task(_connect(ping))
+    await asyncio.shield(_connecting)
+
+
+def start_mongo_connection() -> None:
+    """
+    Begin connecting in the background (the lazy bootstrap), so start-up
+    does not wait for it; get_database() waits for it on first use.
+    """
+    global _connecting
+
+    if _database is None and (_connecting is None or _connecting.done()):
+        _connecting = asyncio.get_running_loop().create_task(_connect(ping=False))
+        # A failure is raised again by the first get_database() call
+        _connecting.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+
 async def close_mongo_connection():
     """Close database connection"""
-    global _mongo_client
+    global _mongo_client, _database
     if _mongo_client:
         _mongo_client.close()
+        _mongo_client = None
+        _database = None
         logger.info("Disconnected from MongoDB")
 
 
-async def create_indexes():
-    """Create database indexes for better performance"""
-    global _database
-    if not _database:
-        logger.warning("No database connection, skipping index creation.")
-        return
-    
-    try:
-        tickets_collection = _database.tickets
-        
-        # Create indexes for common query patterns
-        await tickets_collection.create_index("status")
-        await tickets_collection.create_index("priority")
-        await tickets_collection.create_index("created_at")
-        await tickets_collection.create_index("department")
-        await tickets_collection.create_index("assignee")
-        await tickets_collection.create_index([("title", "text"), ("description", "text")])
-        
-        logger.info("Database indexes created/verified successfully")
-    except Exception as e:
-        logger.error(f"Failed to create indexes: {str(e)}")
-
-
 async def get_database() -> AsyncIOMotorDatabase:
     """
     FastAPI Dependency to get the database instance.
     """
-    global _database
     if _database is None:
-        # This should not happen if startup events are configured correctly
-        logger.warning("Database not initialized, attempting to connect...")
-        await connect_to_mongo()
-        
+        if _connecting is not None and not _connecting.done():
+            # Lazy bootstrap: the connection started at startup is in flight
+            await asyncio.shield(_connecting)
+        else:
+            logger.warning("Database not initialized, attempting to connect...")
+            await connect_to_mongo()
+
     if _database is None:
          # If connection still failed, raise a clear error
          raise Exception("Database connection is not available.")
-         
-    return _database
\ No newline at end of file
+
+    return _database
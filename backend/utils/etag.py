@@ -0,0 +1,44 @@
+# backend/utils/etag.py
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Clients may keep a copy but must revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Builds a strong ETag from the values a response is derived from."""
+    digest = hashlib.sha1("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:24]}"'
+
+
+def query_key(request: Request) -> str:
+    """The request's query parameters in a canonical order."""
+    return "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Evaluates an If-None-Match header against `etag` using weak
+    comparison, as RFC 9110 requires for If-None-Match.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    strip = lambda tag: tag.strip().removeprefix("W/")
+    return strip(etag) in {strip(tag) for tag in if_none_match.split(",")}
+
+
+def check_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Returns a bodyless 304 response if the client already has `etag`;
+    otherwise sets the validator headers on `response` and returns None.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,46 +1,284 @@
 # backend/utils/events.py
-import boto3
+import asyncio
 import json
 import os
 import logging
+import random
+import statistics
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from backend.utils.export import json_default
 
 logger = logging.getLogger(__name__)
 
 # Fetch the Event Bus name from environment variables
-# We'll need to add EVENT_BUS_NAME to our .env file later
 EVENT_BUS_NAME = os.environ.get("EVENT_BUS_NAME", "PriorityOps-Bus")
+EVENT_SOURCE = "priorityops.api"
+
+# EventBridge accepts at most this many entries per PutEvents call
+MAX_ENTRIES_PER_PUT = 10
+
+# Who emits ticket events: "inline" publishes from TicketService after each
+# write; "change_stream" leaves it to the event relay worker
+# (backend/workers/event_relay.py), which also sees writes made by agents.
+EVENT_EMISSION = os.environ.get("EVENT_EMISSION", "inline")
+
+# Publisher tuning
+EVENT_FLUSH_INTERVAL_SECONDS = float(os.environ.get("EVENT_FLUSH_INTERVAL_SECONDS", "0.5"))
+EVENT_MAX_RETRIES = int(os.environ.get("EVENT_MAX_RETRIES", "5"))
+EVENT_RETRY_BACKOFF_SECONDS = 0.2
+
+# Created on first use, so importing this module (and with it the whole
+# ticket write path) does not load boto3
+event_client = None
+
+
+def _get_event_client():
+    global event_client
+    if event_client is None:
+        try:
+            import boto3
+            event_client = boto3.client("events")
+            logger.info("Boto3 EventBridge client initialized.")
+        except Exception as e:
+            logger.error(f"Failed to initialize Boto3 client: {e}")
+    return event_client
+
+
+def _entry(event_type: str, detail: dict) -> Dict[str, Any]:
+    return {
+        "Source": EVENT_SOURCE,
+        "DetailType": event_type,
+        # Update events carry datetimes in their changes
+        "Detail": json.dumps(detail, default=json_default),
+        "EventBusName": EVENT_BUS_NAME
+    }
+
+
+def _put_entries(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    One PutEvents call. Returns the entries EventBridge did not accept
+    (all of them if the call itself failed).
+    """
+    client = _get_event_client()
+    if client is None:
+        logger.error("EventBridge client is not initialized. Cannot fire events.")
+        return entries
+    try:
+        response = client.put_events(Entries=entries)
+    except Exception as e:
+        logger.error(f"Failed to put {len(entries)} event(s) to EventBridge: {e}")
+        return entries
+    if not response.get("FailedEntryCount"):
+        return []
+    return [
+        entry for entry, result in zip(entries, response.get("Entries", []))
+        if result.get("ErrorCode")
+    ]
+
+
+class EventPublisher:
+    """
+    Non-blocking EventBridge publisher for the API process.
+
+    `publish` appends to an in-memory queue and returns immediately. A
+    background task sends the queue in PutEvents batches of up to
+    MAX_ENTRIES_PER_PUT, as soon as a batch is full or `flush_interval`
+    after the oldest queued event, whichever comes first. boto3 runs in a
+    worker thread so the event loop never waits on AWS. Entries rejected by
+    EventBridge are retried with exponential backoff; after `max_retries`
+    they are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = EVENT_FLUSH_INTERVAL_SECONDS,
+        max_retries: int = EVENT_MAX_RETRIES,
+        retry_backoff: float = EVENT_RETRY_BACKOFF_SECONDS,
+        max_queue: int = 100_000
+    ):
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_queue = max_queue
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # Batches popped off the queue and not yet delivered or dropped
+        self._sending = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._latencies: Deque[float] = deque(maxlen=500)
+        self.published = 0
+        self.delivered = 0
+        self.retried = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def publish(self, event_type: str, detail: dict) -> None:
+        self.publish_many(event_type, [detail])
+
+    def publish_many(self, event_type: str, details: List[dict]) -> None:
+        entries = []
+        for detail in details:
+            try:
+                entries.append(_entry(event_type, detail))
+            except (TypeError, ValueError) as e:
+                logger.error(f"Dropping unserializable {event_type} event: {e}")
+                self.dropped += 1
+        if not entries:
+            return
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts, the Lambda agents): send inline
+            self._send_sync(entries)
+            return
+
+        overflow = len(self._queue) + len(entries) - self.max_queue
+        if overflow > 0:
+            logger.error(f"Event queue full, dropping {overflow} oldest event(s)")
+            for _ in range(min(overflow, len(self._queue))):
+                self._queue.popleft()
+            self.dropped += overflow
+        self._queue.extend(entries)
+        self.published += len(entries)
+
+        self.start()
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            # Give a partial batch until the flush interval to fill up
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._queue) < MAX_ENTRIES_PER_PUT:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            await self._flush_batch()
+
+    async def _flush_batch(self) -> None:
+        batch = [self._queue.popleft() for _ in range(min(MAX_ENTRIES_PER_PUT, len(self._queue)))]
+        if not batch:
+            return
+        self._sending += 1
+        self._idle.clear()
+        try:
+            await self._send_batch(batch)
+        finally:
+            self._sending -= 1
+            if not self._sending:
+                self._idle.set()
+
+    async def _send_batch(self, batch: List[Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        pending = batch
+        try:
+            for attempt in range(self.max_retries + 1):
+                if attempt:
+                    self.retried += len(pending)
+                    delay = self.retry_backoff * 2 ** (attempt - 1)
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+                pending = await asyncio.to_thread(_put_entries, pending)
+                if not pending:
+                    break
+        except asyncio.CancelledError:
+            # Interrupted by close(): put the batch back so the final flush
+            # sends it (an in-flight call may still deliver it as well)
+            self._queue.extendleft(reversed(pending))
+            raise
+        self._latencies.append(time.perf_counter() - started)
+        self.delivered += len(batch) - len(pending)
+        if pending:
+            self.dropped += len(pending)
+            logger.error(f"Dropped {len(pending)} event(s) after {self.max_retries} retries")
+
+    def _send_sync(self, entries: List[Dict[str, Any]]) -> None:
+        self.published += len(entries)
+        for start in range(0, len(entries), MAX_ENTRIES_PER_PUT):
+            batch = entries[start:start + MAX_ENTRIES_PER_PUT]
+            failed = _put_entries(batch)
+            self.delivered += len(batch) - len(failed)
+            self.dropped += len(failed)
+
+    async def flush(self) -> None:
+        """
+        Send everything queued so far, retrying as usual. Batches the
+        background task is already sending are waited for too, so on return
+        every event published before the call is delivered or counted in
+        `dropped`.
+        """
+        while self._queue or self._sending:
+            if self._queue:
+                await self._flush_batch()
+            else:
+                await self._idle.wait()
+
+    async def close(self) -> None:
+        """Stop the background flusher and send what is left. Called on shutdown."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        return {
+            "queue_depth": len(self._queue),
+            "published": self.published,
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "flush_latency_ms": {
+                "p50": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+                "p99": round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None,
+                "max": round(latencies[-1] * 1000, 2) if latencies else None,
+            },
+        }
+
+
+# Global publisher instance
+event_publisher = EventPublisher()
 
-# Initialize the boto3 client once
-try:
-    event_client = boto3.client("events")
-    logger.info("Boto3 EventBridge client initialized.")
-except Exception as e:
-    logger.error(f"Failed to initialize Boto3 client: {e}")
-    event_client = None
 
 def fire_event(event_type: str, detail: dict):
     """
-    Fires a custom event to the AWS EventBridge bus.
+    Queues a custom event for the AWS EventBridge bus. Returns immediately;
+    delivery happens in the background (see EventPublisher). A no-op when
+    the change-stream relay emits events.
     """
-    if event_client is None:
-        logger.error("EventBridge client is not initialized. Cannot fire event.")
+    if EVENT_EMISSION == "change_stream":
         return
+    event_publisher.publish(event_type, detail)
 
-    logger.info(f"Firing event to EventBridge: {event_type} with detail: {detail}")
-    
-    try:
-        # We must serialize the detail dictionary into a JSON string
-        event_client.put_events(
-            Entries=[{
-                "Source": "priorityops.api",
-                "DetailType": event_type,
-                "Detail": json.dumps(detail),
-                "EventBusName": EVENT_BUS_NAME
-            }]
-        )
-        logger.info(f"Successfully fired event: {event_type}")
-        
-    except Exception as e:
-        logger.error(f"Failed to put event to EventBridge: {e}")
-        # We log the error but do not fail the main API request
-        pass
\ No newline at end of file
+
+def fire_events(event_type: str, details: list):
+    """
+    Queues one event per detail. Delivery is batched MAX_ENTRIES_PER_PUT
+    entries per PutEvents call in the background. A no-op when the
+    change-stream relay emits events.
+    """
+    if EVENT_EMISSION == "change_stream":
+        return
+    event_publisher.publish_many(event_type, details)
@@ -0,0 +1,58 @@
+# backend/utils/export.py
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List
+
+
+def json_default(o: Any) -> Any:
+    """Serializes the BSON-decoded types that json cannot handle."""
+    if isinstance(o, datetime):
+        return o.isoformat()
+    if isinstance(o, Enum):
+        return o.value
+    return str(o)
+
+
+def _csv_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return ";".join(str(v) for v in value)
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+
+async def ndjson_lines(docs: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """
+    Encodes each document as one line of newline-delimited JSON.
+    """
+    async for doc in docs:
+        yield (json.dumps(doc, default=json_default) + "\n").encode()
+
+
+async def csv_lines(docs: AsyncIterator[Dict[str, Any]], columns: List[str]) -> AsyncIterator[bytes]:
+    """
+    Encodes documents as CSV rows with a header line. List values are
+    joined with ';'.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> bytes:
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(columns)
+    yield flush()
+
+    async for doc in docs:
+        writer.writerow([_csv_value(doc.get(column)) for column in columns])
+        yield flush()
@@ -0,0 +1,209 @@
+# backend/utils/index_audit.py
+"""
+Index audit: explains every registered query shape against a real MongoDB.
+
+    python -m backend.utils.index_audit [--uri URI] [--seed N] [--database NAME]
+
+By default the registered indexes are built in a scratch database seeded
+with synthetic tickets (so the planner has real choices to make), which is
+dropped afterwards. With --database, an existing database is audited as
+is, and indexes present there but missing from the registry are reported.
+
+Flags query shapes whose winning plan contains a COLLSCAN or a blocking
+in-memory SORT, and registered indexes that no shape uses. Exits with
+status 1 if anything is flagged.
+"""
+
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from backend.utils.indexes import INDEXES, QUERY_SHAPES, QueryShape
+
+SCRATCH_DATABASE = "priorityops_index_audit"
+
+# Plan stages that defeat the purpose of an index
+FLAGGED_STAGES = ("COLLSCAN", "SORT")
+
+# Explain sections describing plans the optimizer did not pick
+_REJECTED_KEYS = ("rejectedPlans", "allPlansExecution")
+
+
+def plan_summary(explain: Dict[str, Any]) -> Tuple[List[str], Set[str]]:
+    """
+    Collects the stage names and index names of the winning plan(s) in
+    find or aggregate explain output, classic or slot-based engine.
+    """
+    stages: List[str] = []
+    indexes: Set[str] = set()
+
+    def walk(node: Any) -> None:
+        if isinstance(node, dict):
+            if isinstance(node.get("stage"), str):
+                stages.append(node["stage"])
+            if isinstance(node.get("indexName"), str):
+                indexes.add(node["indexName"])
+            for key, value in node.items():
+                if key not in _REJECTED_KEYS:
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(explain)
+    return stages, indexes
+
+
+def explain_shape(db, shape: QueryShape) -> Dict[str, Any]:
+    if shape.pipeline is not None:
+        return db.command("aggregate", shape.collection, pipeline=shape.pipeline, explain=True)
+    cursor = db[shape.collection].find(shape.filter)
+    if shape.sort:
+        cursor = cursor.sort(shape.sort)
+    return cursor.limit(20).explain()
+
+
+def audit(db) -> Dict[str, Any]:
+    """
+    Explains every registered shape and cross-checks the indexes in `db`
+    against the registry.
+    """
+    shapes = []
+    used: Set[Tuple[str, str]] = set()
+    for shape in QUERY_SHAPES:
+        stages, indexes = plan_summary(explain_shape(db, shape))
+        used.update((shape.collection, name) for name in indexes)
+        problems = [
+            stage for stage in FLAGGED_STAGES
+            if stage in stages and not (stage == "COLLSCAN" and shape.allow_collscan)
+        ]
+        shapes.append({
+            "shape": shape.name,
+            "source": shape.source,
+            "stages": stages,
+            "indexes": sorted(indexes),
+            "problems": problems,
+        })
+
+    registered = {(spec.collection, spec.name) for spec in INDEXES}
+    present = {
+        (collection, info["name"])
+        for collection in {spec.collection for spec in INDEXES}
+        for info in db[collection].list_indexes()
+        if info["name"] != "_id_"
+    }
+
+    return {
+        "shapes": shapes,
+        "unused": sorted(registered - used),
+        "missing": sorted(registered - present),
+        "unregistered": sorted(present - registered),
+    }
+
+
+def seed(db, count: int) -> None:
+    """
+    Insert `count` synthetic tickets spread over the filtered fields, with
+    their counters and a few audit entries each.
+    """
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    words = ["vpn", "outage", "printer", "disk", "password", "email", "laptop", "network", "access", "slow"]
+    docs = []
+    for i in range(count):
+        created = start + timedelta(minutes=i * 7)
+        status = rng.choice(["pending", "open", "in_progress", "resolved", "closed", "Open"])
+        doc = {
+            "title": " ".join(rng.sample(words, 3)),
+            "description": " ".join(rng.choices(words, k=12)),
+            "status": status,
+            "priority": rng.choice(["low", "medium", "high", "critical", "High", "Critical"]),
+            "assignee": rng.choice([None, "alice", "bob", "carol", "dave"]),
+            "department": rng.choice(["IT", "HR", "Finance", "Facilities"]),
+            "created_at": created,
+            "updated_at": created + timedelta(hours=rng.randint(0, 72)),
+        }
+        if status == "closed":
+            doc["closed_at"] = doc["updated_at"]
+        docs.append(doc)
+    for offset in range(0, count, 5000):
+        db.tickets.insert_many(docs[offset:offset + 5000], ordered=False)
+
+    counters: Dict[Tuple, int] = {}
+    for doc in docs:
+        key = (doc["status"], doc["priority"], doc["assignee"])
+        counters[key] = counters.get(key, 0) + 1
+    db.ticket_counters.insert_many([
+        {"status": s, "priority": p, "assignee": a, "count": n} for (s, p, a), n in counters.items()
+    ])
+
+    entries = [
+        {
+            "ticket_id": doc["_id"],
+            "timestamp": doc["created_at"] + timedelta(hours=n),
+            "action": "updated",
+            "field": "status",
+            "new_value": doc["status"],
+        }
+        for doc in docs
+        for n in range(rng.randint(1, 4))
+    ]
+    for offset in range(0, len(entries), 5000):
+        db.ticket_audit.insert_many(entries[offset:offset + 5000], ordered=False)
+
+
+def create_registered_indexes(db) -> None:
+    for spec in INDEXES:
+        db[spec.collection].create_index(spec.keys, **spec.options)
+
+
+def print_report(report: Dict[str, Any]) -> bool:
+    """Prints the report and returns True if anything was flagged."""
+    flagged = False
+    print(f"{'shape':<26} {'plan':<40} index")
+    for row in report["shapes"]:
+        marker = "  <-- " + ", ".join(row["problems"]) if row["problems"] else ""
+        flagged = flagged or bool(row["problems"])
+        plan = " > ".join(dict.fromkeys(row["stages"]))
+        print(f"{row['shape']:<26} {plan[:40]:<40} {', '.join(row['indexes']) or '-'}{marker}")
+
+    for label in ("unused", "missing", "unregistered"):
+        if report[label]:
+            print(f"\n{label} indexes:")
+            for collection, name in report[label]:
+                print(f"  {collection}.{name}")
+    flagged = flagged or bool(report["unused"] or report["missing"])
+    return flagged
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from pymongo import MongoClient
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", default=os.environ.get("MONGODB_TEST_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--database", help="Audit this existing database instead of a seeded scratch one")
+    parser.add_argument("--seed", type=int, default=20000, help="Tickets to seed into the scratch database")
+    args = parser.parse_args(argv)
+
+    client = MongoClient(args.uri, serverSelectionTimeoutMS=2000)
+    try:
+        if args.database:
+            report = audit(client[args.database])
+        else:
+            client.drop_database(SCRATCH_DATABASE)
+            db = client[SCRATCH_DATABASE]
+            create_registered_indexes(db)
+            seed(db, args.seed)
+            report = audit(db)
+            client.drop_database(SCRATCH_DATABASE)
+    finally:
+        client.close()
+
+    return 1 if print_report(report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
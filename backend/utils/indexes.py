@@ -0,0 +1,196 @@
+# backend/utils/indexes.py
+"""
+Index registry: every index the application relies on, next to the query
+shapes it exists to serve.
+
+The versioned migration (`python -m backend.migrations.create_indexes`)
+builds the indexes declared here, and the index audit
+(`python -m backend.utils.index_audit`) explains every query shape against
+a real MongoDB to check that each one is served by an index scan without
+an in-memory sort. When adding a query, register its shape here;
+when adding an index, name the shapes that need it.
+
+Compound indexes follow the equality, sort, range order: equality-matched
+fields first, then the sort key, then range-filtered fields.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+ASCENDING = 1
+DESCENDING = -1
+TEXT = "text"
+
+# Ticket list order (see ticket_service.TICKET_SORT)
+_NEWEST_FIRST = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: List[Tuple[str, Any]]
+    purpose: str
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        """The name MongoDB generates for these keys."""
+        return "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    """
+    A representative query, with sample values, as the application issues
+    it. `filter`/`sort` describe a find; `pipeline` an aggregation.
+    """
+    name: str
+    collection: str
+    source: str
+    filter: Dict[str, Any] = field(default_factory=dict)
+    sort: Optional[List[Tuple[str, Any]]] = None
+    pipeline: Optional[List[Dict[str, Any]]] = None
+    # For collections small enough that a scan is the right plan
+    allow_collscan: bool = False
+
+
+INDEXES: List[IndexSpec] = [
+    # tickets
+    IndexSpec("tickets", list(_NEWEST_FIRST),
+              "Unfiltered listing, keyset pagination, exports and created_at ranges"),
+    IndexSpec("tickets", [("status", ASCENDING), *_NEWEST_FIRST],
+              "Listing by status"),
+    IndexSpec("tickets", [("priority", ASCENDING), *_NEWEST_FIRST],
+              "Listing by priority"),
+    IndexSpec("tickets", [("status", ASCENDING), ("priority", ASCENDING), *_NEWEST_FIRST],
+              "Listing by status and priority"),
+    # Not (assignee, status, ...): with status unconstrained that order
+    # cannot return tickets newest first without a blocking sort. One
+    # assignee's tickets are few enough to filter status during the scan.
+    IndexSpec("tickets", [("assignee", ASCENDING), *_NEWEST_FIRST],
+              "Listing by assignee, optionally narrowed by status"),
+    IndexSpec("tickets", [("department", ASCENDING), *_NEWEST_FIRST],
+              "Exports by department"),
+    IndexSpec("tickets", [("status", ASCENDING), ("priority", ASCENDING), ("updated_at", ASCENDING)],
+              "Escalation agent's SLA breach scan"),
+    IndexSpec("tickets", [("status", ASCENDING), ("closed_at", ASCENDING)],
+              "Resolution-time analytics over closed tickets"),
+    IndexSpec("tickets", [("title", TEXT), ("description", TEXT)],
+              "Full-text search"),
+    IndexSpec("tickets", [("updated_at", DESCENDING)],
+              "Latest change, for list and analytics ETags"),
+
+    # ticket_counters
+    IndexSpec("ticket_counters", [("status", ASCENDING), ("priority", ASCENDING), ("assignee", ASCENDING)],
+              "Summing counters by any prefix of their key"),
+
+    # ticket_audit
+    IndexSpec("ticket_audit", [("ticket_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+              "Paging one ticket's history, newest first"),
+
+    # embedding_cache (looked up by _id); the TTL must match
+    # EMBEDDING_CACHE_TTL_SECONDS in backend/agents/embedding_cache.py
+    IndexSpec("embedding_cache", [("last_used_at", ASCENDING)],
+              "Expiring cached embeddings unused for 30 days",
+              options={"expireAfterSeconds": 30 * 24 * 3600}),
+    # recent_ticket_vectors; the TTL must match RECENT_VECTORS_TTL_SECONDS
+    # in backend/agents/vector_index.py
+    IndexSpec("recent_ticket_vectors", [("added_at", ASCENDING)],
+              "Duplicate detector's recent-vectors window, expiring after 10 minutes",
+              options={"expireAfterSeconds": 600}),
+    # ticket_minhash (see backend/agents/lexical_prefilter.py)
+    IndexSpec("ticket_minhash", [("bands", ASCENDING)],
+              "Lexical prefilter's LSH band lookup"),
+    IndexSpec("ticket_minhash", [("created_at", ASCENDING)],
+              "Expiring MinHash signatures after 30 days",
+              options={"expireAfterSeconds": 30 * 24 * 3600}),
+]
+
+
+# Fixed sample values so explain() output is reproducible
+_SAMPLE_TIME = datetime(2024, 6, 1)
+_SAMPLE_ID = ObjectId("665a5f000000000000000000")
+
+QUERY_SHAPES: List[QueryShape] = [
+    QueryShape("list_recent", "tickets", "TicketService.get_tickets_page",
+               sort=_NEWEST_FIRST),
+    QueryShape("list_keyset", "tickets", "TicketService.get_tickets_page (cursor)",
+               filter={"$or": [
+                   {"created_at": {"$lt": _SAMPLE_TIME}},
+                   {"created_at": _SAMPLE_TIME, "_id": {"$lt": _SAMPLE_ID}},
+               ]},
+               sort=_NEWEST_FIRST),
+    QueryShape("list_by_status", "tickets", "TicketService.get_tickets_page",
+               filter={"status": "open"}, sort=_NEWEST_FIRST),
+    QueryShape("list_by_priority", "tickets", "TicketService.get_tickets_page",
+               filter={"priority": "high"}, sort=_NEWEST_FIRST),
+    QueryShape("list_by_status_priority", "tickets", "TicketService.get_tickets_page",
+               filter={"status": "open", "priority": "high"}, sort=_NEWEST_FIRST),
+    QueryShape("list_by_assignee", "tickets", "TicketService.get_tickets_page",
+               filter={"assignee": "alice"}, sort=_NEWEST_FIRST),
+    QueryShape("list_by_assignee_status", "tickets", "TicketService.get_tickets_page",
+               filter={"assignee": "alice", "status": "open"}, sort=_NEWEST_FIRST),
+    QueryShape("export_by_department", "tickets", "TicketService.iter_tickets",
+               filter={"department": "IT"}, sort=_NEWEST_FIRST),
+    QueryShape("export_created_range", "tickets", "TicketService.iter_tickets",
+               filter={"created_at": {"$gte": datetime(2024, 5, 1), "$lt": _SAMPLE_TIME}},
+               sort=_NEWEST_FIRST),
+    QueryShape("escalation_breached", "tickets", "agent_db.find_breached",
+               filter={
+                   "status": {"$in": ["Open"]},
+                   "priority": {"$in": ["High", "Critical"]},
+                   "updated_at": {"$lt": _SAMPLE_TIME},
+               }),
+    QueryShape("analytics_trend", "tickets", "AnalyticsService.get_trend_data",
+               pipeline=[
+                   {"$match": {"created_at": {"$gte": datetime(2024, 5, 1), "$lte": _SAMPLE_TIME}}},
+                   {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                               "created": {"$sum": 1}}},
+               ]),
+    QueryShape("analytics_performance", "tickets", "AnalyticsService.get_performance_metrics",
+               pipeline=[
+                   {"$match": {"status": "closed", "closed_at": {"$exists": True}}},
+                   {"$group": {"_id": None, "total_resolved": {"$sum": 1}}},
+               ]),
+    QueryShape("search_text", "tickets", "TicketService.search_tickets",
+               pipeline=[
+                   {"$match": {"status": "open", "$text": {"$search": "vpn outage"}}},
+                   {"$project": {"title": 1, "score": {"$meta": "textScore"}}},
+               ]),
+    QueryShape("generation_latest_update", "tickets", "TicketService.get_generation",
+               sort=[("updated_at", DESCENDING)]),
+    QueryShape("counters_by_status", "ticket_counters", "CounterService.get_count",
+               pipeline=[
+                   {"$match": {"status": "open"}},
+                   {"$group": {"_id": None, "total": {"$sum": "$count"}}},
+               ]),
+    QueryShape("counters_by_assignee", "ticket_counters", "CounterService.get_count",
+               pipeline=[
+                   {"$match": {"assignee": "alice"}},
+                   {"$group": {"_id": None, "total": {"$sum": "$count"}}},
+               ],
+               # One document per (status, priority, assignee): a scan is cheap
+               allow_collscan=True),
+    QueryShape("audit_by_ticket", "ticket_audit", "AuditService.get_entries",
+               filter={"ticket_id": _SAMPLE_ID},
+               sort=[("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    QueryShape("audit_by_ticket_keyset", "ticket_audit", "AuditService.get_entries (cursor)",
+               filter={"ticket_id": _SAMPLE_ID, "$or": [
+                   {"timestamp": {"$lt": _SAMPLE_TIME}},
+                   {"timestamp": _SAMPLE_TIME, "_id": {"$lt": _SAMPLE_ID}},
+               ]},
+               sort=[("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    QueryShape("embedding_cache_stale", "embedding_cache", "EmbeddingCache.evict_stale",
+               filter={"last_used_at": {"$lt": _SAMPLE_TIME}}),
+    QueryShape("embedding_cache_by_model", "embedding_cache", "EmbeddingCache.evict_model",
+               filter={"model_id": "amazon.titan-embed-text-v1"},
+               # Only run by hand after a model change
+               allow_collscan=True),
+    QueryShape("recent_ticket_vectors_window", "recent_ticket_vectors", "RecentVectorBuffer.search",
+               filter={"added_at": {"$gte": _SAMPLE_TIME}}, sort=[("added_at", DESCENDING)]),
+    QueryShape("ticket_minhash_candidates", "ticket_minhash", "MongoLexicalIndex.candidates",
+               filter={"bands": {"$in": ["0:5f3a9c2e1b7d4a60", "1:0c8e7b2a94f1d356"]}}),
+]
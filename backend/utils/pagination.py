@@ -0,0 +1,93 @@
+# backend/utils/pagination.py
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def _encode(payload: Dict[str, Any]) -> str:
+    data = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> Dict[str, Any]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if not isinstance(payload, dict):
+        raise ValueError("Cursor payload is not an object")
+    return payload
+
+
+def encode_cursor(created_at: datetime, ticket_id: str) -> str:
+    """
+    Encodes a (created_at, _id) position into an opaque, URL-safe cursor.
+    """
+    return _encode({"c": created_at.isoformat(), "i": str(ticket_id)})
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """
+    Decodes a cursor produced by encode_cursor.
+
+    Raises InvalidCursorError if the cursor is malformed.
+    """
+    try:
+        payload = _decode(cursor)
+        return datetime.fromisoformat(payload["c"]), ObjectId(payload["i"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+def encode_score_cursor(score: float, ticket_id: str) -> str:
+    """
+    Encodes a (score, _id) position in a relevance-ranked result set.
+    """
+    return _encode({"s": score, "i": str(ticket_id)})
+
+
+def decode_score_cursor(cursor: str) -> Tuple[float, ObjectId]:
+    """
+    Decodes a cursor produced by encode_score_cursor.
+
+    Raises InvalidCursorError if the cursor is malformed.
+    """
+    try:
+        payload = _decode(cursor)
+        if isinstance(payload["s"], bool) or not isinstance(payload["s"], (int, float)):
+            raise TypeError("Score must be a number")
+        return float(payload["s"]), ObjectId(payload["i"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_filter(created_at: datetime, obj_id: ObjectId, field: str = "created_at") -> Dict[str, Any]:
+    """
+    Builds the range predicate for everything strictly after a cursor
+    position in (`field` DESC, _id DESC) order.
+    """
+    return {
+        "$or": [
+            {field: {"$lt": created_at}},
+            {field: created_at, "_id": {"$lt": obj_id}},
+        ]
+    }
+
+
+def score_keyset_filter(score: float, obj_id: ObjectId, field: str = "score") -> Dict[str, Any]:
+    """
+    Builds the predicate for everything strictly after a cursor position in
+    (score DESC, _id DESC) order, where `field` holds the computed score.
+    """
+    return {
+        "$or": [
+            {field: {"$lt": score}},
+            {field: score, "_id": {"$lt": obj_id}},
+        ]
+    }
@@ -0,0 +1,81 @@
+# backend/utils/search.py
+import html
+import re
+from typing import List, Optional
+
+# Suffixes dropped before prefix-matching a search term, a rough stand-in
+# for the stemming MongoDB applies to text queries
+_SUFFIXES = ("ing", "ed", "es", "s")
+
+_TOKEN = re.compile(r'-?"[^"]*"|\S+')
+
+
+def _stem(term: str) -> str:
+    for suffix in _SUFFIXES:
+        if term.endswith(suffix) and len(term) - len(suffix) >= 3:
+            return term[:-len(suffix)]
+    return term
+
+
+def search_pattern(query: str) -> Optional[re.Pattern]:
+    """
+    Builds a case-insensitive pattern matching the words a `$text` query
+    would match: quoted phrases verbatim, other terms by stemmed prefix.
+    Negated terms (`-term`) are ignored. Returns None if nothing remains.
+    """
+    parts: List[str] = []
+    for token in _TOKEN.findall(query):
+        if token.startswith("-"):
+            continue
+        if token.startswith('"'):
+            phrase = token.strip('"').strip()
+            if phrase:
+                parts.append(r"\s+".join(re.escape(word) for word in phrase.split()))
+            continue
+        word = re.sub(r"\W+", "", token.lower())
+        if word:
+            parts.append(re.escape(_stem(word)) + r"\w*")
+
+    if not parts:
+        return None
+    # Longest alternatives first so phrases win over their own words
+    parts.sort(key=len, reverse=True)
+    return re.compile(r"\b(?:" + "|".join(parts) + r")", re.IGNORECASE)
+
+
+def highlight(text: Optional[str], pattern: Optional[re.Pattern], max_length: Optional[int] = None) -> Optional[str]:
+    """
+    HTML-escapes `text` and wraps every match in <mark> tags.
+
+    With `max_length`, returns a window of roughly that many characters
+    around the first match, with an ellipsis where text was cut. Returns
+    None when nothing in the text matches.
+    """
+    if not text or pattern is None:
+        return None
+    first = pattern.search(text)
+    if first is None:
+        return None
+
+    start, end = 0, len(text)
+    if max_length is not None and len(text) > max_length:
+        start = max(0, first.start() - max_length // 3)
+        end = min(len(text), start + max_length)
+        start = max(0, end - max_length)
+        # Do not cut words in half
+        if start > 0:
+            space = text.find(" ", start)
+            start = space + 1 if 0 <= space < first.start() else start
+        if end < len(text):
+            space = text.rfind(" ", first.end(), end)
+            end = space if space > 0 else end
+
+    window = text[start:end]
+    pieces, position = [], 0
+    for match in pattern.finditer(window):
+        pieces.append(html.escape(window[position:match.start()]))
+        pieces.append(f"<mark>{html.escape(match.group())}</mark>")
+        position = match.end()
+    pieces.append(html.escape(window[position:]))
+
+    return ("…" if start > 0 else "") + "".join(pieces) + ("…" if end < len(text) else "")
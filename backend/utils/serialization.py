@@ -0,0 +1,56 @@
+# backend/utils/serialization.py
+from typing import Any, Dict, List, Optional
+
+import orjson
+from bson import ObjectId
+from fastapi import Response
+from pydantic import BaseModel
+
+from backend.models.ticket import Ticket
+
+# Defaults for ticket fields a stored document may lack
+_TICKET_DEFAULTS = {
+    name: field.get_default(call_default_factory=True)
+    for name, field in Ticket.model_fields.items()
+    if name != "id"
+}
+
+
+def _default(o: Any) -> Any:
+    """Serializes the BSON-decoded types orjson cannot handle."""
+    if isinstance(o, ObjectId):
+        return str(o)
+    raise TypeError(f"Type is not JSON serializable: {type(o).__name__}")
+
+
+def ticket_dict(doc: Dict[str, Any], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Maps a ticket document straight to its response dict, without model
+    validation. With `fields`, only those the document has are included,
+    as TicketSummary with exclude_unset would; otherwise every Ticket field
+    is, with defaults for missing ones.
+    """
+    out = {"id": str(doc["_id"])}
+    if fields is None:
+        for name, default in _TICKET_DEFAULTS.items():
+            out[name] = doc.get(name, default)
+    else:
+        for name in fields:
+            if name in doc:
+                out[name] = doc[name]
+    return out
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered with orjson, or with pydantic's serializer for a
+    model. Returning it from a route bypasses FastAPI's response_model
+    validation and jsonable_encoder, so only use it for content built from
+    documents this service wrote.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return orjson.dumps(content, default=_default)
@@ -0,0 +1 @@
+"""Long-running workers that run alongside the API."""
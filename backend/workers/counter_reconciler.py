@@ -0,0 +1,61 @@
+# backend/workers/counter_reconciler.py
+"""
+Counter reconciler: recomputes the `ticket_counters` documents from the
+tickets collection, correcting drift from writes made outside the API.
+
+    python -m backend.workers.counter_reconciler              # once, for a scheduled job
+    python -m backend.workers.counter_reconciler --interval 900
+
+A long-running API server reconciles on its own every
+COUNTER_RECONCILE_INTERVAL_MINUTES. On Lambda the API's lifespan runs per
+invocation, so it does not; run this module from a scheduled job instead,
+or call `lambda_handler` from a scheduled rule.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from typing import List, Optional
+
+from backend.services.counter_service import counter_service
+from backend.utils.database import connect_to_mongo, close_mongo_connection
+
+logger = logging.getLogger(__name__)
+
+
+async def reconcile_once() -> int:
+    await connect_to_mongo()
+    try:
+        return await counter_service.reconcile()
+    finally:
+        await close_mongo_connection()
+
+
+def lambda_handler(event, context):
+    """Entry point for a scheduled rule."""
+    return {"corrected": asyncio.run(reconcile_once())}
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interval", type=float, help="Keep running, reconciling every INTERVAL seconds")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=os.environ.get("LOG_LEVEL", "INFO"),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    if args.interval is None:
+        logger.info(f"Corrected {await reconcile_once()} ticket counter(s)")
+        return
+
+    await connect_to_mongo()
+    try:
+        await counter_service.run_periodic_reconciliation(args.interval)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
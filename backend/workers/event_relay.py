@@ -0,0 +1,202 @@
+# backend/workers/event_relay.py
+"""
+Event relay: tails the `tickets` change stream and publishes
+ticket.created / ticket.updated / ticket.deleted events to EventBridge.
+
+    EVENT_EMISSION=change_stream python -m backend.workers.event_relay
+
+Because events come from the database's own log of committed writes, a
+write cannot be lost between the database and the bus, API writes are a
+single step, and writes made by the Lambda agents produce events too. Set
+EVENT_EMISSION=change_stream on the API as well so it stops publishing
+inline; otherwise API writes are published twice.
+
+Delivery is at least once. After each batch is accepted by EventBridge
+the change stream's resume token is saved in `event_relay_checkpoints`,
+and a restarted relay resumes after it. Run a single relay per
+deployment. Change streams require a replica set (a single-node one is
+enough locally).
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo.errors import OperationFailure
+
+from backend.models.ticket import EventTypes
+from backend.utils.database import connect_to_mongo, get_database, close_mongo_connection
+from backend.utils.events import EventPublisher
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_COLLECTION = "event_relay_checkpoints"
+
+# Changes per published batch (EventBridge calls are 10 entries each)
+RELAY_BATCH_SIZE = int(os.environ.get("EVENT_RELAY_BATCH_SIZE", "100"))
+
+# How long the server waits for new changes before returning a short batch
+RELAY_MAX_AWAIT_MS = int(os.environ.get("EVENT_RELAY_MAX_AWAIT_MS", "1000"))
+
+# Server error code for a resume token that has fallen off the oplog
+CHANGE_STREAM_HISTORY_LOST = 286
+
+_OPERATIONS = {
+    "insert": EventTypes.TICKET_CREATED,
+    "update": EventTypes.TICKET_UPDATED,
+    "replace": EventTypes.TICKET_UPDATED,
+    "delete": EventTypes.TICKET_DELETED,
+}
+
+# Only the fields event details are built from are shipped by the server
+PIPELINE = [
+    {"$match": {"operationType": {"$in": list(_OPERATIONS)}}},
+    {"$project": {
+        "operationType": 1,
+        "documentKey": 1,
+        "updateDescription.updatedFields": 1,
+        "fullDocument.status": 1,
+        "fullDocument.priority": 1,
+    }},
+]
+
+
+class RelayDeliveryError(Exception):
+    """Raised when a batch could not be delivered; the checkpoint is not advanced."""
+
+
+def change_to_event(change: Dict[str, Any]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Maps a change stream document to the (event type, detail) TicketService
+    publishes for the same write. Returns None for other operations.
+    """
+    event_type = _OPERATIONS.get(change.get("operationType"))
+    if event_type is None:
+        return None
+
+    detail: Dict[str, Any] = {"ticket_id": str(change["documentKey"]["_id"])}
+    if event_type == EventTypes.TICKET_UPDATED:
+        full_document = change.get("fullDocument") or {}
+        detail["changes"] = (change.get("updateDescription") or {}).get("updatedFields", {})
+        detail["status"] = full_document.get("status")
+        detail["priority"] = full_document.get("priority")
+    return event_type, detail
+
+
+class EventRelay:
+    """Relays ticket changes to EventBridge from a resume-token checkpoint."""
+
+    def __init__(
+        self,
+        name: str = "tickets",
+        publisher: Optional[EventPublisher] = None,
+        batch_size: int = RELAY_BATCH_SIZE,
+        max_await_ms: int = RELAY_MAX_AWAIT_MS
+    ):
+        self.name = name
+        self.publisher = publisher or EventPublisher()
+        self.batch_size = batch_size
+        self.max_await_ms = max_await_ms
+        self.relayed = 0
+
+    async def load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        db = await get_database()
+        doc = await db[CHECKPOINT_COLLECTION].find_one({"_id": self.name})
+        return doc["resume_token"] if doc else None
+
+    async def save_checkpoint(self, resume_token: Dict[str, Any]) -> None:
+        db = await get_database()
+        await db[CHECKPOINT_COLLECTION].update_one(
+            {"_id": self.name},
+            {"$set": {"resume_token": resume_token, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+    async def publish_batch(self, changes: List[Dict[str, Any]]) -> None:
+        """
+        Publish a batch, in change order, and wait until EventBridge has
+        accepted all of it.
+        """
+        events = [event for event in map(change_to_event, changes) if event is not None]
+
+        dropped_before = self.publisher.dropped
+        for event_type, detail in events:
+            self.publisher.publish(event_type, detail)
+        await self.publisher.flush()
+        if self.publisher.dropped != dropped_before:
+            raise RelayDeliveryError(f"{self.publisher.dropped - dropped_before} event(s) were not delivered")
+
+        self.relayed += len(events)
+
+    async def _open_stream(self, resume_token: Optional[Dict[str, Any]]):
+        db = await get_database()
+        return db.tickets.watch(
+            PIPELINE,
+            full_document="updateLookup",
+            resume_after=resume_token,
+            max_await_time_ms=self.max_await_ms
+        )
+
+    async def _relay(self, resume_token: Optional[Dict[str, Any]], stop: asyncio.Event) -> Optional[Dict[str, Any]]:
+        """Relay from one change stream until `stop`; returns the last saved token."""
+        async with await self._open_stream(resume_token) as stream:
+            while not stop.is_set():
+                batch: List[Dict[str, Any]] = []
+                while len(batch) < self.batch_size:
+                    change = await stream.try_next()
+                    if change is None:
+                        break
+                    batch.append(change)
+
+                if batch:
+                    await self.publish_batch(batch)
+                # The post-batch token also advances past filtered-out
+                # changes, so an idle relay does not age off the oplog
+                if stream.resume_token is not None and stream.resume_token != resume_token:
+                    resume_token = stream.resume_token
+                    await self.save_checkpoint(resume_token)
+        return resume_token
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Relay changes until `stop` is set (or forever)."""
+        stop = stop or asyncio.Event()
+        resume_token = await self.load_checkpoint()
+        logger.info(f"Event relay '{self.name}' starting {'from checkpoint' if resume_token else 'at the current time'}")
+
+        while not stop.is_set():
+            try:
+                resume_token = await self._relay(resume_token, stop)
+            except OperationFailure as e:
+                if e.code != CHANGE_STREAM_HISTORY_LOST:
+                    raise
+                # The oplog no longer reaches back to the checkpoint: the
+                # changes in between cannot be recovered from the stream
+                logger.error(f"Event relay checkpoint is no longer in the oplog; restarting from now: {e}")
+                resume_token = None
+
+        await self.publisher.close()
+
+
+async def main() -> None:
+    logging.basicConfig(
+        level=os.environ.get("LOG_LEVEL", "INFO"),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    await connect_to_mongo()
+    relay = EventRelay()
+    try:
+        while True:
+            try:
+                await relay.run()
+            except RelayDeliveryError as e:
+                # Resume from the last checkpoint so the batch is retried
+                logger.error(f"{e}; retrying from the last checkpoint")
+                await asyncio.sleep(5)
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -18,6 +18,7 @@ export const useTickets = (params?: {
   status?: Status;
   priority?: Priority;
   assignee?: string;
+  fields?: string[];
 }) => {
   return useQuery({
     queryKey: ticketKeys.list(params || {}),
@@ -2,7 +2,7 @@ import { useState } from "react";
 import Navbar from "@/components/Navbar";
 import Sidebar from "@/components/Sidebar";
 import { mockTickets, LegacyTicket } from "@/data/mockTickets";
-import { Ticket } from "@/types/api";
+import { TicketSummary } from "@/types/api";
 import { useTickets } from "@/hooks/useTickets";
 import { Button } from "@/components/ui/button";
 import {
@@ -30,15 +30,17 @@ const Tickets = () => {
   // Use real API data when available, fallback to mock data
   const { data: ticketsData, isLoading, error } = useTickets({
     page: 1,
-    per_page: 50
+    per_page: 50,
+    // The detail panel shows the description, which is not a summary column
+    fields: ['title', 'description', 'priority', 'status', 'assignee', 'department', 'created_at']
   });
   
   // Convert API tickets to legacy format for display compatibility
-  const displayTickets = ticketsData?.tickets?.map((ticket: Ticket): LegacyTicket => ({
+  const displayTickets = ticketsData?.tickets?.map((ticket: TicketSummary): LegacyTicket => ({
     id: ticket.id,
-    title: ticket.title,
-    description: ticket.description,
-    priority: ticket.priority,
+    title: ticket.title ?? '',
+    description: ticket.description ?? '',
+    priority: ticket.priority ?? 'medium',
     status: ticket.status === 'in_progress' ? 'in-progress' : 
             ticket.status === 'closed' ? 'resolved' : 
             ticket.status as "open" | "in-progress" | "pending" | "resolved" | "escalated",
@@ -47,7 +49,7 @@ const Tickets = () => {
       avatar: ticket.assignee ? ticket.assignee.substring(0, 2).toUpperCase() : 'UN'
     },
     department: ticket.department || 'Unknown',
-    createdAt: new Date(ticket.created_at).toLocaleString(),
+    createdAt: ticket.created_at ? new Date(ticket.created_at).toLocaleString() : '',
     sla: '4h 30m', // TODO: Calculate actual SLA
     aiSuggestion: undefined
   })) || mockTickets;
@@ -6,6 +6,7 @@ import {
   TicketCreate, 
   TicketUpdate, 
   TicketListResponse,
+  TicketSearchResponse,
   TicketStats,
   PriorityDistribution,
   TrendData,
@@ -46,6 +47,7 @@ export const api = {
       status?: Status;
       priority?: Priority;
       assignee?: string;
+      fields?: string[];
     }): Promise<TicketListResponse> => {
       const searchParams = new URLSearchParams();
       if (params?.page) searchParams.set('page', params.page.toString());
@@ -53,11 +55,31 @@ export const api = {
       if (params?.status) searchParams.set('status', params.status);
       if (params?.priority) searchParams.set('priority', params.priority);
       if (params?.assignee) searchParams.set('assignee', params.assignee);
+      if (params?.fields) searchParams.set('fields', params.fields.join(','));
 
       const query = searchParams.toString();
       return fetchWithConfig(`/tickets${query ? `?${query}` : ''}`);
     },
 
+    // Full-text search, best match first
+    search: async (params: {
+      q: string;
+      per_page?: number;
+      cursor?: string;
+      status?: Status;
+      priority?: Priority;
+      assignee?: string;
+    }): Promise<TicketSearchResponse> => {
+      const searchParams = new URLSearchParams({ q: params.q });
+      if (params.per_page) searchParams.set('per_page', params.per_page.toString());
+      if (params.cursor) searchParams.set('cursor', params.cursor);
+      if (params.status) searchParams.set('status', params.status);
+      if (params.priority) searchParams.set('priority', params.priority);
+      if (params.assignee) searchParams.set('assignee', params.assignee);
+
+      return fetchWithConfig(`/tickets/search?${searchParams.toString()}`);
+    },
+
     // Get single ticket by ID
     getById: async (id: string): Promise<Ticket> => {
       return fetchWithConfig(`/tickets/${id}`);
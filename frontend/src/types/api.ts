@@ -34,12 +34,29 @@ export interface TicketUpdate {
   assignee?: string;
 }
 
+// A listed ticket: the summary columns by default, or the fields asked for
+// with `fields`; anything not projected is absent
+export type TicketSummary = Pick<Ticket, "id"> & Partial<Omit<Ticket, "id">>;
+
 export interface TicketListResponse {
-  tickets: Ticket[];
+  tickets: TicketSummary[];
   total: number;
   page: number;
   per_page: number;
   total_pages: number;
+  next_cursor?: string | null;
+}
+
+export interface TicketSearchResult {
+  ticket: Ticket;
+  score: number;
+  // HTML-escaped text with matches wrapped in <mark>
+  highlights: { title?: string; description?: string };
+}
+
+export interface TicketSearchResponse {
+  results: TicketSearchResult[];
+  next_cursor?: string | null;
 }
 
 // Analytics Types
@@ -0,0 +1,209 @@
+"""
+Shared fixtures for PriorityOps tests.
+
+`mongo_stand_in` installs an in-memory, Motor-compatible database (backed by
+mongomock) as the backend's database, so service code runs unmodified.
+An optional per-call latency emulates the round trip to a remote cluster,
+and published events are recorded on `db.events` instead of sent.
+
+`local_mongo` connects to a real MongoDB for tests that depend on query
+planner behaviour or features mongomock lacks (such as `$text`);
+`local_mongo_backend` installs it as the backend's database. Both are
+skipped unless MONGODB_TEST_URI is reachable.
+
+`replset_uri` is for change stream tests; it is skipped unless
+MONGODB_REPLSET_URI points at a reachable replica set (a single-node one
+started with `mongod --replSet rs0` and `rs.initiate()` is enough).
+"""
+
+import asyncio
+import os
+import pytest
+
+try:
+    import mongomock
+except ImportError:  # pragma: no cover - optional test dependency
+    mongomock = None
+
+# The agents create their boto3 clients at import time, which needs a region;
+# every AWS call they make is mocked, so any region will do
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+
+class AsyncCursor:
+    """Minimal async wrapper around a mongomock cursor."""
+
+    def __init__(self, cursor, latency: float = 0.0):
+        self._cursor = cursor
+        self._latency = latency
+        self._fetched = False
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, n):
+        self._cursor = self._cursor.skip(n)
+        return self
+
+    def limit(self, n):
+        self._cursor = self._cursor.limit(n)
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    async def _round_trip(self):
+        if not self._fetched:
+            self._fetched = True
+            if self._latency:
+                await asyncio.sleep(self._latency)
+
+    async def to_list(self, length=None):
+        await self._round_trip()
+        docs = list(self._cursor)
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self._round_trip()
+        try:
+            return next(self._cursor)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class AsyncCollection:
+    """Motor-style collection; every awaited call costs one round trip."""
+
+    def __init__(self, collection, stats: dict, latency: float = 0.0):
+        self._collection = collection
+        self._stats = stats
+        self._latency = latency
+
+    @property
+    def sync(self):
+        return self._collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            self._stats["round_trips"] += 1
+            self._stats["calls"].append(name)
+            if self._latency:
+                await asyncio.sleep(self._latency)
+            return attr(*args, **kwargs)
+
+        return call
+
+    def find(self, *args, **kwargs):
+        self._stats["round_trips"] += 1
+        self._stats["calls"].append("find")
+        return AsyncCursor(self._collection.find(*args, **kwargs), self._latency)
+
+    def aggregate(self, *args, **kwargs):
+        self._stats["round_trips"] += 1
+        self._stats["calls"].append("aggregate")
+        return AsyncCursor(iter(self._collection.aggregate(*args, **kwargs)), self._latency)
+
+
+class AsyncDatabase:
+    def __init__(self, latency: float = 0.0, db=None):
+        self._db = db if db is not None else mongomock.MongoClient().db
+        self.latency = latency
+        self.stats = {"round_trips": 0, "calls": []}
+
+    def reset_stats(self):
+        self.stats["round_trips"] = 0
+        self.stats["calls"].clear()
+
+    def __getitem__(self, name):
+        return AsyncCollection(self._db[name], self.stats, self.latency)
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+def _install_database(monkeypatch, db):
+    """Make `db` the backend's database and record events on it."""
+    from backend.utils import database
+    from backend.services import ticket_service as ticket_service_module
+
+    db.events = []
+    monkeypatch.setattr(database, "_database", db)
+    ticket_service_module.ticket_service.cache.clear()
+    monkeypatch.setattr(
+        ticket_service_module, "fire_event",
+        lambda event_type, detail: db.events.append((event_type, [detail]))
+    )
+    monkeypatch.setattr(
+        ticket_service_module, "fire_events",
+        lambda event_type, details: db.events.append((event_type, list(details))) or 0
+    )
+    return db
+
+
+@pytest.fixture
+def mongo_stand_in(monkeypatch):
+    """Install an in-memory database and silence EventBridge."""
+    if mongomock is None:
+        pytest.skip("mongomock is not installed")
+    return _install_database(monkeypatch, AsyncDatabase())
+
+
+@pytest.fixture
+def api_client(mongo_stand_in):
+    """A TestClient for the ticket and analytics routes, backed by the in-memory database."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from backend.routes import tickets, analytics
+
+    app = FastAPI()
+    app.include_router(tickets.router, prefix="/api/v1")
+    app.include_router(analytics.router, prefix="/api/v1")
+    return TestClient(app)
+
+
+@pytest.fixture
+def local_mongo():
+    """A real MongoDB database for planner-sensitive tests and benchmarks."""
+    pymongo = pytest.importorskip("pymongo")
+    uri = os.environ.get("MONGODB_TEST_URI", "mongodb://localhost:27017")
+    client = pymongo.MongoClient(uri, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except Exception:
+        pytest.skip(f"No MongoDB reachable at {uri}")
+    db = client["priorityops_test"]
+    yield db
+    client.drop_database("priorityops_test")
+    client.close()
+
+
+@pytest.fixture
+def local_mongo_backend(local_mongo, monkeypatch):
+    """Service code against a real MongoDB, through the same async adapter."""
+    return _install_database(monkeypatch, AsyncDatabase(db=local_mongo))
+
+
+@pytest.fixture
+def replset_uri():
+    """URI of a replica set test database, dropped afterwards."""
+    pymongo = pytest.importorskip("pymongo")
+    uri = os.environ.get("MONGODB_REPLSET_URI")
+    if not uri:
+        pytest.skip("MONGODB_REPLSET_URI is not set")
+    client = pymongo.MongoClient(uri, serverSelectionTimeoutMS=500)
+    try:
+        client.admin.command("ping")
+    except Exception:
+        client.close()
+        pytest.skip(f"No replica set reachable at {uri}")
+    yield uri
+    client.drop_database("priorityops_test")
+    client.close()
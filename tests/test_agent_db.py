@@ -0,0 +1,280 @@
+"""
+Test suite for the Lambda agents' shared MongoDB access layer.
+
+Secrets Manager is replaced with a fake and the client with mongomock, so
+these run without AWS or MongoDB.
+"""
+
+import json
+import sys
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+from bson import ObjectId
+from pymongo.errors import AutoReconnect
+
+from backend.agents import agent_db, escalation_agent, get_ticket_details, ticket_cache, update_ticket_agent
+
+
+SECRET = {"password": "pw", "connection_string": "mongodb://agent:<password>@db.example:27017"}
+
+
+@pytest.fixture
+def agent_mongo(monkeypatch):
+    """A mongomock-backed agent_db with fresh connection state."""
+    created = []
+    invalidated = []
+
+    def client(uri, **kwargs):
+        created.append((uri, kwargs))
+        return mongomock.MongoClient()
+
+    def get_secret_value(SecretId):
+        return {"SecretString": json.dumps(SECRET)}
+
+    monkeypatch.setattr(agent_db, "MongoClient", client)
+    monkeypatch.setattr("boto3.client", lambda service: type("SM", (), {"get_secret_value": staticmethod(get_secret_value)})())
+    monkeypatch.setattr(agent_db, "invalidate_tickets", lambda *ids: invalidated.extend(ids))
+    monkeypatch.setattr(agent_db, "_client", None)
+    monkeypatch.setattr(agent_db, "_credentials", None)
+    monkeypatch.setattr(agent_db, "_credentials_fetched_at", 0.0)
+    monkeypatch.setattr(agent_db, "_stats", {"secret_fetches": 0, "client_ms": None})
+    return {"created": created, "invalidated": invalidated}
+
+
+def _insert_ticket(**fields):
+    ticket = {"title": "VPN down", "status": "Open", "priority": "High",
+              "updated_at": datetime.utcnow(), **fields}
+    return str(agent_db.get_db()["tickets"].insert_one(ticket).inserted_id)
+
+
+class TestConnection:
+    """Test cases for client reuse and tuning."""
+
+    def test_client_is_created_once_with_tuning(self, agent_mongo):
+        assert agent_db.get_client() is agent_db.get_client()
+        assert len(agent_mongo["created"]) == 1
+
+        uri, options = agent_mongo["created"][0]
+        assert uri == "mongodb://agent:pw@db.example:27017"
+        assert options["maxPoolSize"] == agent_db.MONGO_MAX_POOL_SIZE
+        assert options["retryWrites"] and options["retryReads"]
+        assert options["compressors"] == agent_db.MONGO_COMPRESSORS
+        assert options["event_listeners"] == [agent_db._pool_timer]
+
+    def test_secret_is_cached_until_ttl(self, agent_mongo, monkeypatch):
+        agent_db._get_credentials()
+        agent_db._get_credentials()
+        assert agent_db.connection_stats()["secret_fetches"] == 1
+
+        monkeypatch.setattr(agent_db, "SECRET_CACHE_TTL_SECONDS", 0)
+        agent_db._get_credentials()
+        assert agent_db.connection_stats()["secret_fetches"] == 2
+
+    def test_connection_stats(self, agent_mongo):
+        agent_db.get_client()
+        stats = agent_db.connection_stats()
+        assert stats["client_ms"] is not None
+        assert {"checkouts", "connections_created", "checkout_ms_avg", "checkout_ms_max"} <= set(stats)
+
+
+class TestHelpers:
+    """Test cases for the ticket helpers the agents share."""
+
+    def test_fetch_ticket_excludes_legacy_history(self, agent_mongo):
+        ticket_id = _insert_ticket(audit_trail=[{"action": "old"}])
+
+        ticket = agent_db.fetch_ticket(ticket_id)
+        assert ticket["title"] == "VPN down"
+        assert "audit_trail" not in ticket
+        assert agent_db.fetch_ticket(str(ObjectId())) is None
+
+    def test_apply_agent_update_audits_and_invalidates(self, agent_mongo):
+        ticket_id = _insert_ticket()
+
+        assert agent_db.apply_agent_update(ticket_id, {"status": "Escalated"}, {"agent": "Test"})
+        assert agent_db.fetch_ticket(ticket_id)["status"] == "Escalated"
+        audit = list(agent_db.get_db()["ticket_audit"].find())
+        assert len(audit) == 1
+        assert audit[0]["ticket_id"] == ObjectId(ticket_id)
+        assert audit[0]["agent"] == "Test" and "timestamp" in audit[0]
+        assert agent_mongo["invalidated"] == [ticket_id]
+        generation = agent_db.get_db()["ticket_counters"].find_one({"_id": "generation"})
+        assert generation["seq"] == 1
+
+        # A no-op update leaves no audit entry, the generation and the cache as they were
+        assert not agent_db.apply_agent_update(ticket_id, {"status": "Escalated"}, {"agent": "Test"})
+        assert agent_db.get_db()["ticket_audit"].count_documents({}) == 1
+        assert agent_db.get_db()["ticket_counters"].find_one({"_id": "generation"})["seq"] == 1
+        assert agent_mongo["invalidated"] == [ticket_id]
+
+    def test_invalidation_warns_once_without_redis(self, monkeypatch, caplog):
+        monkeypatch.setattr(ticket_cache, "TICKET_CACHE_REDIS_URL", "redis://cache.example:6379/0")
+        monkeypatch.setattr(ticket_cache, "_redis_client", None)
+        monkeypatch.setattr(ticket_cache, "_redis_missing", False)
+        monkeypatch.setitem(sys.modules, "redis", None)  # Import raises ImportError
+
+        ticket_cache.invalidate_tickets("a")
+        ticket_cache.invalidate_tickets("b")
+
+        warnings = [r for r in caplog.records if "redis package is not installed" in r.message]
+        assert len(warnings) == 1
+
+    def test_find_breached_projects_fields(self, agent_mongo):
+        old = datetime.utcnow() - timedelta(hours=2)
+        breached = _insert_ticket(updated_at=old)
+        _insert_ticket(updated_at=old, priority="Low")
+        _insert_ticket()
+
+        found = list(agent_db.find_breached(datetime.utcnow() - timedelta(hours=1),
+                                            ["Open"], ["High", "Critical"], ["status", "title"]))
+        assert [str(t["_id"]) for t in found] == [breached]
+        assert set(found[0]) == {"_id", "status", "title"}
+
+
+class TestAgents:
+    """Test cases for the agents running against the shared layer."""
+
+    def test_escalation_escalates_breached_tickets(self, agent_mongo, monkeypatch):
+        published = []
+        monkeypatch.setattr(escalation_agent, "SNS_TOPIC_ARN", "arn:aws:sns:us-east-1:0:alerts")
+        monkeypatch.setattr(escalation_agent.sns_client, "publish", lambda **kwargs: published.append(kwargs))
+        ticket_id = _insert_ticket(updated_at=datetime.utcnow() - timedelta(hours=2))
+
+        result = escalation_agent.lambda_handler({}, None)
+
+        assert result["escalated_count"] == 1
+        assert agent_db.fetch_ticket(ticket_id)["status"] == "Escalated"
+        assert len(published) == 1
+        assert agent_db.get_db()["ticket_audit"].count_documents({"ticket_id": ObjectId(ticket_id)}) == 1
+
+    def test_escalation_skips_tickets_changed_since_the_scan(self, agent_mongo, monkeypatch):
+        """A ticket closed after find_breached returned it is neither escalated nor alerted."""
+        published = []
+        monkeypatch.setattr(escalation_agent, "SNS_TOPIC_ARN", "arn:aws:sns:us-east-1:0:alerts")
+        monkeypatch.setattr(escalation_agent.sns_client, "publish", lambda **kwargs: published.append(kwargs))
+        ticket_id = _insert_ticket(updated_at=datetime.utcnow() - timedelta(hours=2))
+
+        def find_then_close(*args, **kwargs):
+            for ticket in list(agent_db.find_breached(*args, **kwargs)):
+                agent_db.get_db()["tickets"].update_one({"_id": ticket["_id"]}, {"$set": {"status": "Closed"}})
+                yield ticket
+
+        monkeypatch.setattr(escalation_agent, "find_breached", find_then_close)
+        result = escalation_agent.lambda_handler({}, None)
+
+        assert result["escalated_count"] == 0
+        assert agent_db.fetch_ticket(ticket_id)["status"] == "Closed"
+        assert published == []
+        assert agent_db.get_db()["ticket_audit"].count_documents({}) == 0
+
+    def test_update_agent_records_history(self, agent_mongo):
+        ticket_id = _insert_ticket()
+
+        update_ticket_agent.lambda_handler({
+            "v": 1,
+            "ticket_id": ticket_id,
+            "duplicate": {"is_duplicate": False},
+            "triage": {"priority": "Critical", "category": "Network"},
+        }, None)
+
+        assert agent_db.fetch_ticket(ticket_id)["priority"] == "Critical"
+        audit = agent_db.get_db()["ticket_audit"].find_one({"ticket_id": ObjectId(ticket_id)})
+        assert audit is not None
+
+
+class TestGetTicketDetailsBatch:
+    """Test cases for fetching tickets in batches."""
+
+    def test_single_ticket_returns_its_payload(self, agent_mongo):
+        ticket_id = _insert_ticket(audit_trail=[{"action": "old"}], attachments=["big.log"])
+
+        payload = get_ticket_details.lambda_handler({"detail": {"ticket_id": ticket_id}}, None)
+
+        assert payload["ticket_id"] == ticket_id
+        assert payload["ticket"]["title"] == "VPN down"
+        assert set(payload) == {"v", "ticket_id", "ticket"}
+
+        with pytest.raises(Exception, match="No ticket found"):
+            get_ticket_details.lambda_handler({"ticket_id": str(ObjectId())}, None)
+
+    def test_batch_uses_one_query_and_reports_failures(self, agent_mongo, monkeypatch):
+        ids = [_insert_ticket(title=f"Ticket {i}") for i in range(3)]
+        missing = str(ObjectId())
+        queries = []
+        fetch = agent_db.fetch_tickets
+        monkeypatch.setattr(get_ticket_details, "fetch_tickets",
+                            lambda *args: queries.append(args) or fetch(*args))
+
+        result = get_ticket_details.lambda_handler({"ticket_ids": [ids[2], missing, "nope", ids[0]]}, None)
+
+        assert len(queries) == 1
+        assert [p["ticket"]["title"] for p in result["payloads"]] == ["Ticket 2", "Ticket 0"]
+        assert result["failed"] == [
+            {"ticket_id": missing, "error": "Ticket not found"},
+            {"ticket_id": "nope", "error": "Invalid ticket ID"},
+        ]
+        assert "batchItemFailures" not in result
+
+    def test_batch_rejects_ids_that_are_not_strings(self, agent_mongo):
+        ticket_id = _insert_ticket()
+
+        result = get_ticket_details.lambda_handler({"Items": [{"title": "no id"}, [ticket_id], ticket_id]}, None)
+
+        assert [p["ticket_id"] for p in result["payloads"]] == [ticket_id]
+        assert result["failed"] == [
+            {"ticket_id": None, "error": "Invalid ticket ID"},
+            {"ticket_id": [ticket_id], "error": "Invalid ticket ID"},
+        ]
+
+    def test_sqs_batch_reports_failed_messages(self, agent_mongo):
+        ticket_id = _insert_ticket()
+        event = {"Records": [
+            {"messageId": "m1", "body": json.dumps({"ticket_id": ticket_id})},
+            {"messageId": "m2", "body": json.dumps({"detail": {"ticket_id": str(ObjectId())}})},
+            {"messageId": "m3", "body": "not json"},
+        ]}
+
+        result = get_ticket_details.lambda_handler(event, None)
+
+        assert [p["ticket_id"] for p in result["payloads"]] == [ticket_id]
+        # Neither would succeed on a retry, so both messages are consumed
+        assert [f["error"] for f in result["failed"]] == ["Ticket not found", "Invalid ticket ID"]
+        assert result["batchItemFailures"] == []
+
+    def test_sqs_batch_retries_database_errors_only(self, agent_mongo, monkeypatch):
+        def unavailable(*args):
+            raise AutoReconnect("connection reset")
+
+        monkeypatch.setattr(get_ticket_details, "fetch_tickets", unavailable)
+        event = {"Records": [
+            {"messageId": "m1", "body": json.dumps({"ticket_id": str(ObjectId())})},
+            {"messageId": "m2", "body": "not json"},
+        ]}
+
+        result = get_ticket_details.lambda_handler(event, None)
+
+        assert result["batchItemFailures"] == [{"itemIdentifier": "m1"}]
+        assert [f["error"] for f in result["failed"]] == ["Database unavailable", "Invalid ticket ID"]
+
+        # Outside SQS the invocation fails so the workflow retries it
+        with pytest.raises(Exception, match="Database unavailable"):
+            get_ticket_details.lambda_handler({"ticket_ids": [str(ObjectId())]}, None)
+
+    def test_map_batch_items(self, agent_mongo):
+        ids = [_insert_ticket(), _insert_ticket()]
+
+        result = get_ticket_details.lambda_handler({"Items": [ids[0], {"ticket_id": ids[1]}]}, None)
+
+        assert [p["ticket_id"] for p in result["payloads"]] == ids
+        assert result["failed"] == []
+
+    def test_to_json_safe_converts_nested_bson(self):
+        oid = ObjectId()
+        when = datetime(2024, 6, 1, 12, 0)
+        doc = {"_id": oid, "tags": [oid, {"at": when}], "n": 1}
+
+        assert get_ticket_details.to_json_safe(doc) == {
+            "_id": str(oid), "tags": [str(oid), {"at": when.isoformat()}], "n": 1
+        }
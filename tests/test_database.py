@@ -0,0 +1,119 @@
+"""
+Test suite for the database bootstrap and the cold-start report.
+
+Secrets Manager and the Mongo client are replaced with fakes, so these
+run without AWS or MongoDB.
+"""
+
+import asyncio
+import time
+import pytest
+
+from backend.utils import database
+from backend.utils.coldstart import ColdStartTimer
+
+
+SECRET = {"username": "api", "password": "pw", "connection_string": "mongodb://api:<password>@db.example:27017"}
+
+
+class FakeClient:
+    """Records how it was created; subscripting returns a placeholder database."""
+
+    created = []
+
+    def __init__(self, uri, **kwargs):
+        self.uri = uri
+        self.closed = False
+        FakeClient.created.append(self)
+
+    def __getitem__(self, name):
+        return f"db:{name}"
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def bootstrap(monkeypatch):
+    """Reset the module's connection state and count secret fetches."""
+    fetches = []
+
+    def fetch_secret():
+        fetches.append(time.monotonic())
+        time.sleep(0.02)  # Emulated Secrets Manager round trip
+        return dict(SECRET)
+
+    FakeClient.created = []
+    monkeypatch.setattr(database, "_fetch_secret", fetch_secret)
+    monkeypatch.setattr(database, "AsyncIOMotorClient", FakeClient)
+    for name, value in [("_mongo_client", None), ("_database", None), ("_connecting", None),
+                        ("_credentials", None), ("_credentials_fetched_at", 0.0)]:
+        monkeypatch.setattr(database, name, value)
+    return fetches
+
+
+class TestBootstrap:
+    """Test cases for secret caching and lazy connection."""
+
+    def test_secret_is_cached_until_ttl(self, bootstrap, monkeypatch):
+        async def main():
+            await database.get_credentials()
+            await database.get_credentials()
+            monkeypatch.setattr(database, "SECRET_CACHE_TTL_SECONDS", 0)
+            await database.get_credentials()
+        asyncio.run(main())
+
+        assert len(bootstrap) == 2
+
+    def test_lazy_connection_is_shared(self, bootstrap):
+        """Startup does not wait; concurrent first calls share one connection."""
+        async def main():
+            started = time.perf_counter()
+            database.start_mongo_connection()
+            startup = time.perf_counter() - started
+            dbs = await asyncio.gather(*(database.get_database() for _ in range(5)))
+            return startup, dbs
+        startup, dbs = asyncio.run(main())
+
+        assert startup < 0.01
+        assert dbs == [f"db:{database.DB_NAME}"] * 5
+        assert len(bootstrap) == 1 and len(FakeClient.created) == 1
+        assert FakeClient.created[0].uri == "mongodb://api:pw@db.example:27017"
+
+    def test_reconnect_reuses_cached_secret(self, bootstrap):
+        async def main():
+            await database.connect_to_mongo(ping=False)
+            await database.close_mongo_connection()
+            await database.connect_to_mongo(ping=False)
+        asyncio.run(main())
+
+        assert len(bootstrap) == 1 and len(FakeClient.created) == 2
+        assert FakeClient.created[0].closed
+
+
+class TestColdStartTimer:
+    """Test cases for the cold-start phase report."""
+
+    def test_reports_phases_in_start_order(self):
+        timer = ColdStartTimer(origin=100.0)
+        timer.record("startup", 100.5, 100.75)
+        timer.record("imports", 100.0, 100.5)
+        timer.ready()
+
+        report = timer.report()
+        assert list(report["phases"]) == ["imports", "startup"]
+        assert report["phases"]["startup"] == {"start_ms": 500.0, "duration_ms": 250.0}
+        assert report["ready_ms"] is not None
+
+    def test_only_the_first_start_is_recorded(self):
+        timer = ColdStartTimer()
+        with timer.phase("secret"):
+            pass
+        timer.ready()
+        with timer.phase("secret"):
+            time.sleep(0.01)
+        with timer.phase("warm_only"):
+            pass
+
+        assert list(timer.report()["phases"]) == ["secret"]
+        assert timer.report()["phases"]["secret"]["duration_ms"] < 10
@@ -0,0 +1,128 @@
+"""
+Test suite for the duplicate detector's embedding cache.
+
+The Mongo tier is a mongomock collection and Bedrock/OpenSearch are
+mocked, so these run without AWS or MongoDB.
+"""
+
+import json
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import mongomock
+import pytest
+
+from backend.agents import duplicate_detector
+from backend.agents.embedding_cache import EmbeddingCache, cache_key
+
+MODEL = "amazon.titan-embed-text-v1"
+
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient().db.embedding_cache
+
+
+@pytest.fixture
+def cache(collection):
+    return EmbeddingCache(lambda: collection, local_size=2)
+
+
+def embedder(calls):
+    def compute(text):
+        calls.append(text)
+        return [float(len(text)), 1.0]
+    return compute
+
+
+class TestEmbeddingCache:
+    """Test cases for the two cache tiers."""
+
+    def test_miss_then_local_then_shared_hit(self, cache, collection):
+        calls = []
+        vector = cache.get_or_compute("VPN down", MODEL, embedder(calls))
+        assert cache.get_or_compute("VPN down", MODEL, embedder(calls)) == vector
+        assert calls == ["VPN down"]
+        assert collection.find_one({"_id": cache_key(MODEL, "VPN down")})["vector"] == vector
+
+        # Another container: empty local tier, same collection
+        other = EmbeddingCache(lambda: collection)
+        assert other.get_or_compute("VPN down", MODEL, embedder(calls)) == vector
+        assert calls == ["VPN down"]
+
+        assert cache.stats()["local_hits"] == 1 and cache.stats()["misses"] == 1
+        assert other.stats()["db_hits"] == 1 and other.stats()["hit_rate"] == 1.0
+
+    def test_key_normalizes_text_and_includes_model(self):
+        assert cache_key(MODEL, "VPN   down\n") == cache_key(MODEL, " VPN down")
+        assert cache_key(MODEL, "ＶＰＮ down") == cache_key(MODEL, "VPN down")  # NFKC
+        assert cache_key(MODEL, "VPN down") != cache_key(MODEL, "vpn down")
+        assert cache_key(MODEL, "VPN down") != cache_key("other-model", "VPN down")
+
+    def test_local_tier_is_bounded(self, cache):
+        for text in ("a", "b", "c"):
+            cache.get_or_compute(text, MODEL, embedder([]))
+        assert cache.stats()["local_entries"] == 2
+
+    def test_eviction(self, cache, collection):
+        for text in ("a", "b"):
+            cache.get_or_compute(text, MODEL, embedder([]))
+
+        cache.evict("a", MODEL)
+        calls = []
+        cache.get_or_compute("a", MODEL, embedder(calls))
+        assert calls == ["a"]
+
+        collection.update_one({"_id": cache_key(MODEL, "b")},
+                              {"$set": {"last_used_at": datetime.utcnow() - timedelta(days=40)}})
+        assert cache.evict_stale() == 1
+        assert cache.evict_model(MODEL) == 1
+        assert collection.count_documents({}) == 0
+
+    def test_unavailable_collection_falls_back_to_local(self):
+        def broken():
+            raise ConnectionError("no route to cluster")
+
+        cache = EmbeddingCache(broken)
+        calls = []
+        cache.get_or_compute("a", MODEL, embedder(calls))
+        cache.get_or_compute("a", MODEL, embedder(calls))
+        assert calls == ["a"]
+
+    def test_failed_embeddings_are_not_cached(self, cache, collection):
+        assert cache.get_or_compute("a", MODEL, lambda text: None) is None
+        assert collection.count_documents({}) == 0
+        assert cache.stats()["local_entries"] == 0
+
+    def test_saved_latency_uses_measured_compute_time(self, cache):
+        cache.get_or_compute("a", MODEL, embedder([]))
+        cache.reset_stats()
+        cache.get_or_compute("a", MODEL, embedder([]))
+
+        stats = cache.stats()
+        assert stats["misses"] == 0 and stats["local_hits"] == 1
+        assert stats["saved_ms"] >= 0
+
+
+class TestDuplicateDetectorCache:
+    """The detector only calls Bedrock for text it has not embedded."""
+
+    def test_rerun_skips_bedrock(self, cache, monkeypatch):
+        bedrock = Mock()
+        bedrock.invoke_model.side_effect = lambda **kwargs: {
+            "body": Mock(read=lambda: json.dumps({"embedding": [0.1, 0.2, 0.3]}).encode())
+        }
+        opensearch = Mock()
+        opensearch.search.return_value = {"hits": {"hits": []}}
+        monkeypatch.setattr(duplicate_detector, "bedrock_runtime", bedrock)
+        monkeypatch.setattr(duplicate_detector, "get_opensearch_client", lambda: opensearch)
+        monkeypatch.setattr(duplicate_detector, "embedding_cache", cache)
+
+        event = {"v": 1, "ticket_id": "665a5f000000000000000001",
+                 "ticket": {"title": "Disk full", "description": "/var is at 100%"}}
+        first = duplicate_detector.lambda_handler(event, None)
+        second = duplicate_detector.lambda_handler(event, None)
+
+        assert first == second
+        assert bedrock.invoke_model.call_count == 1
+        assert cache.stats()["hit_rate"] == 1.0
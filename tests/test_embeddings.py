@@ -0,0 +1,132 @@
+"""
+Test suite for the embedding providers.
+
+The sentence-transformers model is replaced by a stub with the same
+`encode` signature, and Bedrock by a stub client with a fixed round trip.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from backend.agents import duplicate_detector
+from backend.agents.embeddings import (
+    BedrockEmbeddingProvider, SentenceTransformerProvider, measure_throughput
+)
+
+DIM = 8
+
+
+def fake_vector(text):
+    digest = hashlib.sha256(text.encode()).digest()
+    v = np.frombuffer(digest[:DIM], dtype=np.uint8).astype(np.float32) + 1
+    return v / np.linalg.norm(v)
+
+
+class StubModel:
+    """
+    Stands in for a SentenceTransformer on one CPU: calls run one at a
+    time, each with a fixed overhead plus a small cost per text.
+    """
+
+    def __init__(self, overhead_s=0.005, per_text_s=0.0005):
+        self.overhead_s = overhead_s
+        self.per_text_s = per_text_s
+        self.batch_sizes = []
+        self._cpu = threading.Lock()
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False, convert_to_numpy=True, show_progress_bar=False):
+        with self._cpu:
+            time.sleep(self.overhead_s + self.per_text_s * len(sentences))
+            self.batch_sizes.append(len(sentences))
+        return np.stack([fake_vector(s) for s in sentences])
+
+
+def stub_bedrock(round_trip_s=0.05):
+    def invoke_model(**kwargs):
+        time.sleep(round_trip_s)
+        text = json.loads(kwargs["body"])["inputText"]
+        return {"body": Mock(read=lambda: json.dumps({"embedding": fake_vector(text).tolist()}).encode())}
+    return Mock(invoke_model=invoke_model)
+
+
+TEXTS = [f"Title: Ticket {i}\nDescription: Something broke ({i})" for i in range(64)]
+
+
+class TestSentenceTransformerProvider:
+    """Test cases for the local, micro-batched provider."""
+
+    def test_embed_many_is_one_encode_call(self):
+        model = StubModel()
+        provider = SentenceTransformerProvider(model=model)
+
+        vectors = provider.embed_many(TEXTS[:5])
+
+        assert model.batch_sizes == [5]
+        assert vectors[2] == pytest.approx(fake_vector(TEXTS[2]).tolist())
+        assert isinstance(vectors[0], list)
+
+    def test_concurrent_embeds_are_micro_batched(self):
+        model = StubModel()
+        provider = SentenceTransformerProvider(model=model, max_batch_size=16, max_wait_ms=20)
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            vectors = list(pool.map(provider.embed, TEXTS[:32]))
+
+        for text, vector in zip(TEXTS, vectors):
+            assert vector == pytest.approx(fake_vector(text).tolist())
+        assert sum(model.batch_sizes) == 32
+        assert len(model.batch_sizes) < 32
+        assert max(model.batch_sizes) <= 16
+        assert provider.stats()["texts"] == 32
+
+    def test_encode_errors_reach_every_caller(self):
+        model = Mock(encode=Mock(side_effect=RuntimeError("out of memory")))
+        provider = SentenceTransformerProvider(model=model, max_wait_ms=20)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(provider.embed, text) for text in TEXTS[:4]]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="out of memory"):
+                future.result()
+
+        # The worker survives a failed batch
+        model.encode.side_effect = lambda texts, **kwargs: np.stack([fake_vector(t) for t in texts])
+        assert provider.embed(TEXTS[0]) == pytest.approx(fake_vector(TEXTS[0]).tolist())
+
+    def test_throughput_against_the_remote_path(self):
+        """Micro-batching beats one remote call per ticket, and one encode call per ticket."""
+        remote = measure_throughput(BedrockEmbeddingProvider(lambda: stub_bedrock()), TEXTS, concurrency=8)
+        unbatched = measure_throughput(SentenceTransformerProvider(model=StubModel(), max_batch_size=1), TEXTS, concurrency=8)
+        batched = measure_throughput(SentenceTransformerProvider(model=StubModel()), TEXTS, concurrency=8)
+
+        print(f"tickets/s: remote {remote:.0f}, local unbatched {unbatched:.0f}, local batched {batched:.0f}")
+        assert batched > 2 * remote
+        assert batched > 2 * unbatched
+
+
+class TestDuplicateDetectorProvider:
+    """The detector embeds through whichever provider is configured."""
+
+    def test_uses_the_configured_provider(self, monkeypatch):
+        provider = SentenceTransformerProvider(model_name="stub-minilm", model=StubModel())
+        cache = Mock(get_or_compute=Mock(side_effect=lambda text, model, compute: compute(text)))
+        index = Mock(search=Mock(return_value=[]))
+        monkeypatch.setattr(duplicate_detector, "embedding_provider", provider)
+        monkeypatch.setattr(duplicate_detector, "embedding_cache", cache)
+        monkeypatch.setattr(duplicate_detector, "vector_index", index)
+
+        event = {"v": 1, "ticket_id": "t1", "ticket": {"title": "Disk full", "description": "/var at 100%"}}
+        result = duplicate_detector.lambda_handler(event, None)
+
+        assert result["duplicate"]["is_duplicate"] is False
+        assert cache.get_or_compute.call_args.args[1] == "stub-minilm"
+        added = index.add.call_args.args
+        assert added[0] == "t1"
+        assert added[1] == pytest.approx(fake_vector("Title: Disk full\nDescription: /var at 100%").tolist())
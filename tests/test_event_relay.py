@@ -0,0 +1,155 @@
+"""
+Test suite for the change-stream event relay.
+
+Mapping and batching are tested directly. The end-to-end test tails a
+real change stream and is skipped unless a replica set is available
+(see conftest.py).
+"""
+
+import asyncio
+import pytest
+from bson import ObjectId
+
+from backend.models.ticket import EventTypes, TicketCreate, TicketUpdate
+from backend.utils import database, events
+from backend.workers.event_relay import EventRelay, RelayDeliveryError, change_to_event
+
+
+class FakePublisher:
+    """Collects published events; `fail` makes every flush drop them."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.sent = []
+        self.dropped = 0
+        self._queued = []
+
+    def publish(self, event_type, detail):
+        self._queued.append((event_type, detail))
+
+    async def flush(self):
+        if self.fail:
+            self.dropped += len(self._queued)
+        else:
+            self.sent.extend(self._queued)
+        self._queued = []
+
+    async def close(self):
+        await self.flush()
+
+
+class TestChangeMapping:
+    """Change stream documents map to the events TicketService publishes."""
+
+    def test_insert_and_delete(self):
+        ticket_id = ObjectId()
+        key = {"documentKey": {"_id": ticket_id}}
+
+        assert change_to_event({"operationType": "insert", **key}) == (EventTypes.TICKET_CREATED, {"ticket_id": str(ticket_id)})
+        assert change_to_event({"operationType": "delete", **key}) == (EventTypes.TICKET_DELETED, {"ticket_id": str(ticket_id)})
+        assert change_to_event({"operationType": "drop"}) is None
+
+    def test_update_carries_changes_and_current_state(self):
+        ticket_id = ObjectId()
+        change = {
+            "operationType": "update",
+            "documentKey": {"_id": ticket_id},
+            "updateDescription": {"updatedFields": {"status": "Escalated"}},
+            "fullDocument": {"status": "Escalated", "priority": "high"},
+        }
+
+        assert change_to_event(change) == (EventTypes.TICKET_UPDATED, {
+            "ticket_id": str(ticket_id),
+            "changes": {"status": "Escalated"},
+            "status": "Escalated",
+            "priority": "high",
+        })
+
+    def test_api_does_not_publish_in_change_stream_mode(self, monkeypatch):
+        published = []
+        monkeypatch.setattr(events, "EVENT_EMISSION", "change_stream")
+        monkeypatch.setattr(events.event_publisher, "publish_many", lambda *args: published.append(args))
+
+        events.fire_event(EventTypes.TICKET_CREATED, {"ticket_id": "a"})
+        events.fire_events(EventTypes.TICKET_CREATED, [{"ticket_id": "b"}])
+
+        assert published == []
+
+
+class TestPublishBatch:
+    def test_preserves_change_order(self):
+        relay = EventRelay(publisher=FakePublisher())
+        changes = [{"operationType": op, "documentKey": {"_id": ObjectId()}} for op in ("insert", "delete", "insert")]
+
+        asyncio.run(relay.publish_batch(changes))
+
+        assert [event_type for event_type, _ in relay.publisher.sent] == [
+            EventTypes.TICKET_CREATED, EventTypes.TICKET_DELETED, EventTypes.TICKET_CREATED
+        ]
+        assert relay.relayed == 3
+
+    def test_undelivered_batch_raises(self):
+        relay = EventRelay(publisher=FakePublisher(fail=True))
+
+        with pytest.raises(RelayDeliveryError):
+            asyncio.run(relay.publish_batch([{"operationType": "insert", "documentKey": {"_id": ObjectId()}}]))
+
+
+class TestRelayAgainstReplicaSet:
+    """Tails a real change stream; needs MONGODB_REPLSET_URI."""
+
+    def test_relays_api_and_agent_writes_and_resumes(self, replset_uri, monkeypatch):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from backend.services.ticket_service import ticket_service
+        from backend.services.counter_service import counter_service
+
+        monkeypatch.setattr(events, "EVENT_EMISSION", "change_stream")
+
+        async def wait_for(publisher, count):
+            for _ in range(100):
+                if len(publisher.sent) >= count:
+                    return
+                await asyncio.sleep(0.05)
+
+        async def scenario():
+            client = AsyncIOMotorClient(replset_uri)
+            monkeypatch.setattr(database, "_database", client["priorityops_test"])
+            ticket_service.cache.clear()
+
+            # First relay run: an API create and update, an agent-style direct write, an API delete
+            stop = asyncio.Event()
+            first = EventRelay(publisher=FakePublisher(), max_await_ms=100)
+            task = asyncio.create_task(first.run(stop))
+            await asyncio.sleep(0.3)
+
+            ticket = await ticket_service.create_ticket(TicketCreate(title="Relayed"))
+            await ticket_service.update_ticket(ticket.id, TicketUpdate(priority="high"))
+            await client["priorityops_test"].tickets.update_one(
+                {"_id": ObjectId(ticket.id)}, {"$set": {"status": "Escalated"}}
+            )
+            await wait_for(first.publisher, 3)
+            stop.set()
+            await task
+
+            # Written while no relay is running; picked up from the checkpoint
+            await ticket_service.delete_ticket(ticket.id)
+            await counter_service.drain()
+
+            stop = asyncio.Event()
+            second = EventRelay(publisher=FakePublisher(), max_await_ms=100)
+            task = asyncio.create_task(second.run(stop))
+            await wait_for(second.publisher, 1)
+            stop.set()
+            await task
+            client.close()
+            return ticket.id, first.publisher.sent, second.publisher.sent
+
+        ticket_id, first_sent, second_sent = asyncio.run(scenario())
+
+        assert [(t, d["ticket_id"]) for t, d in first_sent] == [
+            (EventTypes.TICKET_CREATED, ticket_id),
+            (EventTypes.TICKET_UPDATED, ticket_id),
+            (EventTypes.TICKET_UPDATED, ticket_id),
+        ]
+        assert first_sent[2][1]["changes"] == {"status": "Escalated"}
+        assert second_sent == [(EventTypes.TICKET_DELETED, {"ticket_id": ticket_id})]
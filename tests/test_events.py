@@ -0,0 +1,174 @@
+"""
+Test suite for the background EventBridge publisher.
+
+A fake client stands in for boto3; its put_events sleeps to emulate the
+AWS round trip and can reject entries to exercise retries.
+"""
+
+import asyncio
+import json
+import threading
+import time
+import pytest
+from datetime import datetime
+
+from backend.utils import events
+from backend.utils.events import EventPublisher
+
+
+class FakeEventClient:
+    def __init__(self, latency=0.0, reject=None):
+        self.latency = latency
+        # How many more times to reject the entry for each ticket_id
+        self.reject = dict(reject or {})
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def put_events(self, Entries):
+        time.sleep(self.latency)
+        results = []
+        with self.lock:
+            self.calls.append(Entries)
+            for entry in Entries:
+                ticket_id = json.loads(entry["Detail"]).get("ticket_id")
+                if self.reject.get(ticket_id, 0) > 0:
+                    self.reject[ticket_id] -= 1
+                    results.append({"ErrorCode": "ThrottlingException"})
+                else:
+                    results.append({"EventId": "id"})
+        return {"FailedEntryCount": sum(1 for r in results if "ErrorCode" in r), "Entries": results}
+
+    def delivered(self):
+        return [json.loads(e["Detail"])["ticket_id"] for call in self.calls for e in call]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeEventClient()
+    monkeypatch.setattr(events, "event_client", fake)
+    return fake
+
+
+def publisher(**kwargs):
+    kwargs.setdefault("flush_interval", 0.02)
+    kwargs.setdefault("retry_backoff", 0.001)
+    return EventPublisher(**kwargs)
+
+
+class TestEventPublisher:
+    """Test cases for EventPublisher."""
+
+    def test_publish_does_not_block_event_loop(self, client):
+        """The AWS round trip happens in a thread while the loop keeps ticking."""
+        ticks, loop_ran_during_call = [], []
+        put_events = client.put_events
+
+        def slow_put_events(Entries):
+            # Returns once the loop has ticked, or gives up if it is blocked
+            started, deadline = len(ticks), time.monotonic() + 1
+            while len(ticks) == started and time.monotonic() < deadline:
+                time.sleep(0.001)
+            loop_ran_during_call.append(len(ticks) > started)
+            return put_events(Entries)
+
+        client.put_events = slow_put_events
+        pub = publisher()
+
+        async def scenario():
+            for i in range(30):
+                pub.publish("ticket.created", {"ticket_id": str(i)})
+            assert client.calls == [] and pub.stats()["queue_depth"] == 30  # Enqueued only
+            while pub.delivered < 30:
+                ticks.append(None)
+                await asyncio.sleep(0.001)
+            await pub.close()
+
+        asyncio.run(scenario())
+        assert loop_ran_during_call and all(loop_ran_during_call)
+
+    def test_size_trigger_batches_of_ten(self, client):
+        pub = publisher(flush_interval=10)
+
+        async def scenario():
+            pub.publish_many("ticket.created", [{"ticket_id": str(i)} for i in range(20)])
+            await asyncio.sleep(0.05)
+            sent_before_interval = [len(call) for call in client.calls]
+            pub.publish("ticket.created", {"ticket_id": "last"})
+            await pub.close()
+            return sent_before_interval
+
+        assert asyncio.run(scenario()) == [10, 10]
+        assert [len(call) for call in client.calls] == [10, 10, 1]
+
+    def test_time_trigger_flushes_partial_batch(self, client):
+        pub = publisher(flush_interval=0.02)
+
+        async def scenario():
+            pub.publish("ticket.created", {"ticket_id": "a"})
+            await asyncio.sleep(0.1)
+            return client.delivered()
+
+        assert asyncio.run(scenario()) == ["a"]
+
+    def test_partial_failures_are_retried(self, client):
+        client.reject = {"3": 2}
+        pub = publisher()
+
+        async def scenario():
+            pub.publish_many("ticket.created", [{"ticket_id": str(i)} for i in range(5)])
+            await pub.close()
+
+        asyncio.run(scenario())
+        assert sorted(client.delivered()) == ["0", "1", "2", "3", "3", "3", "4"]
+        assert [len(call) for call in client.calls] == [5, 1, 1]
+        assert pub.stats()["retried"] == 2 and pub.stats()["dropped"] == 0
+
+    def test_gives_up_after_max_retries(self, client):
+        client.reject = {"x": 100}
+        pub = publisher(max_retries=2)
+
+        async def scenario():
+            pub.publish("ticket.created", {"ticket_id": "x"})
+            await pub.close()
+
+        asyncio.run(scenario())
+        assert len(client.calls) == 3
+        assert pub.stats()["dropped"] == 1
+
+    def test_flush_waits_for_in_flight_batches(self, client):
+        """A batch the background task is sending counts towards flush()."""
+        client.latency = 0.05
+        client.reject = {"0": 99}
+        pub = publisher(max_retries=1)
+
+        async def scenario():
+            pub.publish_many("ticket.created", [{"ticket_id": str(i)} for i in range(15)])
+            await asyncio.sleep(0.01)  # The background task takes the first ten
+            assert pub.stats()["queue_depth"] == 5
+            await pub.flush()
+            stats = pub.stats()
+            await pub.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+        assert stats["delivered"] + stats["dropped"] == 15
+        assert stats["dropped"] == 1
+
+    def test_close_flushes_queue(self, client):
+        pub = publisher(flush_interval=10)
+
+        async def scenario():
+            pub.publish_many("ticket.updated", [{"ticket_id": str(i)} for i in range(3)])
+            await pub.close()
+
+        asyncio.run(scenario())
+        assert client.delivered() == ["0", "1", "2"]
+        stats = pub.stats()
+        assert stats["queue_depth"] == 0 and stats["flush_latency_ms"]["p50"] is not None
+
+    def test_datetimes_in_details_serialize(self, client):
+        pub = publisher()
+        pub.publish("ticket.updated", {"ticket_id": "a", "changes": {"updated_at": datetime(2024, 1, 1)}})
+
+        detail = json.loads(client.calls[0][0]["Detail"])
+        assert detail["changes"]["updated_at"] == "2024-01-01T00:00:00"
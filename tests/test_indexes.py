@@ -0,0 +1,81 @@
+"""
+Test suite for the index registry and the index audit.
+
+The audit itself needs a real query planner and is skipped unless a local
+MongoDB is reachable (see conftest.py).
+"""
+
+import asyncio
+import pytest
+
+from backend.migrations.create_indexes import ensure_indexes, index_version, MARKER_ID
+from backend.utils.indexes import INDEXES, QUERY_SHAPES
+from backend.utils.index_audit import plan_summary, audit, seed, create_registered_indexes
+
+
+class TestRegistry:
+    """Test cases for the declared indexes and query shapes."""
+
+    def test_create_indexes_builds_registry(self, mongo_stand_in):
+        assert asyncio.run(ensure_indexes())
+
+        for spec in INDEXES:
+            names = set(mongo_stand_in[spec.collection].sync.index_information())
+            assert spec.name in names, spec.name
+
+    def test_marker_skips_current_version(self, mongo_stand_in):
+        """Once the marker holds the registry's version, a re-run is a single read."""
+        asyncio.run(ensure_indexes())
+        assert mongo_stand_in["migrations"].sync.find_one({"_id": MARKER_ID})["version"] == index_version()
+        mongo_stand_in.reset_stats()
+
+        assert not asyncio.run(ensure_indexes())
+        assert mongo_stand_in.stats["calls"] == ["find_one"]
+
+        mongo_stand_in["migrations"].sync.update_one({"_id": MARKER_ID}, {"$set": {"version": "stale"}})
+        assert asyncio.run(ensure_indexes())
+
+    def test_names_are_unique(self):
+        assert len({(s.collection, s.name) for s in INDEXES}) == len(INDEXES)
+        assert len({s.name for s in QUERY_SHAPES}) == len(QUERY_SHAPES)
+
+    def test_text_index_name_matches_mongo(self):
+        assert "title_text_description_text" in {spec.name for spec in INDEXES}
+
+
+class TestPlanSummary:
+    """Test cases for reading winning plans out of explain output."""
+
+    def test_classic_find_ignores_rejected_plans(self):
+        explain = {"queryPlanner": {
+            "winningPlan": {"stage": "LIMIT", "inputStage": {
+                "stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "status_1_created_at_-1__id_-1"}}},
+            "rejectedPlans": [{"stage": "SORT", "inputStage": {"stage": "IXSCAN", "indexName": "status_1"}}],
+        }}
+
+        stages, indexes = plan_summary(explain)
+
+        assert stages == ["LIMIT", "FETCH", "IXSCAN"]
+        assert indexes == {"status_1_created_at_-1__id_-1"}
+
+    def test_aggregate_with_collscan(self):
+        explain = {"stages": [
+            {"$cursor": {"queryPlanner": {"winningPlan": {"queryPlan": {"stage": "COLLSCAN"}}}}},
+            {"$group": {"_id": None}},
+        ]}
+
+        assert plan_summary(explain) == (["COLLSCAN"], set())
+
+
+class TestAudit:
+    """Explains every registered shape against a real MongoDB."""
+
+    def test_every_shape_is_indexed(self, local_mongo):
+        create_registered_indexes(local_mongo)
+        seed(local_mongo, 5000)
+
+        report = audit(local_mongo)
+
+        flagged = [row for row in report["shapes"] if row["problems"]]
+        assert not flagged, flagged
+        assert not report["unused"] and not report["missing"]
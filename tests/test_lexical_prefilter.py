@@ -0,0 +1,143 @@
+"""
+Test suite for the MinHash/LSH lexical prefilter.
+
+The Mongo band index is a mongomock collection; Bedrock and the vector
+index are mocked.
+"""
+
+from unittest.mock import Mock
+
+import mongomock
+import numpy as np
+import pytest
+
+from backend.agents import duplicate_detector
+from backend.agents.lexical_prefilter import (
+    LexicalPrefilter, LocalLexicalIndex, MongoLexicalIndex,
+    band_keys, estimate_jaccard, minhash, shingles
+)
+
+ALERT = ("CPU alert on host web-01 at 12:03",
+         "CPU usage above 95% for 5 minutes on web-01, checkout latency degraded for all customers")
+REPEAT = ("CPU alert on host web-01 at 12:03",
+          "CPU usage above 95% for 5 minutes on web-01, checkout latency degraded for all of our customers")
+PRINTER = ("Printer on floor 3 keeps jamming",
+           "The shared printer jams whenever anyone prints double sided pages from the finance laptops")
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient().db.ticket_minhash
+
+
+class TestSignatures:
+    """Test cases for shingling, MinHash and LSH bands."""
+
+    def test_shingles_ignore_case_but_keep_numbers(self):
+        assert shingles("Disk FULL on db-01") == shingles("disk full on DB-01")
+        assert shingles("Disk FULL on db-01") != shingles("disk full on DB-02")
+        assert shingles("Disk full") == {"disk full"}
+        assert shingles("") == set()
+
+    def test_signature_estimates_jaccard(self):
+        a = shingles(" ".join(ALERT))
+        b = shingles(" ".join(ALERT) + " please escalate to the on call engineer")
+        estimate = estimate_jaccard(minhash(a), minhash(b))
+
+        assert estimate == pytest.approx(jaccard(a, b), abs=0.12)
+        assert estimate_jaccard(minhash(a), minhash(shingles(" ".join(PRINTER)))) < 0.1
+
+    def test_signatures_are_stable(self):
+        """Signatures stored by one container must match those of another."""
+        signature = minhash(shingles(" ".join(ALERT)))
+        assert signature.dtype == np.uint32 and len(signature) == 128
+        assert np.array_equal(signature, minhash(shingles(" ".join(ALERT))))
+        assert band_keys(signature)[0].startswith("0:")
+        assert len(set(band_keys(signature))) == 32
+
+
+@pytest.mark.parametrize("backend", ["local", "mongo"])
+class TestLexicalPrefilter:
+    """Test cases for resolving tickets against either band index."""
+
+    def prefilter(self, backend, collection):
+        index = LocalLexicalIndex() if backend == "local" else MongoLexicalIndex(lambda: collection)
+        return LexicalPrefilter(index, threshold=0.8)
+
+    def test_near_verbatim_copy_is_resolved(self, backend, collection):
+        prefilter = self.prefilter(backend, collection)
+
+        assert prefilter.check("t1", *ALERT) is None
+        assert prefilter.check("t2", *PRINTER) is None
+        match = prefilter.check("t3", *REPEAT)
+
+        assert match[0] == "t1" and match[1] >= 0.8
+        assert prefilter.check("t1", *ALERT)[0] == "t3"  # A re-run never matches itself
+        assert prefilter.stats() == {"checked": 4, "resolved": 2, "too_short": 0, "resolved_fraction": 0.5}
+
+    def test_tickets_differing_only_in_numbers_fall_through(self, backend, collection):
+        """Different error codes or order numbers are different problems, however long the text."""
+        template = ("Checkout returns HTTP {code}",
+                    "Customers see an error page when paying for order {order}. The payment form accepts the card, "
+                    "the spinner runs for a few seconds and then the checkout page shows a generic error message "
+                    "and asks the customer to try again later, which several customers have reported today")
+        prefilter = self.prefilter(backend, collection)
+
+        first = [part.format(code=500, order=10231) for part in template]
+        second = [part.format(code=404, order=88817) for part in template]
+        third = [part.format(code=500, order=55120) for part in template]
+        assert prefilter.check("a", *first) is None
+        assert prefilter.check("b", *second) is None
+        assert prefilter.check("c", *third) is None
+        assert prefilter.check("d", *first)[0] == "a"
+        assert estimate_jaccard(minhash(shingles(" ".join(first))), minhash(shingles(" ".join(third)))) >= 0.8
+
+    def test_short_texts_fall_through(self, backend, collection):
+        prefilter = self.prefilter(backend, collection)
+
+        assert prefilter.check("t1", "Help", "Broken") is None
+        assert prefilter.check("t2", "Help", "Broken") is None
+        assert prefilter.stats()["too_short"] == 2
+
+
+class TestMongoLexicalIndex:
+    """The Mongo backend never fails the detector."""
+
+    def test_unavailable_collection_skips_the_prefilter(self):
+        def broken():
+            raise ConnectionError("no route to host")
+
+        prefilter = LexicalPrefilter(MongoLexicalIndex(broken))
+        assert prefilter.check("t1", *ALERT) is None
+        assert prefilter.check("t2", *REPEAT) is None
+
+
+class TestDuplicateDetectorPrefilter:
+    """Resolved tickets skip the embedding and kNN stage."""
+
+    def test_alert_storm_skips_embedding(self, monkeypatch):
+        provider = Mock(model_id="stub", embed=Mock(return_value=[1.0, 0.0]))
+        index = Mock(search=Mock(return_value=[]))
+        monkeypatch.setattr(duplicate_detector, "lexical_prefilter", LexicalPrefilter(LocalLexicalIndex()))
+        monkeypatch.setattr(duplicate_detector, "embedding_provider", provider)
+        monkeypatch.setattr(duplicate_detector, "embedding_cache", Mock(
+            get_or_compute=lambda text, model, compute: compute(text)))
+        monkeypatch.setattr(duplicate_detector, "vector_index", index)
+
+        def detect(ticket_id, ticket):
+            event = {"v": 1, "ticket_id": ticket_id, "ticket": {"title": ticket[0], "description": ticket[1]}}
+            return duplicate_detector.lambda_handler(event, None)["duplicate"]
+
+        first = detect("t1", ALERT)
+        assert first["is_duplicate"] is False and first["stage"] == "semantic"
+
+        repeat = detect("t2", REPEAT)
+        assert repeat["is_duplicate"] is True and repeat["duplicate_of"] == "t1"
+        assert repeat["stage"] == "lexical"
+        assert provider.embed.call_count == 1
+        assert index.add.call_count == 1
+        assert duplicate_detector.lexical_prefilter.stats()["resolved_fraction"] == 0.5
@@ -0,0 +1,143 @@
+"""
+Test suite for the compact workflow payload the agents exchange.
+
+The S3 payload store is replaced with the in-memory LocalPayloadStore.
+"""
+
+import json
+from unittest.mock import Mock
+
+import pytest
+from bson import ObjectId
+
+from backend.agents import ai_triage_agent, payload
+from backend.agents.payload import (
+    LocalPayloadStore, PayloadError, extend_payload, new_payload, payload_size,
+    read_section, upgrade_payload
+)
+
+TICKET_ID = "665a5f000000000000000001"
+
+# A ticket as the legacy workflow forwarded it: the whole document
+BIG_TICKET = {
+    "_id": TICKET_ID,
+    "title": "VPN drops every few minutes",
+    "description": "Connection log:\n" + "tunnel reset by peer\n" * 20000,
+    "status": "New",
+    "audit_trail": [{"action": f"edit {i}", "note": "x" * 200} for i in range(200)],
+    "agent_history": [{"agent": "AITriageAgent", "output": "y" * 500} for _ in range(50)],
+}
+
+TRIAGE = {
+    "priority": "High",
+    "category": "Network Connectivity",
+    "confidence_score": 87,
+    "estimated_resolution_time": "2-4 hours",
+    "recommended_solution_steps": ["Check the tunnel", "Rotate the key", "Retest"],
+}
+
+# Each stage's payload must stay far below the 256 KB state limit
+COMPACT_PAYLOAD_BYTES = 2048
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = LocalPayloadStore()
+    monkeypatch.setattr(payload, "_store", store)
+    return store
+
+
+class TestPayloadCodec:
+    """Test cases for encoding, extending and reading payloads."""
+
+    def test_only_carried_fields_are_encoded(self, store):
+        encoded = new_payload(TICKET_ID, {"title": "Printer", "description": "Jammed", "audit_trail": [1]})
+
+        assert encoded == {"v": 1, "ticket_id": TICKET_ID, "ticket": {"title": "Printer", "description": "Jammed"}}
+        assert store.objects == {}
+
+    def test_large_values_are_passed_by_reference(self, store):
+        encoded = new_payload(TICKET_ID, BIG_TICKET)
+
+        assert set(encoded["ticket"]["description"]) == {"$ref"}
+        assert encoded["ticket"]["title"] == BIG_TICKET["title"]
+        assert read_section(encoded, "ticket")["description"] == BIG_TICKET["description"]
+
+        # Passing the section on does not store it again
+        extended = extend_payload(encoded, duplicate={"is_duplicate": False})
+        assert extended["ticket"] == encoded["ticket"]
+        assert len(store.objects) == 1
+
+    def test_without_a_store_values_stay_inline(self, monkeypatch):
+        monkeypatch.setattr(payload, "_store", None)
+        monkeypatch.setattr(payload, "PAYLOAD_STORE_BUCKET", "")
+
+        encoded = new_payload(TICKET_ID, {"title": "Printer", "description": "z" * 10000})
+        assert encoded["ticket"]["description"] == "z" * 10000
+
+        with pytest.raises(PayloadError, match="no payload store"):
+            read_section({**encoded, "ticket": {"description": {"$ref": "abc"}}}, "ticket")
+
+    def test_oversized_payload_is_rejected(self, monkeypatch):
+        monkeypatch.setattr(payload, "_store", None)
+        monkeypatch.setattr(payload, "PAYLOAD_STORE_BUCKET", "")
+
+        with pytest.raises(PayloadError, match="byte limit"):
+            new_payload(TICKET_ID, BIG_TICKET)
+
+    def test_unknown_version_and_section_are_rejected(self, store):
+        with pytest.raises(PayloadError, match="version"):
+            read_section({"v": 99, "ticket_id": TICKET_ID}, "ticket")
+        with pytest.raises(PayloadError, match="section"):
+            extend_payload(new_payload(TICKET_ID, {}), history={})
+
+    def test_legacy_events_are_upgraded(self, store):
+        legacy = {
+            "ticket_data": {"_id": TICKET_ID, "title": "Printer", "description": "Jammed", "audit_trail": []},
+            "duplicate_check": {"is_duplicate": False},
+            "triage_results": None,
+        }
+
+        assert upgrade_payload(legacy) == {
+            "v": 1, "ticket_id": TICKET_ID,
+            "ticket": {"title": "Printer", "description": "Jammed"},
+            "duplicate": {"is_duplicate": False},
+        }
+        assert upgrade_payload(legacy["ticket_data"])["ticket_id"] == TICKET_ID
+
+
+class TestWorkflowPayloadSize:
+    """Each stage's output stays compact, whatever the ticket carries."""
+
+    def test_stage_payloads_are_compact(self, store, monkeypatch):
+        legacy_size = payload_size({"ticket_data": BIG_TICKET, "duplicate_check": {"is_duplicate": False},
+                                    "triage_results": TRIAGE})
+        assert legacy_size > payload.MAX_STATE_BYTES  # What the old workflow would have carried
+
+        fetched = new_payload(TICKET_ID, BIG_TICKET)
+        detected = extend_payload(fetched, duplicate={"is_duplicate": False, "duplicate_of": None, "duplicate_score": 0})
+
+        monkeypatch.setattr(ai_triage_agent, "bedrock_runtime", Mock(invoke_model=Mock(return_value={
+            "body": Mock(read=lambda: json.dumps({"content": [{"text": json.dumps(TRIAGE)}]}).encode())
+        })))
+        triaged = ai_triage_agent.lambda_handler(detected, None)
+
+        for stage in (fetched, detected, triaged):
+            assert payload_size(stage) < COMPACT_PAYLOAD_BYTES
+        assert "ticket" not in triaged
+        assert read_section(triaged, "triage") == TRIAGE
+
+        # The prompt saw the full description, fetched by reference
+        request = json.loads(ai_triage_agent.bedrock_runtime.invoke_model.call_args.kwargs["body"])
+        assert BIG_TICKET["description"] in request["messages"][0]["content"][0]["text"]
+
+    def test_duplicate_skips_triage_and_keeps_the_result(self, store, monkeypatch):
+        monkeypatch.setattr(ai_triage_agent, "bedrock_runtime", Mock())
+        duplicate_of = str(ObjectId())
+        detected = extend_payload(new_payload(TICKET_ID, BIG_TICKET),
+                                  duplicate={"is_duplicate": True, "duplicate_of": duplicate_of, "duplicate_score": 0.97})
+
+        triaged = ai_triage_agent.lambda_handler(detected, None)
+
+        assert triaged == {"v": 1, "ticket_id": TICKET_ID, "duplicate": detected["duplicate"], "triage": None}
+        ai_triage_agent.bedrock_runtime.invoke_model.assert_not_called()
@@ -0,0 +1,72 @@
+"""
+Test suite for import-time start-up cost.
+
+Imports run in a fresh interpreter (see backend/startup_profile.py), so
+modules already loaded by the test session do not hide their cost.
+
+Import time depends on the machine, so the budget check only runs with
+STARTUP_BUDGET_CHECK=1 (e.g. on the deployment image); otherwise use
+`python -m backend.startup_profile` for a report.
+"""
+
+import importlib
+import os
+import pkgutil
+
+import pytest
+
+import backend.utils
+
+from backend.startup_profile import (
+    profile_imports, parse_importtime, STARTUP_BUDGET_MS, HEAVY_MODULES
+)
+
+
+@pytest.fixture(scope="module")
+def server_profile():
+    return profile_imports("backend.server")
+
+
+class TestParseImporttime:
+    """Test cases for reading -X importtime output."""
+
+    def test_parses_depth_and_times(self):
+        stderr = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |     orjson",
+            "import time:      3000 |       3120 |   backend.utils.serialization",
+            "some other warning",
+        ])
+
+        modules = parse_importtime(stderr)
+
+        assert [(m.name, m.self_us, m.cumulative_us, m.depth) for m in modules] == [
+            ("orjson", 120, 120, 2),
+            ("backend.utils.serialization", 3000, 3120, 1),
+        ]
+
+
+class TestStartupBudget:
+    """The request-serving path stays inside the start-up budget without heavy imports."""
+
+    def test_no_heavy_modules_on_the_api_path(self, server_profile):
+        assert server_profile.heavy_modules == []
+
+    @pytest.mark.skipif(not os.environ.get("STARTUP_BUDGET_CHECK"), reason="STARTUP_BUDGET_CHECK not set")
+    def test_within_budget(self, server_profile):
+        assert server_profile.total_ms <= STARTUP_BUDGET_MS
+
+    def test_utils_package_loads_submodules_on_demand(self):
+        profile = profile_imports("backend.utils.pagination")
+
+        loaded = {m.name for m in profile.modules}
+        assert "backend.utils.events" not in loaded
+        assert "backend.utils.database" not in loaded
+        assert not set(HEAVY_MODULES) & {name.split(".")[0] for name in loaded}
+
+    def test_utils_package_exports_every_submodule(self):
+        submodules = {info.name for info in pkgutil.iter_modules(backend.utils.__path__)}
+
+        assert set(backend.utils.__all__) == submodules
+        for name in submodules:
+            assert getattr(backend.utils, name) is importlib.import_module(f"backend.utils.{name}")
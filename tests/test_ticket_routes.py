@@ -0,0 +1,377 @@
+"""
+Test suite for the ticket API routes.
+
+Routes are exercised through FastAPI's TestClient against the in-memory
+Mongo stand-in from conftest.py. Timing comparisons depend on the machine
+and only run with RUN_BENCHMARKS=1.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import os
+import time
+import pytest
+from datetime import datetime, timedelta
+from bson import ObjectId
+
+from fastapi.encoders import jsonable_encoder
+
+from backend.agents import agent_db
+from backend.models.ticket import Ticket, TicketSummary, SUMMARY_FIELDS
+from backend.routes.tickets import TicketListResponse
+from backend.services.counter_service import counter_service
+from backend.utils.serialization import FastJSONResponse, ticket_dict
+
+
+class TestBulkCreateRoute:
+    """Test cases for POST /api/v1/tickets/bulk."""
+
+    def test_json_array(self, api_client):
+        """Invalid items are reported by index without rejecting the batch."""
+        response = api_client.post("/api/v1/tickets/bulk", json=[
+            {"title": "Printer offline"},
+            {"title": ""},
+            {"title": "VPN drops", "department": "IT"},
+        ])
+
+        body = response.json()
+        assert response.status_code == 200
+        assert (body["created"], body["failed"]) == (2, 1)
+        assert [r["success"] for r in body["results"]] == [True, False, True]
+        assert body["results"][1]["index"] == 1
+
+    def test_streamed_ndjson(self, api_client):
+        """NDJSON bodies are parsed line by line as they stream in."""
+        lines = [json.dumps({"title": f"Alert {i}"}) for i in range(5)]
+
+        def body():
+            # Split mid-line to exercise buffering across chunks
+            payload = ("\n".join(lines) + "\n").encode()
+            yield payload[:17]
+            yield payload[17:]
+
+        response = api_client.post(
+            "/api/v1/tickets/bulk",
+            content=body(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.json()["created"] == 5
+
+    def test_rejects_non_array_json(self, api_client):
+        response = api_client.post("/api/v1/tickets/bulk", json={"title": "Not a list"})
+
+        assert response.status_code == 400
+
+
+def seed_full_tickets(collection, count):
+    """Insert tickets with long descriptions, audit trails and tags."""
+    now = datetime(2024, 1, 1)
+    collection.insert_many([
+        {
+            "_id": ObjectId(),
+            "title": f"Ticket {i}",
+            "description": "x" * 2000,
+            "priority": "high",
+            "status": "open",
+            "department": "IT",
+            "assignee": "alice",
+            "created_at": now + timedelta(minutes=i),
+            "updated_at": now + timedelta(minutes=i),
+            "audit_trail": [
+                {"timestamp": now, "action": "updated", "field": "status", "old_value": "pending", "new_value": "open", "user": "agent"}
+            ] * 20,
+            "tags": ["network", "vpn", "outage"],
+        }
+        for i in range(count)
+    ])
+
+
+class TestSparseFieldsets:
+    """Test cases for the summary projection and fields= parameter."""
+
+    def test_default_is_summary(self, api_client, mongo_stand_in):
+        seed_full_tickets(mongo_stand_in["tickets"].sync, 3)
+
+        tickets = api_client.get("/api/v1/tickets/").json()["tickets"]
+
+        assert set(tickets[0]) == {"id", *SUMMARY_FIELDS}
+
+    def test_explicit_fields(self, api_client, mongo_stand_in):
+        seed_full_tickets(mongo_stand_in["tickets"].sync, 3)
+
+        tickets = api_client.get("/api/v1/tickets/", params={"fields": "title,tags"}).json()["tickets"]
+
+        assert set(tickets[0]) == {"id", "title", "tags"}
+
+    def test_unknown_field_rejected(self, api_client):
+        response = api_client.get("/api/v1/tickets/", params={"fields": "title,password"})
+
+        assert response.status_code == 400
+
+    def test_payload_at_100_per_page(self, api_client, mongo_stand_in):
+        """Summary pages are a fraction of the size of full pages."""
+        seed_full_tickets(mongo_stand_in["tickets"].sync, 100)
+        all_fields = ",".join(f for f in Ticket.model_fields if f != "id")
+
+        def page_bytes(params):
+            return len(api_client.get("/api/v1/tickets/", params={"per_page": 100, **params}).content)
+
+        assert page_bytes({}) < page_bytes({"fields": all_fields}) / 10
+
+
+class TestExport:
+    """Test cases for GET /api/v1/tickets/export."""
+
+    def test_ndjson_with_date_filter(self, api_client, mongo_stand_in):
+        seed_full_tickets(mongo_stand_in["tickets"].sync, 10)
+
+        response = api_client.get("/api/v1/tickets/export", params={
+            "created_after": "2024-01-01T00:05:00",
+            "created_before": "2024-01-01T00:08:00",
+        })
+        rows = [json.loads(line) for line in response.text.splitlines()]
+
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert [row["title"] for row in rows] == ["Ticket 7", "Ticket 6", "Ticket 5"]
+        assert "audit_trail" not in rows[0]
+
+    def test_csv_with_fields(self, api_client, mongo_stand_in):
+        seed_full_tickets(mongo_stand_in["tickets"].sync, 3)
+
+        response = api_client.get("/api/v1/tickets/export", params={
+            "format": "csv", "fields": "title,tags", "status": "open",
+        })
+        rows = list(csv.reader(io.StringIO(response.text)))
+
+        assert rows[0] == ["id", "title", "tags"]
+        assert len(rows) == 4
+        assert rows[1][2] == "network;vpn;outage"
+
+
+class TestSearchRoute:
+    """Test cases for GET /tickets/search validation (ranking needs a real MongoDB)."""
+
+    def test_requires_query(self, api_client):
+        assert api_client.get("/api/v1/tickets/search").status_code == 422
+
+    def test_rejects_bad_cursor(self, api_client):
+        response = api_client.get("/api/v1/tickets/search", params={"q": "vpn", "cursor": "nope"})
+        assert response.status_code == 400
+
+
+class TestBulkUpdateRoute:
+    """Test cases for PATCH /api/v1/tickets/bulk."""
+
+    def create(self, api_client, count):
+        return [api_client.post("/api/v1/tickets/", json={"title": f"Ticket {i}"}).json()["id"] for i in range(count)]
+
+    def test_ids_with_one_update(self, api_client):
+        ids = self.create(api_client, 3)
+
+        body = api_client.patch("/api/v1/tickets/bulk", json={
+            "ids": ids + ["not-an-id"], "update": {"priority": "high"},
+        }).json()
+
+        assert (body["updated"], body["failed"]) == (3, 1)
+        assert body["results"][3] == {"index": 3, "success": False, "ticket_id": "not-an-id", "error": "Invalid ticket ID"}
+        assert api_client.get(f"/api/v1/tickets/{ids[1]}").json()["priority"] == "high"
+
+    def test_per_id_updates(self, api_client):
+        ids = self.create(api_client, 2)
+
+        body = api_client.patch("/api/v1/tickets/bulk", json={"updates": [
+            {"id": ids[0], "status": "closed"},
+            {"id": ids[1], "assignee": "alice"},
+        ]}).json()
+
+        assert body["updated"] == 2
+        first, second = (api_client.get(f"/api/v1/tickets/{i}").json() for i in ids)
+        assert (first["status"], first["assignee"]) == ("closed", None)
+        assert (second["status"], second["assignee"]) == ("pending", "alice")
+
+    def test_rejects_mixed_shapes(self, api_client):
+        response = api_client.patch("/api/v1/tickets/bulk", json={
+            "ids": [str(ObjectId())], "update": {"status": "closed"}, "updates": [],
+        })
+
+        assert response.status_code == 422
+
+
+class TestFastSerialization:
+    """Ticket responses skip model re-validation and are encoded with orjson."""
+
+    def validated_page(self, docs, fields):
+        """What the list route used to do: build models, re-validate as response_model, encode."""
+        page = TicketListResponse(
+            tickets=[TicketSummary(id=str(d["_id"]), **{f: d[f] for f in fields if f in d}) for d in docs],
+            total=len(docs), page=1, per_page=len(docs), total_pages=1, next_cursor=None
+        )
+        revalidated = TicketListResponse.model_validate(page.model_dump(exclude_unset=True))
+        return json.dumps(jsonable_encoder(revalidated, exclude_unset=True)).encode()
+
+    def fast_page(self, docs, fields):
+        return FastJSONResponse({
+            "tickets": [ticket_dict(d, fields) for d in docs],
+            "total": len(docs), "page": 1, "per_page": len(docs), "total_pages": 1, "next_cursor": None
+        }).body
+
+    def validated_detail(self, doc):
+        ticket = Ticket(**doc, id=str(doc["_id"]))
+        return json.dumps(jsonable_encoder(Ticket.model_validate(ticket.model_dump()))).encode()
+
+    def fast_detail(self, doc):
+        return FastJSONResponse(Ticket(**doc, id=str(doc["_id"]))).body
+
+    def test_same_json_as_validated_path(self, mongo_stand_in):
+        seed_full_tickets(mongo_stand_in["tickets"].sync, 5)
+        docs = list(mongo_stand_in["tickets"].sync.find({}, {"audit_trail": 0}))
+        all_fields = [f for f in Ticket.model_fields if f != "id"]
+
+        for fields in (SUMMARY_FIELDS, all_fields, ["title", "tags"]):
+            assert json.loads(self.fast_page(docs, fields)) == json.loads(self.validated_page(docs, fields))
+        assert json.loads(self.fast_detail(docs[0])) == json.loads(self.validated_detail(docs[0]))
+
+    def test_list_and_detail_endpoints(self, api_client, mongo_stand_in):
+        seed_full_tickets(mongo_stand_in["tickets"].sync, 3)
+        ticket_id = str(mongo_stand_in["tickets"].sync.find_one()["_id"])
+
+        page = api_client.get("/api/v1/tickets/")
+        detail = api_client.get(f"/api/v1/tickets/{ticket_id}")
+
+        assert page.headers["content-type"] == "application/json" and "etag" in page.headers
+        assert set(page.json()["tickets"][0]) == {"id", *SUMMARY_FIELDS}
+        assert detail.json()["id"] == ticket_id and "etag" in detail.headers
+
+    @pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="RUN_BENCHMARKS not set")
+    def test_microbenchmark(self, mongo_stand_in):
+        """The fast path serializes a 100-ticket page and a detail response several times faster."""
+        seed_full_tickets(mongo_stand_in["tickets"].sync, 100)
+        docs = list(mongo_stand_in["tickets"].sync.find({}, {"audit_trail": 0}))
+        all_fields = [f for f in Ticket.model_fields if f != "id"]
+
+        def best(fn, *args, runs=30):
+            samples = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                fn(*args)
+                samples.append((time.perf_counter() - start) * 1000)
+            return min(samples)
+
+        results = {
+            "summary page": (best(self.validated_page, docs, SUMMARY_FIELDS), best(self.fast_page, docs, SUMMARY_FIELDS)),
+            "full page": (best(self.validated_page, docs, all_fields), best(self.fast_page, docs, all_fields)),
+            "detail": (best(self.validated_detail, docs[0], runs=500), best(self.fast_detail, docs[0], runs=500)),
+        }
+
+        assert all(fast * 2 < validated for validated, fast in results.values()), results
+
+
+class TestAuditRoute:
+    """Test cases for GET /api/v1/tickets/{id}/audit."""
+
+    def test_pages_through_entries(self, api_client, mongo_stand_in):
+        ticket_id = api_client.post("/api/v1/tickets/", json={"title": "Printer offline"}).json()["id"]
+        start = datetime(2024, 1, 1)
+        mongo_stand_in["ticket_audit"].sync.insert_many([
+            {"ticket_id": ObjectId(ticket_id), "timestamp": start + timedelta(minutes=i),
+             "action": "updated", "field": "status", "old_value": "pending", "new_value": "open"}
+            for i in range(7)
+        ])
+
+        first = api_client.get(f"/api/v1/tickets/{ticket_id}/audit", params={"limit": 4}).json()
+        second = api_client.get(f"/api/v1/tickets/{ticket_id}/audit", params={"limit": 4, "cursor": first["next_cursor"]}).json()
+
+        timestamps = [e["timestamp"] for e in first["entries"] + second["entries"]]
+        assert timestamps == sorted(timestamps, reverse=True) and len(set(timestamps)) == 7
+        assert second["next_cursor"] is None
+        assert first["entries"][0]["ticket_id"] == ticket_id
+
+    def test_unknown_ticket(self, api_client):
+        assert api_client.get(f"/api/v1/tickets/{ObjectId()}/audit").status_code == 404
+
+    def test_rejects_bad_cursor(self, api_client):
+        ticket_id = api_client.post("/api/v1/tickets/", json={"title": "Printer offline"}).json()["id"]
+
+        assert api_client.get(f"/api/v1/tickets/{ticket_id}/audit", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+class TestConditionalGet:
+    """Test cases for ETag / If-None-Match on ticket and analytics reads."""
+
+    def revalidate(self, api_client, url, **params):
+        first = api_client.get(url, params=params)
+        etag = first.headers["etag"]
+        return etag, api_client.get(url, params=params, headers={"If-None-Match": etag})
+
+    def test_ticket_detail(self, api_client):
+        ticket_id = api_client.post("/api/v1/tickets/", json={"title": "Printer"}).json()["id"]
+        url = f"/api/v1/tickets/{ticket_id}"
+
+        etag, again = self.revalidate(api_client, url)
+        assert again.status_code == 304 and again.content == b""
+        assert again.headers["etag"] == etag
+
+        api_client.put(url, json={"title": "Printer jammed"})
+        changed = api_client.get(url, headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+    def test_ticket_list_tracks_writes_and_query(self, api_client, mongo_stand_in):
+        api_client.post("/api/v1/tickets/", json={"title": "First"})
+
+        etag, again = self.revalidate(api_client, "/api/v1/tickets/", per_page=5)
+        assert again.status_code == 304
+
+        other = api_client.get("/api/v1/tickets/", params={"per_page": 6}, headers={"If-None-Match": etag})
+        assert other.status_code == 200
+
+        # A write made outside the API, as the agents do
+        mongo_stand_in["tickets"].sync.update_one({}, {"$set": {"status": "open", "updated_at": datetime.utcnow() + timedelta(seconds=1)}})
+        after = api_client.get("/api/v1/tickets/", params={"per_page": 5}, headers={"If-None-Match": etag})
+        assert after.status_code == 200
+
+    def test_ticket_list_tracks_agent_writes_with_a_lagging_clock(self, api_client, mongo_stand_in):
+        """An agent write stamped behind the API's clock still changes the ETag."""
+        api_client.post("/api/v1/tickets/", json={"title": "First"})
+        etag, _ = self.revalidate(api_client, "/api/v1/tickets/")
+
+        # What agent_db.apply_agent_update writes, from a clock a minute behind
+        earlier = datetime.utcnow() - timedelta(minutes=1)
+        mongo_stand_in["tickets"].sync.update_one({}, {"$set": {"status": "open", "updated_at": earlier}})
+        mongo_stand_in[agent_db.COUNTERS_COLLECTION].sync.update_one(
+            {"_id": agent_db.GENERATION_ID}, {"$inc": {"seq": 1}}, upsert=True)
+
+        assert api_client.get("/api/v1/tickets/", headers={"If-None-Match": etag}).status_code == 200
+
+    def test_ticket_list_tracks_counter_reconciliation(self, api_client, mongo_stand_in):
+        """Totals corrected by reconciliation are new content."""
+        seed_full_tickets(mongo_stand_in["tickets"].sync, 3)  # Written without counters
+        etag, again = self.revalidate(api_client, "/api/v1/tickets/")
+        assert again.status_code == 304 and again.headers["etag"] == etag
+
+        assert asyncio.run(counter_service.reconcile()) > 0
+        assert api_client.get("/api/v1/tickets/", headers={"If-None-Match": etag}).status_code == 200
+
+    def test_list_skips_query_when_not_modified(self, api_client, mongo_stand_in):
+        seed_full_tickets(mongo_stand_in["tickets"].sync, 10)
+        etag = api_client.get("/api/v1/tickets/").headers["etag"]
+        mongo_stand_in.reset_stats()
+
+        assert api_client.get("/api/v1/tickets/", headers={"If-None-Match": etag}).status_code == 304
+        assert sorted(mongo_stand_in.stats["calls"]) == ["estimated_document_count", "find", "find_one"]
+
+    def test_analytics(self, api_client, monkeypatch):
+        from backend.services.analytics_service import analytics_service
+
+        async def distribution():
+            return []
+        monkeypatch.setattr(analytics_service, "get_priority_distribution", distribution)
+        api_client.post("/api/v1/tickets/", json={"title": "First"})
+
+        etag, again = self.revalidate(api_client, "/api/v1/analytics/priority")
+        assert again.status_code == 304
+
+        api_client.post("/api/v1/tickets/", json={"title": "Second"})
+        assert api_client.get("/api/v1/analytics/priority", headers={"If-None-Match": etag}).status_code == 200
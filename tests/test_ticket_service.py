@@ -0,0 +1,690 @@
+"""
+Test suite for the ticket service layer.
+
+Service tests run against the in-memory Mongo stand-in from conftest.py.
+Benchmarks that depend on the real query planner use a local MongoDB and
+are skipped when none is available.
+"""
+
+import asyncio
+import statistics
+import time
+import pytest
+from datetime import datetime, timedelta
+from bson import ObjectId
+
+from backend.models.ticket import TicketCreate, TicketUpdate
+from backend.services.audit_service import audit_service
+from backend.services.counter_service import counter_service
+from backend.services.ticket_service import ticket_service, TICKET_SORT
+from backend.utils.cache import LRUCache, ReadThroughCache, InMemoryCacheBackend
+from backend.utils.pagination import (
+    encode_cursor, decode_cursor, keyset_filter, InvalidCursorError,
+    encode_score_cursor, decode_score_cursor
+)
+from backend.utils.search import search_pattern, highlight
+
+
+def run(coro):
+    """Run a service call and wait for the counter writes it scheduled."""
+    async def main():
+        result = await coro
+        await counter_service.drain()
+        return result
+    return asyncio.run(main())
+
+
+def seed_tickets(collection, count, start=None, **fields):
+    """Insert `count` tickets, several sharing each created_at value."""
+    start = start or datetime(2024, 1, 1)
+    docs = [
+        {
+            "_id": ObjectId(),
+            "title": f"Ticket {i}",
+            "description": "Seeded ticket",
+            "status": fields.get("status", "open"),
+            "priority": fields.get("priority", "medium"),
+            "created_at": start + timedelta(seconds=i // 3),
+            "updated_at": start + timedelta(seconds=i // 3),
+        }
+        for i in range(count)
+    ]
+    collection.insert_many(docs)
+    return docs
+
+
+class TestCursorPagination:
+    """Test cases for keyset (cursor) pagination."""
+
+    def test_cursor_round_trip(self):
+        """A cursor decodes back to the position it was built from."""
+        created_at = datetime(2024, 5, 1, 12, 30, 15, 123000)
+        obj_id = ObjectId()
+
+        assert decode_cursor(encode_cursor(created_at, str(obj_id))) == (created_at, obj_id)
+
+    @pytest.mark.parametrize("cursor", ["", "not-a-cursor", "e30", "eyJjIjoieCIsImkiOiJ5In0"])
+    def test_invalid_cursor_rejected(self, cursor):
+        """Malformed cursors raise InvalidCursorError."""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(cursor)
+
+    def test_walks_every_ticket_exactly_once(self, mongo_stand_in):
+        """Following next_cursor visits each ticket once, newest first, with ties broken by _id."""
+        docs = seed_tickets(mongo_stand_in["tickets"].sync, 47)
+
+        seen, cursor = [], None
+        while True:
+            tickets, cursor = run(ticket_service.get_tickets_page(cursor=cursor, limit=10))
+            seen.extend(t.id for t in tickets)
+            if cursor is None:
+                break
+
+        expected = [str(d["_id"]) for d in sorted(docs, key=lambda d: (d["created_at"], d["_id"]), reverse=True)]
+        assert seen == expected
+
+    def test_last_page_has_no_cursor(self, mongo_stand_in):
+        """An exactly-full last page does not produce an empty extra page."""
+        seed_tickets(mongo_stand_in["tickets"].sync, 20)
+
+        tickets, cursor = run(ticket_service.get_tickets_page(limit=10))
+        tickets, cursor = run(ticket_service.get_tickets_page(cursor=cursor, limit=10))
+
+        assert len(tickets) == 10
+        assert cursor is None
+
+    def test_filters_apply_with_cursor(self, mongo_stand_in):
+        """Filters are combined with the keyset predicate."""
+        collection = mongo_stand_in["tickets"].sync
+        seed_tickets(collection, 15, priority="high")
+        seed_tickets(collection, 15, priority="low")
+
+        tickets, cursor = run(ticket_service.get_tickets_page(limit=10, priority="high"))
+        more, _ = run(ticket_service.get_tickets_page(cursor=cursor, limit=10, priority="high"))
+
+        assert {t.priority for t in tickets + more} == {"high"}
+        assert len(tickets) + len(more) == 15
+
+
+class TestSearch:
+    """Test cases for full-text search."""
+
+    def test_score_cursor_round_trip(self):
+        obj_id = ObjectId()
+        assert decode_score_cursor(encode_score_cursor(1.0833333333333333, str(obj_id))) == (1.0833333333333333, obj_id)
+
+    def test_cursor_kinds_do_not_mix(self):
+        with pytest.raises(InvalidCursorError):
+            decode_score_cursor(encode_cursor(datetime(2024, 1, 1), str(ObjectId())))
+
+    def test_highlight_marks_stemmed_terms_and_phrases(self):
+        pattern = search_pattern('printer "paper jam" -toner')
+
+        assert highlight("Printers report a Paper  jam", pattern) == "<mark>Printers</mark> report a <mark>Paper  jam</mark>"
+        assert highlight("Replace the toner", pattern) is None
+        assert search_pattern("-only -negated") is None
+
+    def test_highlight_escapes_html(self):
+        assert highlight("<b>disk</b> full", search_pattern("disk")) == "&lt;b&gt;<mark>disk</mark>&lt;/b&gt; full"
+
+    def test_snippet_window_around_first_match(self):
+        text = " ".join(f"word{i}" for i in range(100)) + " outage " + " ".join(f"tail{i}" for i in range(100))
+
+        snippet = highlight(text, search_pattern("outage"), max_length=80)
+
+        assert snippet.startswith("…") and snippet.endswith("…")
+        assert "<mark>outage</mark>" in snippet
+        assert len(snippet) < 100
+
+    def test_ranked_search_with_filters_and_paging(self, local_mongo_backend):
+        """Runs against a real MongoDB: mongomock has no $text support."""
+        collection = local_mongo_backend["tickets"].sync
+        collection.create_index([("title", "text"), ("description", "text")])
+        seed_tickets(collection, 30)
+        now = datetime(2024, 2, 1)
+        collection.insert_many([
+            {"title": "VPN outage", "description": "VPN outage across the VPN gateway", "status": "open",
+             "priority": "high", "created_at": now, "updated_at": now},
+            {"title": "Printer", "description": "Intermittent VPN drops", "status": "open",
+             "priority": "low", "created_at": now, "updated_at": now},
+            *({"title": f"VPN request {i}", "description": "Access", "status": "closed",
+               "priority": "low", "created_at": now, "updated_at": now} for i in range(5)),
+        ])
+
+        results, _ = run(ticket_service.search_tickets("vpn", status="open"))
+        assert [r.ticket.title for r in results] == ["VPN outage", "Printer"]
+        assert results[0].highlights["title"] == "<mark>VPN</mark> outage"
+        assert "title" not in results[1].highlights
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = run(ticket_service.search_tickets("vpn", cursor=cursor, limit=3))
+            seen.extend(r.ticket.id for r in page)
+            if cursor is None:
+                break
+        assert len(seen) == len(set(seen)) == 7
+
+
+class TestTicketCounters:
+    """Test cases for the incrementally maintained ticket counters."""
+
+    FILTERS = [
+        {},
+        {"status": "pending"},
+        {"status": "closed"},
+        {"priority": "high"},
+        {"assignee": "alice"},
+        {"status": "closed", "assignee": "alice"},
+    ]
+
+    def assert_counts_exact(self):
+        for filters in self.FILTERS:
+            counted = run(ticket_service.get_ticket_count(**filters))
+            exact = run(ticket_service.get_ticket_count(exact=True, **filters))
+            assert counted == exact, filters
+
+    def test_writes_keep_counters_exact(self, mongo_stand_in):
+        """Create, update and delete adjust the counters with $inc."""
+        created = [
+            run(ticket_service.create_ticket(TicketCreate(title=f"Ticket {i}", assignee="alice" if i % 2 else None)))
+            for i in range(6)
+        ]
+        self.assert_counts_exact()
+
+        run(ticket_service.update_ticket(created[0].id, TicketUpdate(status="closed", assignee="alice")))
+        run(ticket_service.update_ticket(created[1].id, TicketUpdate(priority="high")))
+        run(ticket_service.update_ticket(created[2].id, TicketUpdate(title="Retitled")))
+        self.assert_counts_exact()
+
+        run(ticket_service.delete_ticket(created[0].id))
+        run(ticket_service.delete_ticket(created[3].id))
+        self.assert_counts_exact()
+
+        assert run(ticket_service.get_ticket_count()) == 4
+
+    def test_untracked_update_only_bumps_the_generation(self, mongo_stand_in):
+        """Updates that do not move a ticket between keys leave the counters alone."""
+        ticket = run(ticket_service.create_ticket(TicketCreate(title="Ticket")))
+        counters = mongo_stand_in["ticket_counters"].sync
+        before = list(counters.find({"_id": {"$ne": "generation"}}))
+        generation = run(counter_service.get_generation())
+
+        run(ticket_service.update_ticket(ticket.id, TicketUpdate(description="More detail")))
+
+        assert list(counters.find({"_id": {"$ne": "generation"}})) == before
+        assert run(counter_service.get_generation()) == generation + 1
+
+    def test_reconcile_fixes_drift(self, mongo_stand_in):
+        """Writes that bypass the service are corrected by reconciliation."""
+        run(ticket_service.create_ticket(TicketCreate(title="Tracked")))
+        seed_tickets(mongo_stand_in["tickets"].sync, 5, status="closed")
+        mongo_stand_in["ticket_counters"].sync.insert_one(
+            {"_id": "stale|low|", "status": "stale", "priority": "low", "assignee": None, "count": 3}
+        )
+
+        assert run(counter_service.reconcile()) > 0
+        self.assert_counts_exact()
+        assert run(counter_service.reconcile()) == 0
+
+    def test_reconcile_keeps_concurrent_increments(self, mongo_stand_in, monkeypatch):
+        """A counter that moves while tickets are counted is left for the next run, not overwritten."""
+        run(ticket_service.create_ticket(TicketCreate(title="Tracked")))
+        seed_tickets(mongo_stand_in["tickets"].sync, 2, status="closed")
+        tickets = mongo_stand_in["tickets"].sync
+        counters = mongo_stand_in["ticket_counters"].sync
+        aggregate = type(mongo_stand_in["tickets"]).aggregate
+
+        def racing_aggregate(collection, *args, **kwargs):
+            cursor = aggregate(collection, *args, **kwargs)
+            if collection.sync is tickets:
+                # An API create lands after the snapshot was taken
+                doc = {"title": "Concurrent", "status": "pending", "priority": "medium", "assignee": None}
+                tickets.insert_one(doc)
+                counters.update_one({"_id": "pending|medium|"}, {"$inc": {"count": 1}})
+            return cursor
+
+        monkeypatch.setattr(type(mongo_stand_in["tickets"]), "aggregate", racing_aggregate)
+
+        assert run(counter_service.reconcile()) == 1  # Only the closed tickets' counter
+        assert counters.find_one({"_id": "pending|medium|"})["count"] == 2
+        self.assert_counts_exact()
+
+
+class TestWriteRoundTrips:
+    """Each single-ticket write costs one round trip to the tickets collection."""
+
+    def test_create_does_not_read_back(self, mongo_stand_in):
+        mongo_stand_in.reset_stats()
+
+        ticket = run(ticket_service.create_ticket(TicketCreate(title="Disk full", department="IT")))
+
+        assert mongo_stand_in.stats["calls"] == ["insert_one", "bulk_write"]  # bulk_write is the counter update
+        assert ticket.id and ticket.department == "IT" and ticket.status == "pending"
+
+    def test_update_does_not_read_back(self, mongo_stand_in):
+        ticket = run(ticket_service.create_ticket(TicketCreate(title="Disk full", tags=["storage"])))
+        mongo_stand_in.reset_stats()
+
+        updated = run(ticket_service.update_ticket(ticket.id, TicketUpdate(title="Disk nearly full")))
+
+        # insert_many is the audit entry, bulk_write the background generation bump
+        assert mongo_stand_in.stats["calls"] == ["find_one_and_update", "insert_many", "bulk_write"]
+        assert updated.title == "Disk nearly full"
+        assert updated.tags == ["storage"]
+        assert updated.updated_at > ticket.updated_at
+        assert updated == run(ticket_service.get_ticket(ticket.id))
+
+    def test_counter_writes_are_off_the_request_path(self, mongo_stand_in):
+        """Writes return after the tickets round trip and any audit entry; counters update in the background."""
+        async def calls(coro):
+            mongo_stand_in.reset_stats()
+            result = await coro
+            awaited = list(mongo_stand_in.stats["calls"])
+            await counter_service.drain()
+            return result, awaited, mongo_stand_in.stats["calls"][len(awaited):]
+
+        async def scenario():
+            ticket, create_awaited, create_background = await calls(
+                ticket_service.create_ticket(TicketCreate(title="Disk full")))
+            _, update_awaited, update_background = await calls(
+                ticket_service.update_ticket(ticket.id, TicketUpdate(status="closed")))
+            return create_awaited, create_background, update_awaited, update_background
+
+        create_awaited, create_background, update_awaited, update_background = asyncio.run(scenario())
+
+        assert create_awaited == ["insert_one"] and create_background == ["bulk_write"]
+        assert update_awaited == ["find_one_and_update", "insert_many"]  # insert_many is the audit entry
+        assert update_background == ["bulk_write"]
+
+
+class TestBulkCreate:
+    """Test cases for bulk ticket ingestion."""
+
+    def test_reports_per_item_results(self, mongo_stand_in):
+        """Unordered inserts keep going past failed documents."""
+        mongo_stand_in["tickets"].sync.create_index("title", unique=True)
+        batch = [TicketCreate(title=title) for title in ["a", "b", "a", "c", "b"]]
+
+        results = run(ticket_service.create_tickets(batch, chunk_size=2))
+
+        assert [error is None for _, error in results] == [True, True, False, True, False]
+        assert all(ticket_id for ticket_id, error in results if error is None)
+        assert run(ticket_service.get_ticket_count()) == 3
+
+    def test_events_are_batched(self, mongo_stand_in):
+        """One ticket.created event per ticket, sent in batches."""
+        results = run(ticket_service.create_tickets(
+            [TicketCreate(title=f"Ticket {i}") for i in range(25)], chunk_size=10
+        ))
+
+        sent = [detail["ticket_id"] for _, details in mongo_stand_in.events for detail in details]
+        assert sent == [ticket_id for ticket_id, _ in results]
+        assert len(mongo_stand_in.events) == 3
+
+    def test_round_trips_against_single_create(self, mongo_stand_in):
+        """Bulk ingestion pays per chunk the round trips single creates pay per ticket."""
+        count = 200
+
+        for i in range(count):
+            run(ticket_service.create_ticket(TicketCreate(title=f"Single {i}")))
+        single_calls = len(mongo_stand_in.stats["calls"])
+        mongo_stand_in.reset_stats()
+
+        run(ticket_service.create_tickets([TicketCreate(title=f"Bulk {i}") for i in range(count)], chunk_size=50))
+
+        assert single_calls == 2 * count  # insert_one plus its counter update
+        assert mongo_stand_in.stats["calls"] == ["insert_many", "bulk_write"] * 4
+        assert run(ticket_service.get_ticket_count(exact=True)) == 2 * count
+
+
+class TestBulkUpdate:
+    """Test cases for bulk ticket updates."""
+
+    def test_reports_per_id_results(self, mongo_stand_in):
+        ids = [ticket_id for ticket_id, _ in run(ticket_service.create_tickets(
+            [TicketCreate(title=f"Ticket {i}") for i in range(3)]
+        ))]
+        updates = [(ids[0], TicketUpdate(status="closed")), ("not-an-id", TicketUpdate(status="closed")),
+                   (str(ObjectId()), TicketUpdate(status="closed")), (ids[0], TicketUpdate(status="open")),
+                   (ids[2], TicketUpdate(assignee="alice"))]
+
+        results = run(ticket_service.update_tickets(updates, chunk_size=3))
+
+        assert [error for _, error in results] == [
+            None, "Invalid ticket ID", "Ticket not found", None, None
+        ]
+        assert run(ticket_service.get_ticket(ids[0])).status == "open"
+        assert run(ticket_service.get_ticket(ids[1])).status == "pending"
+        assert run(ticket_service.get_ticket(ids[2])).assignee == "alice"
+
+    def test_duplicate_ids_rejected(self, mongo_stand_in):
+        ticket = run(ticket_service.create_ticket(TicketCreate(title="Disk full")))
+
+        results = run(ticket_service.update_tickets(
+            [(ticket.id, TicketUpdate(status="open")), (ticket.id, TicketUpdate(status="closed"))]
+        ))
+
+        assert [error for _, error in results] == [None, "Duplicate ticket ID in request"]
+
+    def test_ticket_changed_after_read_is_reported(self, mongo_stand_in, monkeypatch):
+        """Success comes from the write, not the pre-image read, and counters follow what was written."""
+        ids = [ticket_id for ticket_id, _ in run(ticket_service.create_tickets(
+            [TicketCreate(title=f"Ticket {i}") for i in range(3)]
+        ))]
+        tickets = mongo_stand_in["tickets"].sync
+        find = type(mongo_stand_in["tickets"]).find
+        raced = []
+
+        def racing_find(collection, *args, **kwargs):
+            cursor = find(collection, *args, **kwargs)
+            if collection.sync is tickets and not raced:
+                cursor._cursor = iter(list(cursor._cursor))  # The pre-images are read now
+                tickets.update_one({"_id": ObjectId(ids[1])}, {"$set": {"status": "open"}})
+                tickets.delete_one({"_id": ObjectId(ids[2])})
+                raced.append(True)
+            return cursor
+
+        monkeypatch.setattr(type(mongo_stand_in["tickets"]), "find", racing_find)
+
+        results = run(ticket_service.update_tickets([(i, TicketUpdate(status="closed")) for i in ids]))
+
+        assert [error for _, error in results] == [None] + ["Ticket was changed or deleted during the update"] * 2
+        assert tickets.find_one({"_id": ObjectId(ids[1])})["status"] == "open"
+        assert run(ticket_service.get_ticket_count(status="closed")) == 1
+
+    def test_counters_audit_and_events(self, mongo_stand_in):
+        """Counters stay exact, each change is audited and events go out in one batch per chunk."""
+        ids = [ticket_id for ticket_id, _ in run(ticket_service.create_tickets(
+            [TicketCreate(title=f"Ticket {i}") for i in range(25)]
+        ))]
+        mongo_stand_in.events.clear()
+        mongo_stand_in.reset_stats()
+
+        run(ticket_service.update_tickets([(i, TicketUpdate(status="closed", assignee="bob")) for i in ids], chunk_size=10))
+
+        assert [len(details) for _, details in mongo_stand_in.events] == [10, 10, 5]
+        assert mongo_stand_in.stats["calls"].count("bulk_write") == 6  # one for tickets, one for counters, per chunk
+        assert run(ticket_service.get_ticket_count(status="closed", assignee="bob")) == 25
+        assert run(ticket_service.get_ticket_count(status="pending")) == 0
+        assert mongo_stand_in["ticket_audit"].sync.count_documents({"field": "assignee"}) == 25
+
+    def test_invalidates_cached_tickets(self, mongo_stand_in):
+        ticket = run(ticket_service.create_ticket(TicketCreate(title="Disk full")))
+        run(ticket_service.get_ticket(ticket.id))
+
+        run(ticket_service.update_tickets([(ticket.id, TicketUpdate(title="Disk nearly full"))]))
+
+        assert run(ticket_service.get_ticket(ticket.id)).title == "Disk nearly full"
+
+    def test_round_trips_against_single_update(self, mongo_stand_in):
+        """Per chunk, bulk updates make one read and one bulk_write where single updates pay per ticket."""
+        count = 200
+        ids = [ticket_id for ticket_id, _ in run(ticket_service.create_tickets(
+            [TicketCreate(title=f"Ticket {i}") for i in range(count)]
+        ))]
+        mongo_stand_in.reset_stats()
+
+        for ticket_id in ids:
+            run(ticket_service.update_ticket(ticket_id, TicketUpdate(status="open")))
+        single_calls = len(mongo_stand_in.stats["calls"])
+        mongo_stand_in.reset_stats()
+
+        run(ticket_service.update_tickets([(i, TicketUpdate(status="closed")) for i in ids], chunk_size=100))
+
+        assert single_calls == 3 * count  # find_one_and_update, audit insert_many, counter bulk_write
+        assert sorted(mongo_stand_in.stats["calls"]) == sorted(["find", "bulk_write", "insert_many", "bulk_write"] * 2)
+        assert run(ticket_service.get_ticket_count(status="closed")) == count
+
+
+class TestAuditTrail:
+    """Test cases for the append-only ticket audit collection."""
+
+    def test_update_records_field_diffs(self, mongo_stand_in):
+        """One entry per changed field; unchanged fields and updated_at are skipped."""
+        ticket = run(ticket_service.create_ticket(TicketCreate(title="Disk full", department="IT")))
+
+        run(ticket_service.update_ticket(ticket.id, TicketUpdate(title="Disk nearly full", department="IT", status="open")))
+
+        entries = list(mongo_stand_in["ticket_audit"].sync.find({}, {"_id": 0, "timestamp": 0}))
+        assert sorted(entries, key=lambda e: e["field"]) == [
+            {"ticket_id": ObjectId(ticket.id), "action": "updated", "field": "status",
+             "old_value": "pending", "new_value": "open", "user": None},
+            {"ticket_id": ObjectId(ticket.id), "action": "updated", "field": "title",
+             "old_value": "Disk full", "new_value": "Disk nearly full", "user": None},
+        ]
+
+    @pytest.mark.parametrize("bulk", [False, True])
+    def test_failed_audit_write_reaches_the_caller(self, mongo_stand_in, monkeypatch, bulk):
+        """History cannot be rebuilt later, so a lost entry must not pass silently."""
+        ticket = run(ticket_service.create_ticket(TicketCreate(title="Disk full")))
+
+        async def failing_append(entries):
+            raise ConnectionError("primary stepped down")
+
+        monkeypatch.setattr(audit_service, "append", failing_append)
+        update = TicketUpdate(title="Disk nearly full")
+        with pytest.raises(ConnectionError):
+            if bulk:
+                run(ticket_service.update_tickets([(ticket.id, update)]))
+            else:
+                run(ticket_service.update_ticket(ticket.id, update))
+
+    def test_history_is_not_stored_on_the_ticket(self, mongo_stand_in):
+        ticket = run(ticket_service.create_ticket(TicketCreate(title="Disk full")))
+        for i in range(5):
+            run(ticket_service.update_ticket(ticket.id, TicketUpdate(title=f"Disk full {i}")))
+
+        doc = mongo_stand_in["tickets"].sync.find_one({"_id": ObjectId(ticket.id)})
+        assert "audit_trail" not in doc and "agent_history" not in doc
+        assert mongo_stand_in["ticket_audit"].sync.count_documents({}) == 5
+
+    def test_pages_newest_first(self, mongo_stand_in):
+        """Following next_cursor visits each entry once, with timestamp ties broken by _id."""
+        ticket_id = ObjectId()
+        start = datetime(2024, 1, 1)
+        mongo_stand_in["ticket_audit"].sync.insert_many([
+            {"ticket_id": ticket_id, "timestamp": start + timedelta(seconds=i // 2), "action": "updated"}
+            for i in range(23)
+        ] + [{"ticket_id": ObjectId(), "timestamp": start, "action": "updated"}])
+
+        seen, cursor = [], None
+        while True:
+            entries, cursor = run(audit_service.get_entries(str(ticket_id), cursor=cursor, limit=5))
+            seen.extend(entries)
+            if cursor is None:
+                break
+
+        expected = mongo_stand_in["ticket_audit"].sync.find({"ticket_id": ticket_id}).sort([("timestamp", -1), ("_id", -1)])
+        assert [e.id for e in seen] == [str(doc["_id"]) for doc in expected]
+
+    def test_migration_moves_embedded_history(self, mongo_stand_in):
+        """Embedded arrays are copied out and unset; a re-run copies nothing twice."""
+        from backend.migrations.move_audit_trail import migrate
+
+        tickets = mongo_stand_in["tickets"].sync
+        docs = seed_tickets(tickets, 7)
+        for doc in docs[:5]:
+            tickets.update_one({"_id": doc["_id"]}, {"$set": {
+                "audit_trail": [{"timestamp": datetime(2024, 1, 2), "action": "updated", "field": "status"}] * 2,
+                "agent_history": [{"timestamp": "2024-01-03T10:00:00", "agent": "EscalationAgent", "action": "Escalated"}],
+            }})
+
+        moved = run(migrate(batch_size=2))
+        assert moved == {"tickets": 5, "entries": 15}
+
+        # An interrupted run left the arrays on one ticket
+        tickets.update_one({"_id": docs[0]["_id"]}, {"$set": {
+            "audit_trail": [{"timestamp": datetime(2024, 1, 2), "action": "updated", "field": "status"}] * 2,
+            "agent_history": [{"timestamp": "2024-01-03T10:00:00", "agent": "EscalationAgent", "action": "Escalated"}],
+        }})
+        run(migrate(batch_size=2))
+
+        audit = mongo_stand_in["ticket_audit"].sync
+        assert audit.count_documents({}) == 15
+        assert audit.find_one({"agent": "EscalationAgent"})["timestamp"] == datetime(2024, 1, 3, 10)
+        assert tickets.count_documents({"$or": [{"audit_trail": {"$exists": True}}, {"agent_history": {"$exists": True}}]}) == 0
+
+
+class TestTicketCache:
+    """Test cases for the read-through ticket cache."""
+
+    def test_repeat_reads_hit_cache(self, mongo_stand_in):
+        ticket = run(ticket_service.create_ticket(TicketCreate(title="Cached")))
+        mongo_stand_in.reset_stats()
+
+        for _ in range(5):
+            assert run(ticket_service.get_ticket(ticket.id)) == ticket
+
+        assert mongo_stand_in.stats["calls"] == ["find_one"]
+        assert ticket_service.cache.stats()["hits"] >= 4
+
+    def test_concurrent_misses_coalesce(self, mongo_stand_in):
+        """Simultaneous reads of an uncached ticket share one fetch."""
+        ticket = run(ticket_service.create_ticket(TicketCreate(title="Hot")))
+        mongo_stand_in.latency = 0.01
+        mongo_stand_in.reset_stats()
+
+        async def burst():
+            return await asyncio.gather(*(ticket_service.get_ticket(ticket.id) for _ in range(20)))
+
+        results = asyncio.run(burst())
+
+        assert all(result == ticket for result in results)
+        assert mongo_stand_in.stats["calls"] == ["find_one"]
+
+    def test_writes_invalidate(self, mongo_stand_in):
+        ticket = run(ticket_service.create_ticket(TicketCreate(title="Before")))
+        run(ticket_service.get_ticket(ticket.id))
+
+        run(ticket_service.update_ticket(ticket.id, TicketUpdate(title="After")))
+        assert run(ticket_service.get_ticket(ticket.id)).title == "After"
+
+        run(ticket_service.delete_ticket(ticket.id))
+        assert run(ticket_service.get_ticket(ticket.id)) is None
+
+    def test_missing_tickets_are_not_cached(self, mongo_stand_in):
+        ticket_id = str(ObjectId())
+        assert run(ticket_service.get_ticket(ticket_id)) is None
+
+        mongo_stand_in["tickets"].sync.insert_one({"_id": ObjectId(ticket_id), "title": "Late", "description": ""})
+        assert run(ticket_service.get_ticket(ticket_id)).title == "Late"
+
+    def test_load_in_flight_during_invalidation_is_dropped(self):
+        """A read that raced a write is returned but not cached."""
+        cache = ReadThroughCache("test")
+        loaded = []
+
+        async def loader():
+            await asyncio.sleep(0.01)
+            loaded.append(1)
+            return "stale"
+
+        async def scenario():
+            read = asyncio.ensure_future(cache.get("k", loader))
+            await asyncio.sleep(0)
+            await cache.invalidate("k")
+            assert await read == "stale"
+            return await cache.get("k", loader)
+
+        asyncio.run(scenario())
+        assert len(loaded) == 2
+
+    def test_load_in_flight_during_invalidation_skips_shared_tier(self):
+        """The raced read is not written to the shared tier either, and leaves no bookkeeping behind."""
+        shared = InMemoryCacheBackend()
+        cache = ReadThroughCache("test", shared=shared)
+
+        async def loader():
+            await asyncio.sleep(0.01)
+            return "stale"
+
+        async def scenario():
+            read = asyncio.ensure_future(cache.get("k", loader))
+            await asyncio.sleep(0)
+            await cache.invalidate("k")
+            await read
+            for i in range(100):
+                await cache.invalidate(f"idle-{i}")
+            return await shared.get("test:k")
+
+        assert asyncio.run(scenario()) is None
+        assert not cache._stale
+
+    def test_shared_tier_serves_other_processes(self):
+        shared = InMemoryCacheBackend()
+        first = ReadThroughCache("test", shared=shared)
+        second = ReadThroughCache("test", shared=shared)
+        loads = []
+
+        async def loader():
+            loads.append(1)
+            return "value"
+
+        async def scenario():
+            await first.get("k", loader)
+            assert await second.get("k", loader) == "value"
+            await first.invalidate("k")
+            second.clear()
+            await second.get("k", loader)
+
+        asyncio.run(scenario())
+        assert len(loads) == 2
+        assert second.stats()["shared_hits"] == 1
+
+    def test_lru_bounds_and_ttl(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr("backend.utils.cache.time.monotonic", lambda: now[0])
+        lru = LRUCache(maxsize=2, ttl=10)
+
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)  # evicts b, the least recently used
+        assert len(lru) == 2 and lru.evictions == 1
+        assert "b" not in lru._entries
+
+        now[0] += 11
+        lru.get("a")
+        assert lru.expirations == 1
+
+
+class TestPaginationBenchmark:
+    """Deep-page latency for skip/limit versus keyset pagination."""
+
+    TOTAL = 200_000
+    PER_PAGE = 20
+
+    def _p50_ms(self, fn, runs=15):
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
+
+    def test_keyset_latency_stays_flat_with_depth(self, local_mongo):
+        """Skip cost grows with depth; keyset cost does not."""
+        collection = local_mongo["tickets"]
+        collection.create_index([("created_at", -1), ("_id", -1)])
+        seed_tickets(collection, self.TOTAL)
+        ordered = list(collection.find({}, {"created_at": 1}).sort(TICKET_SORT))
+
+        results = {}
+        for page in (1, 200, 5000, 9000):
+            skip = (page - 1) * self.PER_PAGE
+            anchor = ordered[skip - 1] if skip else None
+            keyset_query = keyset_filter(anchor["created_at"], anchor["_id"]) if anchor else {}
+
+            results[page] = (
+                self._p50_ms(lambda: list(collection.find({}).sort(TICKET_SORT).skip(skip).limit(self.PER_PAGE))),
+                self._p50_ms(lambda: list(collection.find(keyset_query).sort(TICKET_SORT).limit(self.PER_PAGE))),
+            )
+
+        print("\npage      skip p50 (ms)   keyset p50 (ms)")
+        for page, (skip_ms, keyset_ms) in results.items():
+            print(f"{page:<9} {skip_ms:>13.2f} {keyset_ms:>17.2f}")
+
+        deepest_skip, deepest_keyset = results[9000]
+        assert deepest_keyset < deepest_skip
+        # Keyset stays within a small constant factor of the first page
+        assert deepest_keyset < max(results[1][1] * 5, 2.0)
@@ -0,0 +1,266 @@
+"""
+Test suite for the local vector index used for duplicate detection.
+
+The index lives under pytest's tmp_path, the recent-vectors buffer in a
+mongomock collection; Bedrock and OpenSearch are mocked.
+"""
+
+import json
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import mongomock
+import numpy as np
+import pytest
+
+from backend.agents import duplicate_detector, vector_index
+from backend.agents.vector_index import (
+    LocalVectorIndex, OpenSearchVectorIndex, RecentVectorBuffer, score_from_cosine
+)
+
+
+def random_vectors(count, dim, seed=7):
+    return np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+
+
+def brute_force_top_k(ids, vectors, query, k):
+    """The pure-Python reference: one cosine similarity per stored vector."""
+    def norm(v):
+        return math.sqrt(sum(x * x for x in v))
+
+    q_norm = norm(query)
+    scored = []
+    for ticket_id, v in zip(ids, vectors):
+        scored.append((sum(a * b for a, b in zip(v, query)) / (norm(v) * q_norm), ticket_id))
+    scored.sort(reverse=True)
+    return [(ticket_id, score) for score, ticket_id in scored[:k]]
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / "vectors" / "tickets")
+
+
+@pytest.fixture
+def recent_collection():
+    return mongomock.MongoClient().db.recent_ticket_vectors
+
+
+def knn_response(*hits):
+    return {"hits": {"hits": [{"_id": i, "_score": score, "_source": {"ticket_id": i}} for i, score in hits]}}
+
+
+class TestLocalVectorIndex:
+    """Test cases for adds, deletes, persistence and compaction."""
+
+    def test_search_matches_brute_force(self, index_path):
+        vectors = random_vectors(300, 16)
+        ids = [f"t{i}" for i in range(len(vectors))]
+        index = LocalVectorIndex(index_path)
+        for ticket_id, v in zip(ids, vectors):
+            index.add(ticket_id, v.tolist())
+
+        query = vectors[42] + 0.05
+        expected = brute_force_top_k(ids, vectors.tolist(), query.tolist(), 5)
+        hits = index.search(query.tolist(), 5)
+
+        assert [h[0] for h in hits] == [e[0] for e in expected]
+        assert [h[1] for h in hits] == pytest.approx([score_from_cosine(e[1]) for e in expected], abs=1e-5)
+        assert hits[0][0] == "t42"
+
+    def test_replace_and_delete(self, index_path):
+        index = LocalVectorIndex(index_path)
+        index.add("a", [1.0, 0.0])
+        index.add("b", [0.0, 1.0])
+        index.add("a", [0.0, 2.0])  # Re-indexed ticket
+
+        assert len(index) == 2
+        hits = index.search([0.0, 1.0], 3)
+        assert {h[0] for h in hits} == {"a", "b"}
+        assert [h[1] for h in hits] == pytest.approx([1.0, 1.0])
+
+        index.delete("b")
+        index.delete("missing")
+        assert [h[0] for h in index.search([0.0, 1.0], 3)] == ["a"]
+
+    def test_reopens_from_disk(self, index_path):
+        index = LocalVectorIndex(index_path)
+        index.add("a", [1.0, 0.0, 0.0])
+        index.add("b", [0.0, 1.0, 0.0])
+        index.add("c", [0.0, 0.0, 1.0])
+        index.delete("c")
+
+        reopened = LocalVectorIndex(index_path)
+        assert len(reopened) == 2
+        assert reopened.search([0.9, 0.1, 0.0], 1)[0][0] == "a"
+        assert reopened.search([0.0, 0.0, 1.0], 3)[-1][0] != "c"
+
+        with pytest.raises(ValueError, match="dimensional"):
+            LocalVectorIndex(index_path, dim=5)
+
+    def test_grows_past_initial_capacity(self, index_path, monkeypatch):
+        monkeypatch.setattr(vector_index, "INITIAL_CAPACITY", 4)
+        vectors = random_vectors(10, 8)
+        index = LocalVectorIndex(index_path)
+        for i, v in enumerate(vectors):
+            index.add(f"t{i}", v.tolist())
+
+        assert index.capacity == 16
+        assert LocalVectorIndex(index_path).search(vectors[9].tolist(), 1)[0][0] == "t9"
+
+    def test_compaction_keeps_live_rows(self, index_path, monkeypatch):
+        monkeypatch.setattr(vector_index, "INITIAL_CAPACITY", 4)
+        vectors = random_vectors(8, 8)
+        index = LocalVectorIndex(index_path)
+        for i, v in enumerate(vectors):
+            index.add(f"t{i}", v.tolist())
+        for i in range(3):
+            index.delete(f"t{i}")  # The third delete passes the compaction ratio
+
+        assert index._generation == 1
+        assert not os.path.exists(index._file("f32", 0))
+        assert len(index._ids) == 5
+        for compacted in (index, LocalVectorIndex(index_path)):
+            assert compacted.search(vectors[6].tolist(), 1)[0][0] == "t6"
+            assert {h[0] for h in compacted.search(vectors[0].tolist(), 8)} == {f"t{i}" for i in range(3, 8)}
+
+    def test_benchmark_against_python_loops(self, index_path):
+        """One vectorized product beats scoring every vector in Python by far."""
+        vectors = random_vectors(5000, 256)
+        ids = [f"t{i}" for i in range(len(vectors))]
+        index = LocalVectorIndex(index_path)
+        for ticket_id, v in zip(ids, vectors):
+            index.add(ticket_id, v)
+        as_lists = vectors.tolist()
+        query = (vectors[1234] + 0.1).tolist()
+
+        start = time.perf_counter()
+        expected = brute_force_top_k(ids, as_lists, query, 3)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(10):
+            hits = index.search(query, 3)
+        vectorized_time = (time.perf_counter() - start) / 10
+
+        assert [h[0] for h in hits] == [e[0] for e in expected]
+        assert vectorized_time * 10 < loop_time
+
+
+class TestOpenSearchVectorIndex:
+    """The OpenSearch backend speaks the same (ticket_id, score) interface."""
+
+    def test_search_maps_hits(self):
+        client = Mock()
+        client.search.return_value = knn_response(("a", 0.97))
+        index = OpenSearchVectorIndex(lambda: client, "tickets-index")
+
+        index.add("a", [0.1, 0.2], title="Disk full")
+        assert index.search([0.1, 0.2], 3) == [("a", 0.97)]
+        assert client.index.call_args.kwargs["body"] == {"ticket_id": "a", "title": "Disk full", "ticket_vector": [0.1, 0.2]}
+        assert "refresh" not in client.index.call_args.kwargs
+        assert client.search.call_args.kwargs["body"]["query"]["knn"]["ticket_vector"]["k"] == 3
+
+    def test_recent_buffer_covers_the_refresh_gap(self, recent_collection):
+        """A ticket indexed a moment ago is found before OpenSearch refreshes."""
+        client = Mock()
+        client.search.return_value = knn_response(("old", 0.95))  # The new ticket is not visible yet
+        index = OpenSearchVectorIndex(lambda: client, "tickets-index",
+                                      recent=RecentVectorBuffer(lambda: recent_collection))
+
+        index.add("new", [1.0, 0.0, 0.1])
+        hits = index.search([0.98, 0.0, 0.12], 3)
+
+        assert hits[0][0] == "new"
+        assert hits[0][1] == pytest.approx(1 / (2 - 0.99985), abs=1e-3)  # Exact cosine on the kNN score scale
+        assert hits[1] == ("old", 0.95)
+
+        # Once refreshed, the same ticket in both results is listed once
+        client.search.return_value = knn_response(("new", 0.99), ("old", 0.95))
+        assert [h[0] for h in index.search([0.98, 0.0, 0.12], 3)] == ["new", "old"]
+
+    def test_recent_buffer_window(self, recent_collection):
+        buffer = RecentVectorBuffer(lambda: recent_collection, window_seconds=60)
+        buffer.add("fresh", [1.0, 0.0])
+        buffer.add("stale", [1.0, 0.0])
+        recent_collection.update_one({"_id": "stale"}, {"$set": {"added_at": datetime.utcnow() - timedelta(minutes=5)}})
+        recent_collection.insert_one({"_id": "other-model", "vector": np.ones(3, dtype=np.float32).tobytes(),
+                                      "added_at": datetime.utcnow()})
+
+        assert [h[0] for h in buffer.search([1.0, 0.1], 5)] == ["fresh"]
+        buffer.delete("fresh")
+        assert buffer.search([1.0, 0.1], 5) == []
+
+    def test_unavailable_buffer_falls_back_to_the_index(self):
+        def broken():
+            raise ConnectionError("no route to host")
+
+        client = Mock()
+        client.search.return_value = knn_response(("a", 0.97))
+        index = OpenSearchVectorIndex(lambda: client, "tickets-index", recent=RecentVectorBuffer(broken))
+
+        index.add("b", [0.1, 0.2])
+        assert index.search([0.1, 0.2], 3) == [("a", 0.97)]
+
+    def test_failed_delete_does_not_fail_the_caller(self):
+        collection = Mock()
+        collection.delete_one.side_effect = ConnectionError("connection reset")
+        client = Mock()
+        index = OpenSearchVectorIndex(lambda: client, "tickets-index", recent=RecentVectorBuffer(lambda: collection))
+
+        index.delete("a")
+        index.delete("b")
+
+        assert collection.delete_one.call_count == 1  # Skipped after the error
+        assert client.delete.call_count == 2
+
+
+class TestDuplicateDetectorLocalIndex:
+    """The detector runs unchanged against the local backend."""
+
+    def test_near_identical_ticket_is_a_duplicate(self, index_path, monkeypatch):
+        embeddings = {
+            "Disk full": [1.0, 0.0, 0.1],
+            "Disk is full": [0.98, 0.0, 0.12],
+            "Printer jam": [0.0, 1.0, 0.0],
+        }
+
+        def invoke_model(**kwargs):
+            title = json.loads(kwargs["body"])["inputText"].split("\n")[0][len("Title: "):]
+            return {"body": Mock(read=lambda: json.dumps({"embedding": embeddings[title]}).encode())}
+
+        monkeypatch.setattr(duplicate_detector, "bedrock_runtime", Mock(invoke_model=invoke_model))
+        monkeypatch.setattr(duplicate_detector, "embedding_cache", Mock(
+            get_or_compute=lambda text, model, compute: compute(text)))
+        monkeypatch.setattr(duplicate_detector, "vector_index", LocalVectorIndex(index_path))
+
+        def detect(ticket_id, title):
+            event = {"v": 1, "ticket_id": ticket_id, "ticket": {"title": title, "description": "/var at 100%"}}
+            return duplicate_detector.lambda_handler(event, None)["duplicate"]
+
+        assert detect("t1", "Disk full")["is_duplicate"] is False
+        assert detect("t2", "Printer jam")["is_duplicate"] is False
+        result = detect("t3", "Disk is full")
+        assert result["is_duplicate"] is True and result["duplicate_of"] == "t1"
+
+    def test_threshold_matches_the_opensearch_scale(self, index_path, monkeypatch):
+        """A hit the OpenSearch backend scores above 0.9 is a duplicate locally too."""
+        cosine = 0.895  # Below 0.9 as a raw cosine, above it as a kNN score
+        vectors = {"t1": [1.0, 0.0], "t2": [cosine, math.sqrt(1 - cosine ** 2)]}
+        monkeypatch.setattr(duplicate_detector, "embedding_provider", Mock(
+            model_id="stub", embed=lambda text: vectors[text.split("\n")[0][len("Title: "):]]))
+        monkeypatch.setattr(duplicate_detector, "embedding_cache", Mock(
+            get_or_compute=lambda text, model, compute: compute(text)))
+        monkeypatch.setattr(duplicate_detector, "vector_index", LocalVectorIndex(index_path))
+
+        def detect(ticket_id):
+            event = {"v": 1, "ticket_id": ticket_id, "ticket": {"title": ticket_id, "description": "Disk full"}}
+            return duplicate_detector.lambda_handler(event, None)["duplicate"]
+
+        detect("t1")
+        result = detect("t2")
+        assert result["is_duplicate"] is True
+        assert result["duplicate_score"] == pytest.approx(score_from_cosine(cosine), abs=1e-5)